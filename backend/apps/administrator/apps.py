@@ -5,3 +5,7 @@ class AdministratorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.administrator'
     label = 'administrator'
+
+    def ready(self):
+        # Índice en memoria de sugerencias de clientes
+        from . import signals  # noqa: F401
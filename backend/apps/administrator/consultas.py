@@ -0,0 +1,37 @@
+"""
+Planes de consulta compartidos por las vistas y serializers del administrador.
+
+`ClienteSerializer.get_lotes` lee las relaciones de `Cliente.relaciones_lotes`
+cuando el queryset se construyó con `clientes_con_lotes()`; así un listado
+de N clientes cuesta un número fijo de consultas en lugar de N + 1. Del mismo
+modo `RelacionClienteLoteSerializer` lee `lote.*` y `cliente.*`, que
+`relaciones_con_datos()` trae en la misma consulta.
+"""
+from django.db.models import Prefetch
+
+from database.models import Cliente, relacion_cliente_lote
+
+ATRIBUTO_RELACIONES = 'relaciones_lotes'
+
+
+def prefetch_relaciones_lotes():
+    """Prefetch de las compras del cliente con su lote en una sola consulta"""
+    return Prefetch(
+        'compras',
+        queryset=relacion_cliente_lote.objects.select_related('lote'),
+        to_attr=ATRIBUTO_RELACIONES,
+    )
+
+
+def clientes_con_lotes(queryset=None):
+    """Queryset de clientes listo para serializar con `ClienteSerializer`"""
+    if queryset is None:
+        queryset = Cliente.objects.all()
+    return queryset.prefetch_related(prefetch_relaciones_lotes())
+
+
+def relaciones_con_datos(queryset=None):
+    """Queryset de relaciones listo para serializar con `RelacionClienteLoteSerializer`"""
+    if queryset is None:
+        queryset = relacion_cliente_lote.objects.all()
+    return queryset.select_related('cliente', 'lote')
@@ -0,0 +1,230 @@
+"""
+Actualización masiva de lotes (PUT /api/admin/lotes/bulk/).
+
+Dos modos, ambos en una sola transacción:
+
+- Parches por código: `{"lotes": [{"codigo": "A-01", "fields": {"precio": 1000}}, ...]}`.
+  Los códigos se resuelven con una consulta (`select_for_update`) y los
+  cambios se escriben con un `bulk_update` de los campos tocados.
+- Filtro + expresión: `{"filtro": {"manzana": "B"}, "operaciones":
+  {"precio_metro_cuadrado": {"op": "porcentaje", "valor": 5}}}`. Se aplica con
+  un único `UPDATE ... SET campo = ROUND(campo * 1.05, 2)` en la base de datos.
+
+`bulk_update` y `update()` no disparan señales, así que aquí se registra el
+`Historial_Estado` de los lotes cuyo estado cambia, se recalcula el resumen
+de lotes del dashboard y, al confirmar, se invalida una sola vez el snapshot
+del mapa y se publica un único evento.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from apps.maps.cambios import codificar_cursor
+from apps.maps.eventos import publicar_evento
+from apps.maps.snapshot import invalidar_snapshot
+from database.codigos import normalizar_codigo
+from database.models import Estado_Lote, Historial_Estado, Lote
+from database.resumenes import recalcular_lotes
+
+CAMPOS_NUMERICOS = ('area_lote', 'perimetro', 'precio', 'precio_metro_cuadrado')
+CAMPOS_EDITABLES = CAMPOS_NUMERICOS + ('estado', 'descripcion')
+FILTROS = {
+    'manzana': 'manzana__iexact',
+    'estado': 'estado_id',
+    'codigos': 'codigo__in',
+}
+OPERACIONES = ('asignar', 'sumar', 'multiplicar', 'porcentaje')
+MAXIMO_PARCHES = 5000
+
+
+class ActualizacionInvalida(ValueError):
+    pass
+
+
+def _decimal(campo, valor):
+    try:
+        numero = Decimal(str(valor))
+    except InvalidOperation:
+        raise ActualizacionInvalida(f'"{valor}" no es un número válido para {campo}')
+    # NaN / Infinity fallarían recién en la base de datos
+    if not numero.is_finite():
+        raise ActualizacionInvalida(f'"{valor}" no es un número válido para {campo}')
+    return numero
+
+
+def convertir_valor(campo, valor):
+    """Mismas reglas que `AdminUpdateLote`: precios vacíos → 0, descripción vacía → None"""
+    if campo not in CAMPOS_EDITABLES:
+        raise ActualizacionInvalida(
+            f'Campo no editable: "{campo}". Use uno de: {", ".join(CAMPOS_EDITABLES)}'
+        )
+    if campo == 'estado':
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ActualizacionInvalida(f'"{valor}" no es un estado válido')
+    if campo == 'descripcion':
+        return None if valor in (None, '') else str(valor)
+    if campo in ('precio', 'precio_metro_cuadrado') and valor in (None, ''):
+        return Decimal(0)
+    return _decimal(campo, valor)
+
+
+def _validar_estados(estados):
+    faltantes = set(estados) - set(Estado_Lote.objects.filter(id__in=estados).values_list('id', flat=True))
+    if faltantes:
+        raise ActualizacionInvalida(f'Estados inexistentes: {sorted(faltantes)}')
+
+
+def _registrar_historial(cambios_estado, usuario):
+    """`cambios_estado`: lista de (lote_id, estado_anterior, estado_nuevo)"""
+    if usuario is None or not cambios_estado:
+        return 0
+    Historial_Estado.objects.bulk_create([
+        Historial_Estado(
+            lote_id=lote_id,
+            estado_anterior_id=anterior,
+            estado_nuevo_id=nuevo,
+            usuario=usuario,
+        )
+        for lote_id, anterior, nuevo in cambios_estado
+    ])
+    return len(cambios_estado)
+
+
+def _notificar(codigos, marca):
+    """Una sola invalidación y un solo evento por actualización masiva, tras el commit"""
+    def notificar():
+        invalidar_snapshot()
+        publicar_evento({
+            "tipo": "lotes_actualizados",
+            "cursor": codificar_cursor(marca),
+            "codigos": codigos,
+        })
+    transaction.on_commit(notificar)
+
+
+def aplicar_parches(parches, usuario=None):
+    """Devuelve (lotes actualizados, historiales registrados)"""
+    if not isinstance(parches, list) or not parches:
+        raise ActualizacionInvalida('"lotes" debe ser una lista no vacía')
+    if len(parches) > MAXIMO_PARCHES:
+        raise ActualizacionInvalida(f'Se permiten como máximo {MAXIMO_PARCHES} lotes por petición')
+
+    cambios = {}
+    for parche in parches:
+        if not isinstance(parche, dict) or not parche.get('codigo') or not isinstance(parche.get('fields'), dict):
+            raise ActualizacionInvalida('Cada elemento debe tener "codigo" y "fields"')
+        valores = cambios.setdefault(normalizar_codigo(parche['codigo']), {})
+        for campo, valor in parche['fields'].items():
+            valores[campo] = convertir_valor(campo, valor)
+
+    estados = {v['estado'] for v in cambios.values() if 'estado' in v}
+    campos = sorted({campo for valores in cambios.values() for campo in valores})
+    marca = timezone.now()
+
+    with transaction.atomic():
+        if estados:
+            _validar_estados(estados)
+        lotes = list(Lote.objects.select_for_update().filter(codigo__in=list(cambios)))
+        no_encontrados = set(cambios) - {lote.codigo for lote in lotes}
+        if no_encontrados:
+            raise ActualizacionInvalida(f'Lotes no encontrados: {", ".join(sorted(no_encontrados))}')
+
+        cambios_estado = []
+        for lote in lotes:
+            for campo, valor in cambios[lote.codigo].items():
+                if campo == 'estado':
+                    if lote.estado_id != valor:
+                        cambios_estado.append((lote.id, lote.estado_id, valor))
+                    lote.estado_id = valor
+                else:
+                    setattr(lote, campo, valor)
+            # bulk_update no aplica auto_now: el feed de cambios depende de esta marca
+            lote.actualizado_en = marca
+
+        Lote.objects.bulk_update(lotes, campos + ['actualizado_en'], batch_size=500)
+        historial = _registrar_historial(cambios_estado, usuario)
+        recalcular_lotes()
+        _notificar([lote.codigo for lote in lotes], marca)
+
+    return len(lotes), historial
+
+
+def _expresion(campo, operacion):
+    if not isinstance(operacion, dict) or operacion.get('op') not in OPERACIONES or 'valor' not in operacion:
+        raise ActualizacionInvalida(
+            f'La operación de {campo} debe ser {{"op": {"|".join(OPERACIONES)}, "valor": ...}}'
+        )
+    op, valor = operacion['op'], operacion['valor']
+    if op == 'asignar':
+        return convertir_valor(campo, valor)
+    if campo not in CAMPOS_NUMERICOS:
+        raise ActualizacionInvalida(f'"{op}" solo se permite en: {", ".join(CAMPOS_NUMERICOS)}')
+
+    numero = _decimal(campo, valor)
+    if op == 'sumar':
+        return Round(F(campo) + Value(numero), 2)
+    factor = numero if op == 'multiplicar' else 1 + numero / 100
+    return Round(F(campo) * Value(factor), 2)
+
+
+def aplicar_expresion(filtro, operaciones, usuario=None):
+    """Devuelve (lotes actualizados, historiales registrados)"""
+    if not isinstance(filtro, dict) or not filtro:
+        raise ActualizacionInvalida('"filtro" es obligatorio para no actualizar todos los lotes por accidente')
+    if not isinstance(operaciones, dict) or not operaciones:
+        raise ActualizacionInvalida('"operaciones" debe indicar al menos un campo')
+
+    condiciones = {}
+    for clave, valor in filtro.items():
+        if clave not in FILTROS:
+            raise ActualizacionInvalida(f'Filtro no soportado: "{clave}". Use uno de: {", ".join(FILTROS)}')
+        if clave == 'codigos':
+            # Una cadena se recorrería carácter por carácter
+            if not isinstance(valor, list) or not valor or not all(isinstance(c, str) for c in valor):
+                raise ActualizacionInvalida('"codigos" debe ser una lista no vacía de códigos')
+            valor = [normalizar_codigo(codigo) for codigo in valor]
+        elif clave == 'estado':
+            try:
+                valor = int(valor)
+            except (TypeError, ValueError):
+                raise ActualizacionInvalida(f'"{valor}" no es un estado válido')
+        elif clave == 'manzana':
+            if not isinstance(valor, str) or not valor.strip():
+                raise ActualizacionInvalida('"manzana" debe ser un texto no vacío')
+        condiciones[FILTROS[clave]] = valor
+
+    valores = {campo: _expresion(campo, operacion) for campo, operacion in operaciones.items()}
+    marca = timezone.now()
+
+    with transaction.atomic():
+        nuevo_estado = valores.get('estado')
+        if nuevo_estado is not None:
+            _validar_estados({nuevo_estado})
+
+        # Una consulta para bloquear y conocer los estados previos; el UPDATE se
+        # limita a esos ids para que el historial corresponda exactamente
+        afectados = list(
+            Lote.objects.select_for_update().filter(**condiciones).values_list('id', 'codigo', 'estado_id')
+        )
+        if not afectados:
+            return 0, 0
+        ids = [lote_id for lote_id, _, _ in afectados]
+        actualizados = Lote.objects.filter(id__in=ids).update(**valores, actualizado_en=marca)
+
+        cambios_estado = []
+        if nuevo_estado is not None:
+            cambios_estado = [
+                (lote_id, anterior, nuevo_estado)
+                for lote_id, _, anterior in afectados
+                if anterior != nuevo_estado
+            ]
+        historial = _registrar_historial(cambios_estado, usuario)
+        recalcular_lotes()
+        _notificar([codigo for _, codigo, _ in afectados], marca)
+
+    return actualizados, historial
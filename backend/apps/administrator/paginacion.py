@@ -0,0 +1,171 @@
+"""
+Utilidades de paginación por cursor (keyset) para las vistas de función del
+panel de administración, que no usan la paginación global de DRF.
+
+El cursor es la tupla de valores de la clave de orden del último elemento
+entregado (p. ej. (apellidos, nombre, id) de los clientes o (fecha, id) del
+libro de transacciones), en JSON codificado en base64 urlsafe; la siguiente
+página se obtiene con `(claves) > cursor` (o `<` en orden descendente), de
+modo que el costo por página no depende de su posición.
+"""
+import base64
+import heapq
+import json
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connection
+from django.db.models import Q
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+MODOS_CONTEO = ('exact', 'estimate', 'none')
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(valor):
+    return base64.urlsafe_b64encode(str(valor).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(cursor + relleno).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        raise ParametroInvalido(f'"{cursor}" no es un cursor válido')
+
+
+def leer_limite(request):
+    valor = request.query_params.get('limit')
+    if valor is None:
+        return LIMITE_POR_DEFECTO
+    try:
+        limite = int(valor)
+    except ValueError:
+        raise ParametroInvalido(f'"{valor}" no es un límite válido')
+    if limite < 1:
+        raise ParametroInvalido('El límite debe ser mayor que 0')
+    return min(limite, LIMITE_MAXIMO)
+
+
+def leer_modo_conteo(request):
+    modo = request.query_params.get('count', 'exact')
+    if modo not in MODOS_CONTEO:
+        raise ParametroInvalido('count debe ser exact, estimate o none')
+    return modo
+
+
+def leer_campos(request):
+    """Lista de campos pedidos con ?fields=a,b,c o None si no se restringe"""
+    valor = request.query_params.get('fields')
+    if not valor:
+        return None
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
+
+
+def _codificar_tupla(valores):
+    return codificar_cursor(json.dumps([
+        valor.isoformat() if hasattr(valor, 'isoformat')
+        else valor if isinstance(valor, (int, float, str, type(None)))
+        else str(valor)  # UUID, Decimal
+        for valor in valores
+    ]))
+
+
+def _decodificar_tupla(cursor, modelo, claves):
+    try:
+        valores = json.loads(decodificar_cursor(cursor))
+        if not isinstance(valores, list) or len(valores) != len(claves):
+            raise ValueError
+        return [_convertir(modelo, clave, valor) for clave, valor in zip(claves, valores)]
+    except (ValueError, ValidationError):
+        raise ParametroInvalido(f'"{cursor}" no es un cursor válido')
+
+
+def _convertir(modelo, clave, valor):
+    try:
+        campo = modelo._meta.get_field(clave)
+    except FieldDoesNotExist:
+        # Anotación (p. ej. `rango` de la búsqueda): solo valores escalares
+        if not isinstance(valor, (int, float, str)) or isinstance(valor, bool):
+            raise ValueError
+        return valor
+    valor = campo.to_python(valor)
+    if valor is None:
+        raise ValueError
+    return valor
+
+
+def _comparar(claves, valores, operador):
+    """(c1, c2, ...) < (v1, v2, ...) (o >) en orden lexicográfico, expresado con Q"""
+    condicion = Q()
+    for i, clave in enumerate(claves):
+        iguales = {c: v for c, v in zip(claves[:i], valores[:i])}
+        condicion |= Q(**iguales, **{f'{clave}__{operador}': valores[i]})
+    return condicion
+
+
+def _valores_de(fila, claves):
+    if isinstance(fila, dict):
+        return tuple(fila[clave] for clave in claves)
+    return tuple(getattr(fila, clave) for clave in claves)
+
+
+def paginar_keyset_compuesto(querysets, cursor, limite, claves=('fecha', 'id'), descendente=True):
+    """
+    Keyset por `claves` sobre uno o varios querysets con las mismas columnas
+    (p. ej. libro activo y archivo), descendente por defecto (lo más reciente
+    primero). Las filas pueden ser diccionarios de `values()` o instancias.
+    Cada tabla entrega como máximo `limite + 1` filas leídas por su índice y se
+    mezclan en memoria. Devuelve (filas, siguiente_cursor).
+    """
+    orden = [f'-{clave}' if descendente else clave for clave in claves]
+    if cursor:
+        valores = _decodificar_tupla(cursor, querysets[0].model, claves)
+        operador = 'lt' if descendente else 'gt'
+        querysets = [queryset.filter(_comparar(claves, valores, operador)) for queryset in querysets]
+
+    partes = [list(queryset.order_by(*orden)[:limite + 1]) for queryset in querysets]
+    if len(partes) == 1:
+        filas = partes[0]
+    else:
+        filas = list(heapq.merge(*partes, key=partial(_valores_de, claves=claves), reverse=descendente))
+    filas = filas[:limite + 1]
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _codificar_tupla(_valores_de(filas[-1], claves))
+    return filas, siguiente
+
+
+def estimar_total(queryset):
+    """
+    Total aproximado de filas. En PostgreSQL, para consultas sin filtros, usa
+    las estadísticas del planificador (pg_class.reltuples) en lugar de COUNT(*);
+    en cualquier otro caso hace el conteo exacto.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            fila = cursor.fetchone()
+        # reltuples es -1 si la tabla nunca fue analizada
+        if fila and fila[0] >= 0:
+            return fila[0]
+    return queryset.count()
+
+
+def contar(queryset, modo):
+    """modo: 'exact' (COUNT), 'estimate' (estadísticas) o 'none' (sin total)"""
+    if modo == 'none':
+        return None
+    if modo == 'estimate':
+        return estimar_total(queryset)
+    if modo == 'exact':
+        return queryset.count()
+    raise ParametroInvalido('count debe ser exact, estimate o none')
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from database.models import Cliente, relacion_cliente_lote, Lote
+from .consultas import ATRIBUTO_RELACIONES
 import uuid
 
 
@@ -115,8 +116,18 @@ class RelacionClienteLoteSerializer(serializers.ModelSerializer):
 class ClienteSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Cliente
+    Acepta `fields=[...]` para devolver solo un subconjunto de campos
+    (por ejemplo, omitir `lotes` en los listados)
     """
     lotes = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
     class Meta:
         model = Cliente
         fields = [
@@ -140,15 +151,18 @@ class ClienteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'creado_en', 'actualizado_en']
 
     def get_lotes(self,obj):
-        # usa prefetch en la vista :'compras__lote', 'compras__lote__estado'
-        relaciones = obj.compras.select_related('lote', 'lote__estado').all()
+        # Usa el prefetch de `consultas.clientes_con_lotes()`; si el cliente no viene
+        # de ese queryset, se consultan sus relaciones en una sola query
+        relaciones = getattr(obj, ATRIBUTO_RELACIONES, None)
+        if relaciones is None:
+            relaciones = obj.compras.select_related('lote')
         return [
             {
                 "id": rel.lote.id,
                 "codigo": rel.lote.codigo,
                 "manzana": rel.lote.manzana,
                 "lote_numero": rel.lote.lote_numero,
-                "estado": rel.lote.estado.id,
+                "estado": rel.lote.estado_id,
                 "area_lote": rel.lote.area_lote,
                 "precio": rel.lote.precio,
                 "tipo_relacion": rel.tipo_relacion,
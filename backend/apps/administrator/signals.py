@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from database.models import Cliente
+from .sugerencias import indice, incrementar_version
+
+
+@receiver(post_save, sender=Cliente)
+def actualizar_indice_sugerencias(sender, instance, raw=False, **kwargs):
+    """Mantiene el índice en memoria de type-ahead y avisa a los demás procesos"""
+    if raw:
+        return
+
+    def aplicar():
+        anterior, nueva = incrementar_version()
+        if indice.construido:
+            indice.actualizar(instance)
+            indice.sincronizar_version(anterior, nueva)
+
+    transaction.on_commit(aplicar)
+
+
+@receiver(post_delete, sender=Cliente)
+def eliminar_de_indice_sugerencias(sender, instance, **kwargs):
+    cliente_id = instance.pk
+
+    def aplicar():
+        anterior, nueva = incrementar_version()
+        if indice.construido:
+            indice.eliminar(cliente_id)
+            indice.sincronizar_version(anterior, nueva)
+
+    transaction.on_commit(aplicar)
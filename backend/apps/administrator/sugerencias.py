@@ -0,0 +1,144 @@
+"""
+Índice en memoria para la búsqueda por prefijo (type-ahead) de clientes.
+
+Cada proceso mantiene una lista ordenada de tokens plegados (nombre,
+apellidos, DNI, teléfono) → id de cliente y la consulta con `bisect`, sin
+tocar la base de datos. El índice se construye en la primera consulta y se
+mantiene con las señales de `Cliente` (ver `signals.py`).
+
+Para que los demás workers se enteren de los cambios, cada escritura
+incrementa una versión en la caché de Django; un proceso cuya versión local
+no coincide reconstruye su índice en la siguiente consulta.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from database.busqueda import plegar
+from database.models import Cliente
+
+VERSION_KEY = 'admin:clientes:sugerencias:version'
+# `email` solo se devuelve (lo muestra el diálogo de asignación); no se indexa
+CAMPOS = ('id', 'nombre', 'apellidos', 'dni', 'telefono', 'email')
+
+
+def _tokens(cliente):
+    palabras = plegar(f"{cliente['nombre']} {cliente['apellidos']}").split()
+    for valor in (cliente['dni'], cliente['telefono']):
+        if valor:
+            palabras.append(plegar(valor))
+    return set(palabras)
+
+
+class IndiceSugerencias:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entradas = []   # lista ordenada de (token, id)
+        self._clientes = {}   # id -> datos del cliente
+        self._tokens = {}     # id -> tokens indexados
+        self._version = None
+        self._construido = False
+
+    @property
+    def construido(self):
+        return self._construido
+
+    def construir(self):
+        version = obtener_version()
+        filas = Cliente.objects.filter(estado=True).values(*CAMPOS)
+        entradas, clientes, tokens = [], {}, {}
+        for fila in filas:
+            fila['id'] = str(fila['id'])
+            clientes[fila['id']] = fila
+            tokens[fila['id']] = _tokens(fila)
+            entradas.extend((token, fila['id']) for token in tokens[fila['id']])
+        entradas.sort()
+        with self._lock:
+            self._entradas, self._clientes, self._tokens = entradas, clientes, tokens
+            self._version = version
+            self._construido = True
+
+    def _quitar(self, cliente_id):
+        for token in self._tokens.pop(cliente_id, ()):
+            pos = bisect_left(self._entradas, (token, cliente_id))
+            if pos < len(self._entradas) and self._entradas[pos] == (token, cliente_id):
+                del self._entradas[pos]
+        self._clientes.pop(cliente_id, None)
+
+    def actualizar(self, cliente):
+        """Reemplaza las entradas de un cliente (o las quita si está inactivo)"""
+        datos = {campo: getattr(cliente, campo) for campo in CAMPOS}
+        datos['id'] = str(datos['id'])
+        with self._lock:
+            self._quitar(datos['id'])
+            if cliente.estado:
+                self._clientes[datos['id']] = datos
+                self._tokens[datos['id']] = _tokens(datos)
+                for token in self._tokens[datos['id']]:
+                    insort(self._entradas, (token, datos['id']))
+
+    def eliminar(self, cliente_id):
+        with self._lock:
+            self._quitar(str(cliente_id))
+
+    def sincronizar_version(self, anterior, nueva):
+        """Tras aplicar un cambio local, adopta la nueva versión si nadie más escribió"""
+        with self._lock:
+            if self._version == anterior:
+                self._version = nueva
+
+    def buscar(self, consulta, limite=10):
+        """
+        Clientes cuyo primer término coincide por prefijo con algún token y que
+        además contienen (por prefijo) el resto de palabras de la consulta.
+        """
+        palabras = plegar(consulta).split()
+        if not palabras:
+            return []
+        if not self._construido or self._version != obtener_version():
+            self.construir()
+
+        # La palabra más larga es la más selectiva para recorrer el índice
+        principal = max(palabras, key=len)
+        resto = [p for p in palabras if p != principal]
+
+        with self._lock:
+            entradas = self._entradas
+            resultados, vistos = [], set()
+            pos = bisect_left(entradas, (principal,))
+            while pos < len(entradas) and entradas[pos][0].startswith(principal):
+                cliente_id = entradas[pos][1]
+                pos += 1
+                if cliente_id in vistos:
+                    continue
+                vistos.add(cliente_id)
+                tokens = self._tokens[cliente_id]
+                if all(any(t.startswith(p) for t in tokens) for p in resto):
+                    resultados.append(self._clientes[cliente_id])
+                    if len(resultados) >= limite:
+                        break
+        return resultados
+
+
+def obtener_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def incrementar_version():
+    """Devuelve (anterior, nueva) versión del índice compartido"""
+    anterior = obtener_version()
+    try:
+        nueva = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        nueva = cache.incr(VERSION_KEY)
+    return anterior, nueva
+
+
+indice = IndiceSugerencias()
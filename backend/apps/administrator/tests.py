@@ -1,3 +1,674 @@
-from django.test import TestCase
+import csv
+import io
+import zipfile
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from database.archivo import archivar
+from database.cuotas import reconciliar_cuotas
+from database.models import (
+    Analisis_Duplicados, Cliente, Credito, Estado_Lote, Lote, Transaccion, Transaccion_Archivada,
+    relacion_cliente_lote,
+)
+from database.resumenes import reconciliar
+from innova_inversiones import metricas
+from innova_inversiones.metricas import medir, registro as registro_metricas
+from innova_inversiones.presupuesto import ATRIBUTO, PresupuestoExcedido
+from innova_inversiones.pruebas import PresupuestoConsultasMixin
+
+from . import exportar, views
+from .paginacion import codificar_cursor
+from .sugerencias import indice as indice_sugerencias
+from .transacciones import ENCABEZADOS_EXPORTACION
+
+
+class ListarClientesQueryCountTest(TestCase):
+    """
+    Regresión del N+1 en `ClienteSerializer.get_lotes`: el número de consultas
+    del listado no debe crecer con la cantidad de clientes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        for i in range(20):
+            cliente = Cliente.objects.create(nombre=f'Cliente {i}', apellidos='Prueba')
+            lote = Lote.objects.create(
+                codigo=f'A-{i:02d}', manzana='A', lote_numero=str(i),
+                perimetro=40, area_lote=100, precio=10000, estado=estado,
+            )
+            relacion_cliente_lote.objects.create(cliente=cliente, lote=lote, tipo_relacion='Propietario')
+
+    def test_listar_clientes_consultas_constantes(self):
+        # 1 consulta de clientes + 1 prefetch de relaciones con su lote
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('listar-clientes'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 20)
+        self.assertEqual(len(response.json()['clientes'][0]['lotes']), 1)
+
+    def test_obtener_cliente_consultas_constantes(self):
+        cliente = Cliente.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('obtener-cliente', args=[cliente.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['lotes'][0]['codigo'], cliente.compras.get().lote.codigo)
+
+
+class ListarClientesCursorTest(TestCase):
+    """Paginación por cursor de `ListarClientes` sobre (rango, apellidos, nombre, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for nombre, apellidos in [
+            ('Mariana', 'Zapata'), ('Ana', 'Quispe'), ('Luis', 'Ana Torres'), ('Ana', 'Benítez'),
+            ('Carlos', 'Álvarez'), ('Rosa', 'Benítez'), ('Pedro', 'Benítez'),
+        ]:
+            Cliente.objects.create(nombre=nombre, apellidos=apellidos)
+
+    def recorrer(self, **parametros):
+        nombres, cursor = [], None
+        while True:
+            consulta = dict(parametros, limit=2, **({'cursor': cursor} if cursor else {}))
+            datos = self.client.get(reverse('listar-clientes'), consulta).json()
+            self.assertLessEqual(len(datos['clientes']), 2)
+            nombres += [f"{c['nombre']} {c['apellidos']}" for c in datos['clientes']]
+            cursor = datos['next_cursor']
+            if cursor is None:
+                return nombres
+
+    def test_paginas_en_orden_alfabetico(self):
+        nombres = self.recorrer(fields='nombre,apellidos')
+        completo = self.client.get(reverse('listar-clientes'), {'fields': 'nombre,apellidos'}).json()
+        self.assertEqual(nombres, [f"{c['nombre']} {c['apellidos']}" for c in completo['clientes']])
+        self.assertEqual(nombres[:4], ['Luis Ana Torres', 'Ana Benítez', 'Pedro Benítez', 'Rosa Benítez'])
+
+    def test_paginas_conservan_el_rango_de_busqueda(self):
+        # Empieza por "ana" → alguna palabra empieza → solo la contiene
+        nombres = self.recorrer(search='ana', fields='nombre,apellidos')
+        self.assertEqual(nombres, ['Ana Benítez', 'Ana Quispe', 'Luis Ana Torres', 'Mariana Zapata'])
+
+    def test_cursor_invalido(self):
+        for cursor in ('no-es-base64!', codificar_cursor('["x", "y", "no-es-uuid"]'), codificar_cursor('42')):
+            response = self.client.get(reverse('listar-clientes'), {'limit': 2, 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_count_invalido_con_y_sin_paginacion(self):
+        for parametros in ({'count': 'foo'}, {'count': 'foo', 'limit': 2}):
+            response = self.client.get(reverse('listar-clientes'), parametros)
+            self.assertEqual(response.status_code, 400, parametros)
+        response = self.client.get(reverse('listar-clientes'), {'count': 'none'})
+        self.assertIsNone(response.json()['count'])
+
+
+class SugerirClientesTest(TestCase):
+    """Type-ahead de clientes activos por prefijo, sin tildes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Cliente.objects.create(nombre='José', apellidos='Muñoz', dni='40123456', email='jose@correo.pe')
+        Cliente.objects.create(nombre='Josefina', apellidos='Ramos', dni='40999999')
+        Cliente.objects.create(nombre='Joselito', apellidos='Inactivo', estado=False)
+
+    def setUp(self):
+        cache.clear()
+        indice_sugerencias.construir()
+
+    def sugerir(self, q):
+        response = self.client.get(reverse('sugerir-clientes'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['clientes']
+
+    def test_prefijo_sin_tildes_y_solo_activos(self):
+        self.assertEqual({c['nombre'] for c in self.sugerir('jose')}, {'José', 'Josefina'})
+        self.assertEqual([c['nombre'] for c in self.sugerir('JOSE munoz')], ['José'])
+        self.assertEqual([c['nombre'] for c in self.sugerir('4099')], ['Josefina'])
+        # Solo inicio de palabra: "uñoz" no es prefijo de ninguna
+        self.assertEqual(self.sugerir('unoz'), [])
+
+    def test_limite(self):
+        for limite in ('0', '-3', 'x'):
+            response = self.client.get(reverse('sugerir-clientes'), {'q': 'jose', 'limit': limite})
+            self.assertEqual(response.status_code, 400, limite)
+        response = self.client.get(reverse('sugerir-clientes'), {'q': 'jose', 'limit': 1})
+        self.assertEqual(len(response.json()['clientes']), 1)
+
+    def test_incluye_email(self):
+        cliente = self.sugerir('munoz')[0]
+        self.assertEqual(cliente['email'], 'jose@correo.pe')
+        self.assertEqual(set(cliente), {'id', 'nombre', 'apellidos', 'dni', 'telefono', 'email'})
+
+
+class DuplicadosClientesTest(TestCase):
+    """La vista solo sirve el análisis guardado por `detectar_duplicados_clientes`"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Cliente.objects.create(nombre='José Luis', apellidos='Quispe Mamani', telefono='987654321')
+        Cliente.objects.create(nombre='JOSE LUIS', apellidos='QUISPE MAMANI')
+        Cliente.objects.create(nombre='Rosa', apellidos='Vega')
+
+    def test_sin_analisis(self):
+        response = self.client.get(reverse('duplicados-clientes'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_sirve_el_ultimo_analisis_sin_recalcular(self):
+        call_command('detectar_duplicados_clientes', '--umbral', '0.5', stdout=StringIO())
+        self.assertEqual(Analisis_Duplicados.objects.count(), 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('duplicados-clientes'), {'recalcular': '1'})
+        datos = response.json()
+        self.assertEqual(datos['count'], 1)
+        self.assertEqual(datos['umbral'], 0.5)
+        par = {datos['candidatos'][0]['cliente_a']['nombre'], datos['candidatos'][0]['cliente_b']['nombre']}
+        self.assertEqual(par, {'José Luis', 'JOSE LUIS'})
+
+        response = self.client.get(reverse('duplicados-clientes'), {'umbral': '1'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_umbral_invalido(self):
+        call_command('detectar_duplicados_clientes', '--umbral', '0.8', stdout=StringIO())
+        for umbral in ('1.5', '-0.1', 'x', '0.5'):
+            response = self.client.get(reverse('duplicados-clientes'), {'umbral': umbral})
+            self.assertEqual(response.status_code, 400, umbral)
+        self.assertEqual(Analisis_Duplicados.objects.count(), 1)
+
+
+class CodigoLoteNoCanonicoTest(TestCase):
+    """Las vistas que reciben un código lo resuelven aunque llegue con mayúsculas o espacios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        cls.lote = Lote.objects.create(
+            codigo='E-03', manzana='E', lote_numero='3', perimetro=40, area_lote=100, precio=5000, estado=estado,
+        )
+        cliente = Cliente.objects.create(nombre='Rosa', apellidos='Vega')
+        relacion_cliente_lote.objects.create(cliente=cliente, lote=cls.lote, tipo_relacion='Propietario')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ver_lote(self):
+        response = self.client.get(reverse('admin-view-lote-codigo'), {'codigo': ' E-03 '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['codigo'], 'e-03')
+        response = self.client.get(reverse('admin-view-lote-codigo'), {'codigo': 'E-04'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_actualizar_lote(self):
+        response = self.client.put(
+            reverse('admin-update-lote'), {'codigo': 'E-03', 'input_precio': 6500}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Lote.objects.get(pk=self.lote.pk).precio, 6500)
+
+    def test_relaciones_por_codigo(self):
+        response = self.client.get(reverse('listar-relaciones'), {'codigo_lote': 'E-03'})
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_mapa_publica_el_codigo_canonico(self):
+        lotes = self.client.get(reverse('lotes_estado')).json()
+        self.assertEqual([lote['codigo'] for lote in lotes], ['e-03'])
+
+
+class ActualizacionMasivaLotesTest(TestCase):
+    """PUT lotes/bulk/: todo o nada, en una transacción"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.disponible = Estado_Lote.objects.create(nombre='Disponible')
+        cls.vendido = Estado_Lote.objects.create(nombre='Vendido')
+        for manzana in 'AB':
+            for i in range(3):
+                Lote.objects.create(
+                    codigo=f'{manzana}-{i:02d}', manzana=manzana, lote_numero=str(i),
+                    perimetro=40, area_lote=100, precio=1000, estado=cls.disponible,
+                )
+
+    def put(self, datos):
+        return self.client.put(reverse('admin-update-lotes-masivo'), datos, content_type='application/json')
+
+    def precios(self):
+        return dict(Lote.objects.values_list('codigo', 'precio'))
+
+    def test_parches(self):
+        response = self.put({'lotes': [
+            {'codigo': 'A-00', 'fields': {'precio': 1500, 'estado': self.vendido.id}},
+            {'codigo': 'b-01', 'fields': {'descripcion': 'Esquina'}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['actualizados'], 2)
+        lote = Lote.objects.get(codigo='a-00')
+        self.assertEqual((lote.precio, lote.estado_id), (1500, self.vendido.id))
+        self.assertEqual(Lote.objects.get(codigo='b-01').descripcion, 'Esquina')
+
+    def test_codigo_inexistente_no_modifica_nada(self):
+        antes = self.precios()
+        response = self.put({'lotes': [
+            {'codigo': 'A-00', 'fields': {'precio': 1}},
+            {'codigo': 'Z-99', 'fields': {'precio': 1}},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.precios(), antes)
+
+    def test_error_tras_escribir_revierte_todo(self):
+        antes = self.precios()
+        with mock.patch('apps.administrator.lotes_masivo.recalcular_lotes', side_effect=RuntimeError('falla')):
+            response = self.put({
+                'filtro': {'manzana': 'A'}, 'operaciones': {'precio': {'op': 'porcentaje', 'valor': 10}},
+            })
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.precios(), antes)
+
+    def test_expresion(self):
+        response = self.put({
+            'filtro': {'codigos': ['A-00', 'B-02']}, 'operaciones': {'precio': {'op': 'sumar', 'valor': 250}},
+        })
+        self.assertEqual(response.json()['actualizados'], 2)
+        precios = self.precios()
+        self.assertEqual((precios['a-00'], precios['b-02'], precios['a-01']), (1250, 1250, 1000))
+
+    def test_codigos_debe_ser_lista(self):
+        response = self.put({
+            'filtro': {'codigos': 'A-00'}, 'operaciones': {'precio': {'op': 'asignar', 'valor': 1}},
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(self.precios().values()), {1000})
+
+    def test_filtros_invalidos(self):
+        operaciones = {'precio': {'op': 'asignar', 'valor': 1}}
+        for filtro in ({'estado': 'abc'}, {'estado': None}, {'manzana': 3}, {'manzana': ' '}):
+            response = self.put({'filtro': filtro, 'operaciones': operaciones})
+            self.assertEqual(response.status_code, 400, filtro)
+        self.assertEqual(set(self.precios().values()), {1000})
+
+    def test_filtro_por_estado_numerico_en_texto(self):
+        response = self.put({
+            'filtro': {'estado': str(self.disponible.id)}, 'operaciones': {'precio': {'op': 'sumar', 'valor': 1}},
+        })
+        self.assertEqual(response.json()['actualizados'], 6)
+
+    def test_decimales_no_finitos(self):
+        for valor in ('NaN', 'Infinity', '-inf'):
+            response = self.put({'filtro': {'manzana': 'A'}, 'operaciones': {'precio': {'op': 'sumar', 'valor': valor}}})
+            self.assertEqual(response.status_code, 400, valor)
+            response = self.put({'lotes': [{'codigo': 'A-00', 'fields': {'area_lote': valor}}]})
+            self.assertEqual(response.status_code, 400, valor)
+        self.assertEqual(set(self.precios().values()), {1000})
+
+
+class CreditosTest(TestCase):
+    """Cronograma de un crédito y cartera por cobrar a una fecha de corte"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        lote = Lote.objects.create(
+            codigo='f-01', manzana='F', lote_numero='1', perimetro=40, area_lote=100, precio=1200, estado=estado,
+        )
+        cliente = Cliente.objects.create(nombre='Rosa', apellidos='Vega')
+        cls.credito = Credito.objects.create(
+            cliente=cliente, lote=lote, monto_base=1200, interes=12, num_cuotas_totales=3,
+            sistema_amortizacion='aleman', fecha_inicio=timezone.make_aware(datetime(2026, 1, 31)),
+            estado_credito='en_proceso',
+        )
+        Credito.objects.create(
+            cliente=cliente, lote=lote, monto_base=600, num_cuotas_totales=2,
+            fecha_inicio=timezone.make_aware(datetime(2026, 1, 31)), estado_credito='cancelado',
+        )
+        Transaccion.objects.create(credito=cls.credito, tipo='CUOTA', monto=412, lote=lote, cliente=cliente)
+
+    def test_cronograma(self):
+        response = self.client.get(reverse('cronograma-credito', args=[self.credito.id]), {'fecha': '2026-03-31'})
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual(datos['monto_total'], 1224)
+        self.assertEqual(
+            [(c['cuota'], c['pagada'], c['vencida']) for c in datos['cuotas']],
+            [(412, True, False), (408, False, True), (404, False, False)],
+        )
+        self.assertEqual(datos['situacion']['cuotas_atrasadas'], 1)
+
+    def test_cronograma_errores(self):
+        response = self.client.get(reverse('cronograma-credito', args=['00000000-0000-0000-0000-000000000000']))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('cronograma-credito', args=[self.credito.id]), {'fecha': '31/03/2026'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_por_cobrar(self):
+        response = self.client.get(reverse('creditos-por-cobrar'), {'fecha': '2026-03-31'})
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        # El crédito cancelado no cuenta
+        self.assertEqual(datos['count'], 1)
+        self.assertEqual(datos['totales'], {
+            'creditos': 1, 'con_atraso': 1, 'monto_vencido': 408.0, 'por_cobrar': 812.0, 'saldo_capital': 800.0,
+        })
+        self.assertEqual(datos['creditos'][0]['lote'], 'f-01')
+
+    def test_por_cobrar_solo_atrasados(self):
+        response = self.client.get(reverse('creditos-por-cobrar'), {'fecha': '2026-02-01', 'atrasados': 'true'})
+        self.assertEqual(response.json()['count'], 0)
+        response = self.client.get(reverse('creditos-por-cobrar'), {'fecha': '2026-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportacionesTest(TestCase):
+    """CSV y XLSX en streaming de clientes, lotes, relaciones y transacciones"""
+
+    HOJA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        cls.lotes = [
+            Lote.objects.create(
+                codigo=f'g-{i:02d}', manzana='G', lote_numero=str(i), perimetro=40, area_lote=100,
+                precio=1000 + i, estado=estado, descripcion='Esquina; con "comillas"' if i == 0 else None,
+            )
+            for i in range(3)
+        ]
+        cls.cliente = Cliente.objects.create(nombre='Toño', apellidos='Peña; "Ñique"', dni='40123456')
+        Cliente.objects.create(nombre='Ana', apellidos='Álvarez')
+        relacion_cliente_lote.objects.create(cliente=cls.cliente, lote=cls.lotes[0], tipo_relacion='Propietario')
+        Transaccion.objects.create(tipo='VENTA', monto=5000, lote=cls.lotes[0], cliente=cls.cliente)
+
+    def descargar(self, nombre, **parametros):
+        response = self.client.get(reverse(nombre), parametros)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def csv(self, nombre, **parametros):
+        response, contenido = self.descargar(nombre, **parametros)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        texto = contenido.decode('utf-8')
+        self.assertTrue(texto.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(texto[1:])))
+
+    def xlsx(self, nombre, **parametros):
+        response, contenido = self.descargar(nombre, formato='xlsx', **parametros)
+        self.assertEqual(response['Content-Type'], exportar.TIPO_XLSX)
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo:
+            self.assertIsNone(archivo.testzip())
+            self.assertIn('xl/workbook.xml', archivo.namelist())
+            hoja = ElementTree.fromstring(archivo.read('xl/worksheets/sheet1.xml'))
+        return [
+            [''.join(celda.itertext()) for celda in fila.iter(f'{self.HOJA}c')]
+            for fila in hoja.iter(f'{self.HOJA}row')
+        ]
+
+    def test_clientes_csv(self):
+        filas = self.csv('exportar-clientes')
+        self.assertEqual(filas[0][:3], ['id', 'nombre', 'apellidos'])
+        # El orden de "Á" depende de la intercalación de la base de datos
+        self.assertCountEqual([fila[1:3] for fila in filas[1:]], [['Ana', 'Álvarez'], ['Toño', 'Peña; "Ñique"']])
+
+    def test_clientes_xlsx(self):
+        filas = self.xlsx('exportar-clientes', search='nique')
+        self.assertEqual(filas[0][:3], ['id', 'nombre', 'apellidos'])
+        self.assertEqual(filas[1][:4], [str(self.cliente.id), 'Toño', 'Peña; "Ñique"', '40123456'])
+        self.assertEqual(len(filas), 2)
+
+    def test_lotes_por_bloques(self):
+        with mock.patch.object(exportar, 'FILAS_POR_BLOQUE', 2):
+            filas_csv = self.csv('exportar-lotes')
+            filas_xlsx = self.xlsx('exportar-lotes')
+        self.assertEqual([fila[1] for fila in filas_csv[1:]], ['g-00', 'g-01', 'g-02'])
+        self.assertEqual(filas_csv[1][9], 'Esquina; con "comillas"')
+        self.assertEqual([fila[1] for fila in filas_xlsx[1:]], ['g-00', 'g-01', 'g-02'])
+
+    def test_relaciones_y_transacciones(self):
+        filas = self.csv('exportar-relaciones', codigo_lote='G-00')
+        self.assertEqual([(fila[2], fila[8]) for fila in filas[1:]], [('Propietario', 'g-00')])
+        filas = self.csv('exportar-transacciones', cliente=str(self.cliente.id))
+        self.assertEqual(filas[0], ENCABEZADOS_EXPORTACION)
+        self.assertEqual([(fila[2], fila[7]) for fila in filas[1:]], [('VENTA', 'Toño Peña; "Ñique"')])
+
+    def test_parametros_invalidos(self):
+        for nombre, parametros in [
+            ('exportar-clientes', {'formato': 'pdf'}),
+            ('exportar-lotes', {'estado': 'abc'}),
+            ('exportar-relaciones', {'cliente_id': 'no-es-uuid'}),
+            ('exportar-transacciones', {'cliente': 'no-es-uuid'}),
+        ]:
+            response = self.client.get(reverse(nombre), parametros)
+            self.assertEqual(response.status_code, 400, nombre)
+
+    def test_error_inesperado(self):
+        with mock.patch.object(views, '_exportar', side_effect=RuntimeError('falla')):
+            response = self.client.get(reverse('exportar-lotes'))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['detalle'], 'falla')
+
+
+class LibroTransaccionesTest(TestCase):
+    """Cursor (fecha, id) sobre el libro activo y el archivo mezclados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        lote = Lote.objects.create(
+            codigo='c-01', manzana='C', lote_numero='1', perimetro=40, area_lote=100, precio=12000, estado=estado,
+        )
+        cliente = Cliente.objects.create(nombre='Rosa', apellidos='Vega')
+        credito = Credito.objects.create(
+            cliente=cliente, lote=lote, monto_base=12000, num_cuotas_totales=12,
+            fecha_inicio=timezone.now(), estado_credito='en_proceso',
+        )
+        # Varias transacciones comparten fecha: el id desempata
+        for anio, mes in [(2022, 3), (2022, 3), (2023, 1), (2023, 7), (2023, 7), (2024, 2), (2024, 2), (2025, 5)]:
+            Transaccion.objects.create(
+                credito=credito, tipo='CUOTA', monto=1000, lote=lote, cliente=cliente,
+                fecha=timezone.make_aware(datetime(anio, mes, 1)),
+            )
+        archivar(2023)
+
+    def recorrer(self, **parametros):
+        ids, cursor = [], None
+        while True:
+            datos = self.client.get(reverse('listar-transacciones'), {
+                'limit': 3, **parametros, **({'cursor': cursor} if cursor else {}),
+            }).json()
+            ids += [(fila['id'], fila['archivada']) for fila in datos['transacciones']]
+            cursor = datos['next_cursor']
+            if not cursor:
+                return ids
+
+    def test_archivo_conserva_ids_y_totales(self):
+        self.assertEqual((Transaccion.objects.count(), Transaccion_Archivada.objects.count()), (3, 5))
+        self.assertEqual(reconciliar(aplicar=False), [])
+        self.assertEqual(reconciliar_cuotas(aplicar=False), [])
+
+    def test_paginas_mezclan_activo_y_archivo(self):
+        esperado = sorted(
+            [(fecha, pk, False) for pk, fecha in Transaccion.objects.values_list('id', 'fecha')]
+            + [(fecha, pk, True) for pk, fecha in Transaccion_Archivada.objects.values_list('id', 'fecha')],
+            reverse=True,
+        )
+        self.assertEqual(self.recorrer(archivo='true'), [(pk, archivada) for _, pk, archivada in esperado])
+
+    def test_sin_archivo_solo_libro_activo(self):
+        self.assertEqual(
+            self.recorrer(), [(pk, False) for pk in Transaccion.objects.order_by('-fecha', '-id').values_list('id', flat=True)]
+        )
+
+    def test_filtro_de_fechas_sobre_el_archivo(self):
+        ids = self.recorrer(archivo='true', desde='2023-01-01', hasta='2023-12-31')
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(all(archivada for _, archivada in ids))
+
+    def test_cursor_invalido(self):
+        response = self.client.get(reverse('listar-transacciones'), {'cursor': 'no-es-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PresupuestoConsultasRelacionesTest(PresupuestoConsultasMixin, TestCase):
+    """
+    Las vistas de relaciones cliente-lote no deben hacer una consulta por fila
+    (ni por `relacion.cliente` / `relacion.lote` al serializar).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estado = Estado_Lote.objects.create(nombre='Disponible')
+        cls.relaciones = []
+        for i in range(20):
+            cliente = Cliente.objects.create(nombre=f'José {i}', apellidos='Núñez')
+            lote = Lote.objects.create(
+                codigo=f'A-{i:02d}', manzana='A', lote_numero=str(i),
+                perimetro=40, area_lote=100, precio=10000, estado=cls.estado,
+            )
+            cls.relaciones.append(
+                relacion_cliente_lote.objects.create(cliente=cliente, lote=lote, tipo_relacion='Propietario')
+            )
+        cls.cliente_libre = Cliente.objects.create(nombre='Inés', apellidos='Peña')
+        cls.lote_libre = Lote.objects.create(
+            codigo='B-01', manzana='B', lote_numero='1', perimetro=40, area_lote=100, estado=cls.estado,
+        )
+
+    def test_listar_relaciones(self):
+        response = self.assertPresupuesto('get', reverse('listar-relaciones'))
+        self.assertEqual(response.json()['count'], 20)
+        self.assertEqual(response.json()['relaciones'][0]['cliente_apellidos'], 'Núñez')
+
+    def test_asignar_lote(self):
+        datos = {'cliente': str(self.cliente_libre.id), 'lote': self.lote_libre.id, 'tipo_relacion': 'reservante'}
+        response = self.assertPresupuesto(
+            'post', reverse('asignar-lote-cliente'), datos, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['relacion']['lote_codigo'], 'b-01')
+
+    def test_actualizar_relacion(self):
+        relacion = self.relaciones[0]
+        response = self.assertPresupuesto(
+            'patch', reverse('actualizar-relacion', args=[relacion.id]),
+            {'tipo_relacion': 'reservante'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['relacion']['cliente_nombre'], 'José 0')
+
+    def test_eliminar_relacion(self):
+        relacion = self.relaciones[1]
+        response = self.assertPresupuesto('delete', reverse('eliminar-relacion', args=[relacion.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('a-01', response.json()['message'])
+        self.assertFalse(relacion_cliente_lote.objects.filter(id=relacion.id).exists())
+
+    def test_actualizar_lote(self):
+        response = self.assertPresupuesto(
+            'put', f"{reverse('admin-update-lote')}?codigo=A-05", {'input_precio': 12345},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Lote.objects.get(codigo='a-05').precio, 12345)
+
+    def test_listar_clientes_paginado(self):
+        response = self.assertPresupuesto('get', reverse('listar-clientes'), {'limit': 10})
+        self.assertEqual(len(response.json()['clientes']), 10)
+
+
+class PresupuestoConsultasMiddlewareTest(TestCase):
+    """Con DEBUG el middleware avisa o falla cuando una vista supera su presupuesto"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        lote = Lote.objects.create(
+            codigo='A-01', manzana='A', lote_numero='1', perimetro=40, area_lote=100, estado=estado,
+        )
+        cliente = Cliente.objects.create(nombre='Raúl', apellidos='Díaz')
+        relacion_cliente_lote.objects.create(cliente=cliente, lote=lote, tipo_relacion='Propietario')
+
+    def setUp(self):
+        # Presupuesto imposible para la vista de relaciones (hace 1 consulta)
+        parche = mock.patch.object(views.ListarRelacionesClienteLote, ATRIBUTO, 0)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    @override_settings(DEBUG=True, PRESUPUESTO_CONSULTAS='error')
+    def test_error_con_debug(self):
+        # El manejador de Django registra la excepción antes de que el cliente de pruebas la relance
+        with self.assertRaises(PresupuestoExcedido), self.assertLogs('django.request', 'ERROR'):
+            self.client.get(reverse('listar-relaciones'))
+
+    @override_settings(DEBUG=True, PRESUPUESTO_CONSULTAS='avisar')
+    def test_aviso_con_debug(self):
+        with self.assertLogs('innova.metricas', 'WARNING') as registros:
+            response = self.client.get(reverse('listar-relaciones'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('presupuesto 0', registros.output[0])
+
+    @override_settings(DEBUG=False, PRESUPUESTO_CONSULTAS='error')
+    def test_sin_debug_solo_cuenta(self):
+        registro_metricas.reiniciar()
+        response = self.client.get(reverse('listar-relaciones'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'innova_presupuesto_excedido_total{vista="api/admin/cliente-lote/listar/"} 1',
+            registro_metricas.exportar_prometheus(),
+        )
+
+
+class MetricasTest(TestCase):
+    """`MiddlewareMetricas`, `medir()` y el registro de consultas lentas"""
+
+    VISTA = 'api/admin/cliente-lote/listar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        Cliente.objects.create(nombre='Raúl', apellidos='Díaz')
+
+    def setUp(self):
+        registro_metricas.reiniciar()
+        metricas._ultimo_log_lenta.clear()
+
+    def test_peticion(self):
+        self.client.get(reverse('listar-relaciones'))
+        self.client.get(reverse('listar-relaciones'))
+        texto = registro_metricas.exportar_prometheus()
+        self.assertIn(f'innova_vista_consultas_count{{vista="{self.VISTA}"}} 2', texto)
+        self.assertIn(f'innova_vista_consultas_sum{{vista="{self.VISTA}"}} 2', texto)
+        self.assertIn(f'innova_peticiones_total{{codigo="200",vista="{self.VISTA}"}} 2', texto)
+        self.assertIn('# TYPE innova_vista_duracion_segundos summary', texto)
+
+    def test_endpoint(self):
+        self.client.get(reverse('listar-relaciones'))
+        response = self.client.get(reverse('metricas-rendimiento'))
+        self.assertIn(f'innova_peticiones_total{{codigo="200",vista="{self.VISTA}"}} 1', response.content.decode())
+
+    def test_medir(self):
+        with medir('bloque_prueba') as medicion:
+            Cliente.objects.count()
+            list(Cliente.objects.all())
+        self.assertEqual(medicion.consultas, 2)
+
+        @medir('decorada')
+        def contar():
+            return Cliente.objects.count()
+
+        contar()
+        contar()
+        texto = registro_metricas.exportar_prometheus()
+        self.assertIn('innova_bloque_consultas_sum{bloque="bloque_prueba"} 2', texto)
+        self.assertIn('innova_bloque_consultas_count{bloque="decorada"} 2', texto)
+
+    @override_settings(METRICAS_CONSULTA_LENTA_MS=0)
+    def test_consultas_lentas_una_vez_por_sentencia(self):
+        with self.assertLogs('innova.metricas', 'WARNING') as registros, medir('lentas'):
+            for _ in range(3):
+                Cliente.objects.filter(nombre='Raúl').count()
+        lentas = [linea for linea in registros.output if 'database_cliente' in linea]
+        self.assertEqual(len(lentas), 1)
+        self.assertIn('Consulta lenta', lentas[0])
+        self.assertIn('innova_consultas_lentas_total{vista="lentas"} 3', registro_metricas.exportar_prometheus())
@@ -0,0 +1,108 @@
+"""
+Libro de transacciones (GET /api/admin/transacciones/ y su exportación).
+
+Las transacciones se listan de la más reciente a la más antigua por
+(fecha, id) con paginación por cursor; cada filtro por cliente, lote o crédito
+tiene su índice compuesto (campo, -fecha, -id) en `Transaccion`, así que una
+página cuesta lo mismo con mil o con millones de filas. Con `archivo=true` se
+incluyen los años movidos a `Transaccion_Archivada` (ver database.archivo).
+"""
+import heapq
+import uuid
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from django.db.models import BooleanField, Value
+from django.utils import timezone
+
+from database.codigos import normalizar_codigo
+from database.models import Transaccion, Transaccion_Archivada
+from .paginacion import ParametroInvalido
+
+CAMPOS = (
+    'id', 'fecha', 'tipo', 'monto', 'metodo_pago', 'credito_id', 'cliente_id',
+    'cliente__nombre', 'cliente__apellidos', 'lote__codigo', 'archivada',
+)
+CLAVES_ORDEN = ('fecha', 'id')
+METODOS_PAGO = [valor for valor, _ in Transaccion._meta.get_field('metodo_pago').choices]
+
+
+def _uuid(nombre, valor):
+    try:
+        return uuid.UUID(valor)
+    except ValueError:
+        raise ParametroInvalido(f'"{valor}" no es un {nombre} válido')
+
+
+def _inicio_del_dia(nombre, valor):
+    try:
+        return timezone.make_aware(datetime.fromisoformat(valor).replace(hour=0, minute=0, second=0, microsecond=0))
+    except ValueError:
+        raise ParametroInvalido(f'{nombre} debe tener el formato YYYY-MM-DD')
+
+
+def leer_filtros(params):
+    """Condiciones de `filter()` a partir de los parámetros de la petición"""
+    condiciones = {}
+    if params.get('cliente'):
+        condiciones['cliente_id'] = _uuid('cliente', params['cliente'])
+    if params.get('credito'):
+        condiciones['credito_id'] = _uuid('crédito', params['credito'])
+    if params.get('lote'):
+        condiciones['lote__codigo'] = normalizar_codigo(params['lote'])
+    if params.get('tipo'):
+        tipo = params['tipo'].upper()
+        if tipo not in Transaccion.Tipo.values:
+            raise ParametroInvalido(f'tipo debe ser uno de: {", ".join(Transaccion.Tipo.values)}')
+        condiciones['tipo'] = tipo
+    if params.get('metodo_pago'):
+        if params['metodo_pago'] not in METODOS_PAGO:
+            raise ParametroInvalido(f'metodo_pago debe ser uno de: {", ".join(METODOS_PAGO)}')
+        condiciones['metodo_pago'] = params['metodo_pago']
+    # Rangos sobre la columna (no fecha__date) para que se use el índice
+    if params.get('desde'):
+        condiciones['fecha__gte'] = _inicio_del_dia('desde', params['desde'])
+    if params.get('hasta'):
+        condiciones['fecha__lt'] = _inicio_del_dia('hasta', params['hasta']) + timedelta(days=1)
+    return condiciones
+
+
+def consultas_libro(params):
+    """Querysets `values()` del libro activo y, si se pide, del archivo"""
+    condiciones = leer_filtros(params)
+    modelos = [(Transaccion, False)]
+    if str(params.get('archivo', '')).lower() == 'true':
+        modelos.append((Transaccion_Archivada, True))
+    return [
+        modelo.objects.filter(**condiciones)
+        .annotate(archivada=Value(archivada, output_field=BooleanField()))
+        .values(*CAMPOS)
+        for modelo, archivada in modelos
+    ]
+
+
+def serializar(fila):
+    return {
+        "id": fila['id'],
+        "fecha": fila['fecha'].isoformat(),
+        "tipo": fila['tipo'],
+        "monto": float(fila['monto']) if fila['monto'] is not None else None,
+        "metodo_pago": fila['metodo_pago'],
+        "credito_id": str(fila['credito_id']) if fila['credito_id'] else None,
+        "cliente_id": str(fila['cliente_id']),
+        "cliente": f"{fila['cliente__nombre']} {fila['cliente__apellidos']}".strip(),
+        "lote": fila['lote__codigo'],
+        "archivada": fila['archivada'],
+    }
+
+
+ENCABEZADOS_EXPORTACION = ['id', 'fecha', 'tipo', 'monto', 'metodo_pago', 'credito_id', 'cliente_id', 'cliente', 'lote', 'archivada']
+
+
+def filas_exportacion(consultas, tamano_lote=2000):
+    """Todas las filas en el orden del libro, leídas por tramos y mezcladas sin cargarlas en memoria"""
+    orden = [f'-{clave}' for clave in CLAVES_ORDEN]
+    iteradores = [consulta.order_by(*orden).iterator(chunk_size=tamano_lote) for consulta in consultas]
+    for fila in heapq.merge(*iteradores, key=itemgetter(*CLAVES_ORDEN), reverse=True):
+        datos = serializar(fila)
+        yield [datos[campo] for campo in ENCABEZADOS_EXPORTACION]
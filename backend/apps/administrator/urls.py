@@ -7,10 +7,15 @@ urlpatterns = [
     # URLs para Lotes
     path('lotes/', views.Admin_view_lote_codigo, name='admin-view-lote-codigo'),
     path('lotes/update/', views.AdminUpdateLote, name='admin-update-lote'),
+    path('lotes/bulk/', views.AdminUpdateLotesMasivo, name='admin-update-lotes-masivo'),
     path('lotes/listar/', views.ListarLotes, name='listar-lotes'),
+    path('lotes/exportar/', views.ExportarLotes, name='exportar-lotes'),
     
     # URLs para Clientes
     path('clientes/listar/', views.ListarClientes, name='listar-clientes'),
+    path('clientes/exportar/', views.ExportarClientes, name='exportar-clientes'),
+    path('clientes/sugerir/', views.SugerirClientes, name='sugerir-clientes'),
+    path('clientes/duplicados/', views.DuplicadosClientes, name='duplicados-clientes'),
     path('clientes/crear/', views.CrearCliente, name='crear-cliente'),
     path('clientes/obtener/<uuid:cliente_id>/', views.ObtenerCliente, name='obtener-cliente'),
     path('clientes/actualizar/<uuid:cliente_id>/', views.ActualizarCliente, name='actualizar-cliente'),
@@ -19,9 +24,24 @@ urlpatterns = [
     
     # URLs para Relaciones Cliente-Lote
     path('cliente-lote/listar/', views.ListarRelacionesClienteLote, name='listar-relaciones'),
+    path('cliente-lote/exportar/', views.ExportarRelacionesClienteLote, name='exportar-relaciones'),
     path('cliente-lote/asignar/', views.AsignarLoteACliente, name='asignar-lote-cliente'),
     path('cliente-lote/actualizar/<uuid:relacion_id>/', views.ActualizarRelacionClienteLote, name='actualizar-relacion'),
     path('cliente-lote/eliminar/<uuid:relacion_id>/', views.EliminarRelacionClienteLote, name='eliminar-relacion'),
+
+    # URLs para Créditos
+    path('creditos/por-cobrar/', views.CreditosPorCobrar, name='creditos-por-cobrar'),
+    path('creditos/<uuid:credito_id>/cronograma/', views.CronogramaCredito, name='cronograma-credito'),
+
+    # URLs de Transacciones
+    path('transacciones/', views.ListarTransacciones, name='listar-transacciones'),
+    path('transacciones/exportar/', views.ExportarTransacciones, name='exportar-transacciones'),
+
+    # URLs del Dashboard
+    path('dashboard/resumen/', views.ResumenDashboard, name='resumen-dashboard'),
+
+    # Métricas de rendimiento (formato Prometheus)
+    path('metrics/', views.MetricasRendimiento, name='metricas-rendimiento'),
 ]
 
 
@@ -1,4 +1,6 @@
-from database.models import Lote, Cliente, relacion_cliente_lote
+from datetime import date
+
+from database.models import Lote, Cliente, Credito, relacion_cliente_lote
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
@@ -7,8 +9,27 @@ from .serializers import ClienteSerializer, RelacionClienteLoteSerializer
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from django.db.models import Sum
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from apps.maps.snapshot import etag_lotes, last_modified_lotes
+from database.busqueda import filtrar_busqueda
+from database.codigos import normalizar_codigo, obtener_lote
+from database.resumenes import obtener_resumen
+from database.amortizacion import CAMPOS_CARTERA, cartera, condiciones_de, estado as estado_credito
+from database.duplicados import ultimo_resultado as ultimo_resultado_duplicados
+from .consultas import clientes_con_lotes, relaciones_con_datos
+from .lotes_masivo import ActualizacionInvalida, aplicar_expresion, aplicar_parches
+from .sugerencias import indice as indice_sugerencias
+from .paginacion import ParametroInvalido, leer_campos, leer_limite, leer_modo_conteo, paginar_keyset_compuesto, contar
+from .transacciones import CLAVES_ORDEN, ENCABEZADOS_EXPORTACION, consultas_libro, filas_exportacion, serializar as serializar_transaccion
+from .exportar import leer_formato, respuesta_exportacion
+from innova_inversiones.metricas import registro as registro_metricas
+from innova_inversiones.presupuesto import presupuesto_consultas
 
 
+@presupuesto_consultas(2)
 @api_view(['GET'])
 def Admin_view_lote_codigo(request):
     """
@@ -20,13 +41,13 @@ def Admin_view_lote_codigo(request):
         return Response({"error": "Debe enviar un código"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        lote = Lote.objects.get(codigo__iexact=codigo)
+        lote = obtener_lote(codigo)
     except Lote.DoesNotExist:
         return Response({"error": "Lote no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
     data = {
-        "codigo": lote.codigo.lower(),
-        "estado": int(lote.estado.id),
+        "codigo": lote.codigo,
+        "estado": int(lote.estado_id),
         "area_lote": float(lote.area_lote),
         "perimetro": float(lote.perimetro),
         "precio": float(lote.precio) if lote.precio is not None else None,
@@ -38,6 +59,7 @@ def Admin_view_lote_codigo(request):
 
 
     
+@presupuesto_consultas(7)
 @api_view(['PUT'])
 @permission_classes([AllowAny])
 def AdminUpdateLote(request):
@@ -47,7 +69,8 @@ def AdminUpdateLote(request):
         return Response({"error": "Debe enviar un código"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        lote = Lote.objects.get(codigo__iexact=codigo)
+        # El evento SSE de apps.maps.signals lee lote.estado.nombre
+        lote = obtener_lote(codigo, Lote.objects.select_related('estado'))
     except Lote.DoesNotExist:
         return Response({"error": "Lote no encontrado"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -101,38 +124,77 @@ def AdminUpdateLote(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['PUT'])
+@permission_classes([AllowAny])
+def AdminUpdateLotesMasivo(request):
+    """
+    Vista para actualizar muchos lotes en una sola transacción
+    Cuerpo (uno de los dos modos):
+    - {"lotes": [{"codigo": "A-01", "fields": {"precio": 1000, "estado": 2}}, ...]}
+    - {"filtro": {"manzana": "B"}, "operaciones": {"precio_metro_cuadrado": {"op": "porcentaje", "valor": 5}}}
+      op: asignar, sumar, multiplicar o porcentaje; filtros: manzana, estado, codigos
+    Si un código no existe o un valor es inválido no se modifica ningún lote
+    """
+    usuario = getattr(request.user, 'usuario', None)
+
+    try:
+        if "lotes" in request.data:
+            actualizados, historial = aplicar_parches(request.data.get("lotes"), usuario)
+        else:
+            actualizados, historial = aplicar_expresion(
+                request.data.get("filtro"), request.data.get("operaciones"), usuario
+            )
+
+        return Response({
+            "message": "Lotes actualizados correctamente",
+            "actualizados": actualizados,
+            "historial_registrado": historial
+        }, status=status.HTTP_200_OK)
+
+    except ActualizacionInvalida as e:
+        return Response({
+            "error": "Error de formato en los datos",
+            "detalle": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            "error": "Error al actualizar los lotes",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # =====================================================
 # VISTAS PARA GESTIÓN DE CLIENTES
 # =====================================================
 
+@presupuesto_consultas(3)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def ListarClientes(request):
     """
     Vista para listar todos los clientes o buscar por filtros
     Parámetros opcionales:
-    - search: Buscar por nombre, apellidos, dni, email, lote, manzana, lote_numero o tipo de relacion
+    - search: Buscar por nombre, apellidos, dni, email, teléfono, lote, manzana, lote_numero o tipo de relacion
+      (sin distinguir tildes ni mayúsculas; cada palabra debe aparecer)
     - estado: Filtrar por estado (true/false)
+    - fields: Campos a devolver separados por coma (ej. id,nombre,apellidos); sin `lotes` no se consultan las relaciones
+    - limit / cursor: Paginación por cursor en el mismo orden que el listado completo
+      (apellidos, nombre; con búsqueda, los mejores resultados primero); la respuesta incluye `next_cursor`
+    - count: exact (por defecto), estimate o none
+    Sin limit / cursor se devuelven todos en el mismo orden (apellidos, nombre, id);
+    antes de la paginación por cursor el listado completo se ordenaba por id
     """
     try:
-        clientes = Cliente.objects.prefetch_related('compras__lote', 'compras__lote__estado')
+        campos = leer_campos(request)
+        modo_conteo = leer_modo_conteo(request)
+        clientes = Cliente.objects.all()
+        if campos is None or 'lotes' in campos:
+            clientes = clientes_con_lotes(clientes)
         
-        # Filtro de búsqueda
+        # Búsqueda sobre el documento plegado (sin tildes), ver database/busqueda.py
         search = request.query_params.get('search', None)
         if search:
-            from django.db.models import Q
-            clientes = clientes.filter(
-                Q(nombre__icontains=search) |
-                Q(apellidos__icontains=search) |
-                Q(dni__icontains=search) |
-                Q(email__icontains=search) |
-                #lote
-                Q(compras__lote__codigo__icontains=search) |
-                Q(compras__lote__manzana__icontains=search) |
-                Q(compras__lote__lote_numero__icontains=search) |
-                #tipo de relacion cliente_lote
-                Q(compras__tipo_relacion__icontains=search)
-            ).distinct()
+            clientes = filtrar_busqueda(clientes, search)
         
         # Filtro por estado
         estado_param = request.query_params.get('estado', None)
@@ -140,16 +202,36 @@ def ListarClientes(request):
             estado_bool = estado_param.lower() == 'true'
             clientes = clientes.filter(estado=estado_bool)
         
-        # Ordenar por fecha de creación (más reciente primero)
-        clientes = clientes.order_by('id')
-        
+        # Con búsqueda, los mejores resultados primero; luego alfabético (id desempata)
+        claves = ('rango', 'apellidos', 'nombre', 'id') if search else ('apellidos', 'nombre', 'id')
+
+        # Paginación por cursor (opcional): costo constante por página
+        if 'limit' in request.query_params or 'cursor' in request.query_params:
+            pagina, siguiente = paginar_keyset_compuesto(
+                [clientes], request.query_params.get('cursor'), leer_limite(request),
+                claves=claves, descendente=False,
+            )
+            serializer = ClienteSerializer(pagina, many=True, fields=campos)
+            return Response({
+                "count": contar(clientes, modo_conteo),
+                "next_cursor": siguiente,
+                "clientes": serializer.data
+            }, status=status.HTTP_200_OK)
 
-        serializer = ClienteSerializer(clientes, many=True)
+        clientes = clientes.order_by(*claves)
+        
+        serializer = ClienteSerializer(clientes, many=True, fields=campos)
+        data = serializer.data
         return Response({
-            "count": clientes.count(),
-            "clientes": serializer.data
+            # La lista completa ya está en memoria: no hace falta otro COUNT
+            "count": len(data) if modo_conteo != 'none' else None,
+            "clientes": data
         }, status=status.HTTP_200_OK)
         
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             "error": "Error al obtener la lista de clientes",
@@ -157,6 +239,105 @@ def ListarClientes(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(1)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def DuplicadosClientes(request):
+    """
+    Vista de candidatos a fusión de clientes duplicados
+    Sirve el último análisis guardado por el comando `detectar_duplicados_clientes`
+    (pensado para ejecutarse cada noche); la detección nunca se ejecuta en la petición.
+    Parámetros:
+    - umbral: Puntaje mínimo entre 0 y 1; no puede ser menor que el del análisis guardado
+    - limit: Máximo de pares a devolver (por defecto 100)
+    """
+    try:
+        limite = int(request.query_params.get('limit', 100))
+        umbral = request.query_params.get('umbral')
+        umbral = float(umbral) if umbral is not None else None
+    except ValueError:
+        return Response({
+            "error": "Los parámetros limit y umbral deben ser numéricos"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if umbral is not None and not 0 <= umbral <= 1:
+        return Response({
+            "error": "El umbral debe estar entre 0 y 1"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if limite < 1:
+        return Response({
+            "error": "El límite debe ser mayor que 0"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        resultado = ultimo_resultado_duplicados()
+        if resultado is None:
+            return Response({
+                "error": "Aún no hay un análisis de duplicados; ejecute detectar_duplicados_clientes"
+            }, status=status.HTTP_404_NOT_FOUND)
+        if umbral is not None and umbral < resultado['umbral']:
+            return Response({
+                "error": f"El análisis guardado usó umbral {resultado['umbral']}; "
+                         "para uno menor ejecute detectar_duplicados_clientes --umbral"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        candidatos = resultado['candidatos']
+        if umbral is not None:
+            candidatos = [c for c in candidatos if c['puntaje'] >= umbral]
+        return Response({
+            "generado_en": resultado['generado_en'],
+            "umbral": resultado['umbral'],
+            "estadisticas": resultado['estadisticas'],
+            "count": len(candidatos),
+            "candidatos": candidatos[:limite]
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            "error": "Error al obtener los clientes duplicados",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@presupuesto_consultas(2)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def SugerirClientes(request):
+    """
+    Vista de autocompletado (type-ahead) de clientes activos
+    Parámetros:
+    - q: Texto a buscar por prefijo en nombre, apellidos, DNI o teléfono (sin distinguir tildes);
+      cada palabra debe ser el inicio de alguna palabra del cliente (no subcadenas)
+    - limit: Máximo de resultados (por defecto 10, máximo 50)
+    Cada cliente incluye id, nombre, apellidos, dni, telefono y email.
+    Se resuelve desde el índice en memoria del proceso, sin consultar la base de datos
+    """
+    consulta = request.query_params.get('q', '')
+    try:
+        limite = min(int(request.query_params.get('limit', 10)), 50)
+    except ValueError:
+        return Response({
+            "error": "El parámetro limit debe ser un número entero"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if limite < 1:
+        return Response({
+            "error": "El límite debe ser mayor que 0"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        resultados = indice_sugerencias.buscar(consulta, limite)
+        return Response({
+            "count": len(resultados),
+            "clientes": resultados
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            "error": "Error al obtener sugerencias de clientes",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@presupuesto_consultas(2)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def ObtenerCliente(request, cliente_id):
@@ -164,7 +345,7 @@ def ObtenerCliente(request, cliente_id):
     Vista para obtener un cliente específico por su ID
     """
     try:
-        cliente = Cliente.objects.prefetch_related('compras__lote', 'compras__lote__estado').get(id=cliente_id)
+        cliente = clientes_con_lotes().get(id=cliente_id)
         serializer = ClienteSerializer(cliente)
         return Response(serializer.data, status=status.HTTP_200_OK)
         
@@ -235,7 +416,7 @@ def ActualizarCliente(request, cliente_id):
     PATCH: Actualización parcial
     """
     try:
-        cliente = Cliente.objects.get(id=cliente_id)
+        cliente = clientes_con_lotes().get(id=cliente_id)
         
         # partial=True permite actualización parcial con PATCH
         partial = request.method == 'PATCH'
@@ -290,11 +471,13 @@ def EliminarCliente(request, cliente_id):
     Si se envía ?hard=true, hace eliminación física
     """
     try:
-        cliente = Cliente.objects.get(id=cliente_id)
-        
         # Verificar si se requiere eliminación física
         hard_delete = request.query_params.get('hard', 'false').lower() == 'true'
         
+        # Solo el soft delete serializa el cliente (y necesita sus lotes)
+        clientes = Cliente.objects.all() if hard_delete else clientes_con_lotes()
+        cliente = clientes.get(id=cliente_id)
+        
         if hard_delete:
             # Eliminación física (permanente)
             nombre_completo = f"{cliente.nombre} {cliente.apellidos}"
@@ -330,7 +513,7 @@ def ActivarCliente(request, cliente_id):
     Vista para reactivar un cliente desactivado
     """
     try:
-        cliente = Cliente.objects.get(id=cliente_id)
+        cliente = clientes_con_lotes().get(id=cliente_id)
         
         if cliente.estado:
             return Response({
@@ -361,6 +544,9 @@ def ActivarCliente(request, cliente_id):
 # VISTAS PARA GESTIÓN DE RELACIONES CLIENTE-LOTE
 # =====================================================
 
+@cache_control(no_cache=True)
+@condition(etag_func=etag_lotes, last_modified_func=last_modified_lotes)
+@presupuesto_consultas(2)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def ListarLotes(request):
@@ -368,6 +554,7 @@ def ListarLotes(request):
     Vista para listar todos los lotes disponibles
     Parámetros opcionales:
     - search: Buscar por código, manzana o lote_numero
+    Soporta GET condicional (ETag / Last-Modified) con la versión del snapshot de lotes
     """
     try:
         lotes = Lote.objects.select_related('estado').all()
@@ -414,6 +601,7 @@ def ListarLotes(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(10)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def AsignarLoteACliente(request):
@@ -509,6 +697,7 @@ def AsignarLoteACliente(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(7)
 @api_view(['PUT', 'PATCH'])
 @permission_classes([AllowAny])
 def ActualizarRelacionClienteLote(request, relacion_id):
@@ -518,7 +707,7 @@ def ActualizarRelacionClienteLote(request, relacion_id):
     PATCH: Actualización parcial
     """
     try:
-        relacion = relacion_cliente_lote.objects.get(id=relacion_id)
+        relacion = relaciones_con_datos().get(id=relacion_id)
         
         # partial=True permite actualización parcial con PATCH
         partial = request.method == 'PATCH'
@@ -548,6 +737,7 @@ def ActualizarRelacionClienteLote(request, relacion_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(7)
 @api_view(['DELETE'])
 @permission_classes([AllowAny])
 def EliminarRelacionClienteLote(request, relacion_id):
@@ -555,7 +745,7 @@ def EliminarRelacionClienteLote(request, relacion_id):
     Vista para eliminar una relación cliente-lote
     """
     try:
-        relacion = relacion_cliente_lote.objects.get(id=relacion_id)
+        relacion = relaciones_con_datos().get(id=relacion_id)
         cliente_nombre = f"{relacion.cliente.nombre} {relacion.cliente.apellidos}"
         lote_codigo = relacion.lote.codigo
         
@@ -577,6 +767,7 @@ def EliminarRelacionClienteLote(request, relacion_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@presupuesto_consultas(1)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def ListarRelacionesClienteLote(request):
@@ -592,9 +783,7 @@ def ListarRelacionesClienteLote(request):
     - estado_lote: Buscar por estado del lote (ID o nombre)
     """
     try:
-        relaciones = relacion_cliente_lote.objects.select_related(
-            'cliente', 'lote', 'lote__estado'
-        ).all()
+        relaciones = relaciones_con_datos()
         
         # Filtro por cliente
         cliente_id = request.query_params.get('cliente_id', None)
@@ -614,16 +803,12 @@ def ListarRelacionesClienteLote(request):
         # Búsqueda por código de lote
         codigo_lote = request.query_params.get('codigo_lote', None)
         if codigo_lote:
-            relaciones = relaciones.filter(lote__codigo__iexact=codigo_lote)
+            relaciones = relaciones.filter(lote__codigo=normalizar_codigo(codigo_lote))
         
         # Búsqueda por nombre de cliente (nombre o apellidos)
         nombre_cliente = request.query_params.get('nombre_cliente', None)
         if nombre_cliente:
-            from django.db.models import Q
-            relaciones = relaciones.filter(
-                Q(cliente__nombre__icontains=nombre_cliente) |
-                Q(cliente__apellidos__icontains=nombre_cliente)
-            )
+            relaciones = filtrar_busqueda(relaciones, nombre_cliente, campo='cliente__busqueda')
         
         # Búsqueda por DNI del cliente (dato único)
         dni = request.query_params.get('dni', None)
@@ -644,11 +829,12 @@ def ListarRelacionesClienteLote(request):
         # Ordenar por fecha (más reciente primero)
         relaciones = relaciones.order_by('-fecha')
         
-        serializer = RelacionClienteLoteSerializer(relaciones, many=True)
+        datos = RelacionClienteLoteSerializer(relaciones, many=True).data
         
+        # len() de la lista ya leída en lugar de un COUNT aparte
         return Response({
-            "count": relaciones.count(),
-            "relaciones": serializer.data
+            "count": len(datos),
+            "relaciones": datos
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -656,4 +842,326 @@ def ListarRelacionesClienteLote(request):
             "error": "Error al obtener las relaciones",
             "detalle": str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
\ No newline at end of file
+    
+
+# =====================================================
+# VISTAS DE CRÉDITOS
+# =====================================================
+
+def _leer_fecha(request):
+    """Fecha de corte (?fecha=YYYY-MM-DD), por defecto hoy"""
+    valor = request.query_params.get('fecha')
+    return date.fromisoformat(valor) if valor else timezone.localdate()
+
+
+@presupuesto_consultas(2)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def CronogramaCredito(request, credito_id):
+    """
+    Vista del cronograma de pagos de un crédito con su situación a una fecha
+    Parámetros opcionales:
+    - fecha: Fecha de corte YYYY-MM-DD (por defecto hoy)
+    """
+    try:
+        fecha = _leer_fecha(request)
+    except ValueError:
+        return Response({"error": "El parámetro fecha debe tener el formato YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        credito = Credito.objects.get(id=credito_id)
+        cuotas = list(credito.cronograma.values('numero', 'fecha_vencimiento', 'cuota', 'capital', 'interes', 'saldo'))
+        for cuota in cuotas:
+            cuota['pagada'] = cuota['numero'] <= credito.num_cuotas_pagadas
+            cuota['vencida'] = not cuota['pagada'] and cuota['fecha_vencimiento'] <= fecha
+        return Response({
+            "credito": str(credito.id),
+            "sistema": credito.sistema_amortizacion,
+            "monto_total": credito.monto_total,
+            "situacion": estado_credito(condiciones_de(credito), credito.num_cuotas_pagadas, fecha),
+            "cuotas": cuotas
+        }, status=status.HTTP_200_OK)
+
+    except Credito.DoesNotExist:
+        return Response({"error": "Crédito no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({
+            "error": "Error al obtener el cronograma",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@presupuesto_consultas(2)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def CreditosPorCobrar(request):
+    """
+    Vista de la cartera de créditos no cancelados con cuotas vencidas, atraso y saldo por cobrar
+    Parámetros opcionales:
+    - fecha: Fecha de corte YYYY-MM-DD (por defecto hoy)
+    - atrasados: true para devolver solo créditos con cuotas atrasadas
+    Se calcula en una pasada sobre una sola consulta, sin recorrer cuotas ni transacciones
+    """
+    try:
+        fecha = _leer_fecha(request)
+    except ValueError:
+        return Response({"error": "El parámetro fecha debe tener el formato YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        filas = (
+            Credito.objects.exclude(estado_credito=Credito.EstadoCredito.CANCELADO)
+            .order_by('fecha_inicio')
+            .values(*CAMPOS_CARTERA)
+            .iterator(chunk_size=2000)
+        )
+        creditos, totales = cartera(filas, fecha)
+        if request.query_params.get('atrasados', '').lower() == 'true':
+            creditos = [c for c in creditos if c['cuotas_atrasadas']]
+        return Response({
+            "fecha": fecha,
+            "totales": totales,
+            "count": len(creditos),
+            "creditos": creditos
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            "error": "Error al calcular los créditos por cobrar",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# =====================================================
+# VISTAS DEL LIBRO DE TRANSACCIONES
+# =====================================================
+
+@presupuesto_consultas(2)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ListarTransacciones(request):
+    """
+    Vista del libro de transacciones, de la más reciente a la más antigua
+    Parámetros opcionales:
+    - cliente / credito: UUID; lote: código
+    - tipo: RESERVA, VENTA, CUOTA o AMORTIZACION; metodo_pago: efectivo, transferencia, ...
+    - desde / hasta: Rango de fechas YYYY-MM-DD (ambos inclusive)
+    - archivo: true para incluir los años archivados
+    - limit / cursor: Paginación por cursor sobre (fecha, id); la respuesta incluye `next_cursor`
+    """
+    try:
+        filas, siguiente = paginar_keyset_compuesto(
+            consultas_libro(request.query_params),
+            request.query_params.get('cursor'),
+            leer_limite(request),
+            claves=CLAVES_ORDEN,
+        )
+        return Response({
+            "next_cursor": siguiente,
+            "transacciones": [serializar_transaccion(fila) for fila in filas]
+        }, status=status.HTTP_200_OK)
+
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            "error": "Error al listar las transacciones",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ExportarTransacciones(request):
+    """
+    Vista para descargar el libro con los mismos filtros que ListarTransacciones
+    - formato: csv (por defecto) o xlsx
+    Las filas se envían a medida que se leen (StreamingHttpResponse), sin cargar el libro en memoria
+    """
+    try:
+        formato = leer_formato(request)
+        consultas = consultas_libro(request.query_params)
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return respuesta_exportacion(
+        request, 'transacciones', ENCABEZADOS_EXPORTACION, filas_exportacion(consultas), formato
+    )
+
+
+# =====================================================
+# VISTAS DE EXPORTACIÓN
+# =====================================================
+# (encabezado, campo de values_list) de cada exportación
+COLUMNAS_CLIENTES = (
+    ('id', 'id'), ('nombre', 'nombre'), ('apellidos', 'apellidos'), ('dni', 'dni'),
+    ('email', 'email'), ('telefono', 'telefono'), ('direccion', 'direccion'),
+    ('fecha_nacimiento', 'fecha_nacimiento'), ('activo', 'estado'),
+    ('estado_financiero', 'estado_financiero_actual'), ('meses_deuda', 'meses_deuda'),
+    ('monto_cuota', 'monto_cuota'), ('fecha_conciliacion', 'fecha_conciliacion'), ('creado_en', 'creado_en'),
+)
+COLUMNAS_LOTES = (
+    ('id', 'id'), ('codigo', 'codigo'), ('manzana', 'manzana'), ('lote_numero', 'lote_numero'),
+    ('estado', 'estado__nombre'), ('area_lote', 'area_lote'), ('perimetro', 'perimetro'),
+    ('precio', 'precio'), ('precio_metro_cuadrado', 'precio_metro_cuadrado'), ('descripcion', 'descripcion'),
+)
+COLUMNAS_RELACIONES = (
+    ('id', 'id'), ('fecha', 'fecha'), ('tipo_relacion', 'tipo_relacion'),
+    ('porcentaje_participacion', 'porcentaje_participacion'), ('cliente_id', 'cliente_id'),
+    ('cliente_nombre', 'cliente__nombre'), ('cliente_apellidos', 'cliente__apellidos'),
+    ('cliente_dni', 'cliente__dni'), ('lote', 'lote__codigo'), ('estado_lote', 'lote__estado__nombre'),
+)
+FILAS_POR_CONSULTA = 2000
+
+
+def _exportar(request, nombre_base, queryset, columnas):
+    """Respuesta streaming de `queryset` leído por tramos con values_list"""
+    filas = queryset.values_list(*[campo for _, campo in columnas]).iterator(chunk_size=FILAS_POR_CONSULTA)
+    return respuesta_exportacion(
+        request, nombre_base, [encabezado for encabezado, _ in columnas], filas, leer_formato(request)
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ExportarClientes(request):
+    """
+    Vista para descargar todos los clientes en CSV o XLSX
+    Parámetros opcionales:
+    - formato: csv (por defecto) o xlsx
+    - search / estado: Mismos filtros que ListarClientes
+    """
+    try:
+        clientes = Cliente.objects.all()
+        search = request.query_params.get('search', None)
+        if search:
+            clientes = filtrar_busqueda(clientes, search)
+        estado_param = request.query_params.get('estado', None)
+        if estado_param is not None:
+            clientes = clientes.filter(estado=estado_param.lower() == 'true')
+        return _exportar(request, 'clientes', clientes.order_by('apellidos', 'nombre', 'id'), COLUMNAS_CLIENTES)
+
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            "error": "Error al exportar los clientes",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ExportarLotes(request):
+    """
+    Vista para descargar todos los lotes en CSV o XLSX
+    Parámetros opcionales:
+    - formato: csv (por defecto) o xlsx
+    - estado: ID del estado del lote
+    - manzana: Filtrar por manzana
+    """
+    try:
+        lotes = Lote.objects.all()
+        estado_param = request.query_params.get('estado', None)
+        if estado_param:
+            try:
+                lotes = lotes.filter(estado_id=int(estado_param))
+            except ValueError:
+                raise ParametroInvalido(f'"{estado_param}" no es un estado válido')
+        manzana = request.query_params.get('manzana', None)
+        if manzana:
+            lotes = lotes.filter(manzana__iexact=manzana)
+        return _exportar(request, 'lotes', lotes.order_by('codigo'), COLUMNAS_LOTES)
+
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            "error": "Error al exportar los lotes",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ExportarRelacionesClienteLote(request):
+    """
+    Vista para descargar las relaciones cliente-lote en CSV o XLSX
+    Parámetros opcionales:
+    - formato: csv (por defecto) o xlsx
+    - cliente_id / lote_id / tipo_relacion / codigo_lote: Mismos filtros que ListarRelacionesClienteLote
+    """
+    try:
+        relaciones = relacion_cliente_lote.objects.all()
+        for parametro, campo in (('cliente_id', 'cliente_id'), ('lote_id', 'lote_id'), ('tipo_relacion', 'tipo_relacion')):
+            valor = request.query_params.get(parametro, None)
+            if valor:
+                relaciones = relaciones.filter(**{campo: valor})
+        codigo_lote = request.query_params.get('codigo_lote', None)
+        if codigo_lote:
+            relaciones = relaciones.filter(lote__codigo=normalizar_codigo(codigo_lote))
+        return _exportar(request, 'relaciones_cliente_lote', relaciones.order_by('-fecha', 'id'), COLUMNAS_RELACIONES)
+
+    except ParametroInvalido as e:
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except ValidationError as e:
+        # cliente_id / lote_id con formato inválido
+        return Response({
+            "error": "Parámetros inválidos",
+            "detalle": e.messages
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            "error": "Error al exportar las relaciones",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# =====================================================
+# VISTAS DEL DASHBOARD
+# =====================================================
+
+@presupuesto_consultas(3)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def ResumenDashboard(request):
+    """
+    Vista con los indicadores del dashboard: lotes por estado, valor de inventario,
+    área vendida, cartera de créditos (cobrado vs pendiente) y deudores por meses de deuda.
+    Lee las tablas de resumen mantenidas por `database.resumenes`, sin recorrer el historial
+    """
+    try:
+        return Response(obtener_resumen(), status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({
+            "error": "Error al obtener el resumen del dashboard",
+            "detalle": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# =====================================================
+# VISTAS DE MÉTRICAS
+# =====================================================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def MetricasRendimiento(request):
+    """
+    Vista con las métricas por vista de este proceso en formato de texto de Prometheus:
+    duración, consultas, tiempo de base de datos y bytes (p50/p95/p99 de la ventana
+    reciente), peticiones por código, aciertos de caché y consultas lentas
+    """
+    return HttpResponse(
+        registro_metricas.exportar_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
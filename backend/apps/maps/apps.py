@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MapsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.maps'
+
+    def ready(self):
+        # Registrar las señales que invalidan el snapshot del plano
+        from . import signals  # noqa: F401
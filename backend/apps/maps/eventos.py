@@ -0,0 +1,160 @@
+"""
+Hub de difusión de cambios de lotes para los visores del mapa (Server-Sent Events).
+
+Las señales de `Lote` e `Historial_Estado` publican eventos en el backend
+configurado en `MAPS_EVENTOS_BACKEND`; cada conexión SSE abierta en el proceso
+recibe una cola asyncio propia donde el hub deposita los eventos.
+
+Backends disponibles:
+- BackendLocal: difunde solo dentro del proceso (un único worker ASGI).
+- BackendCache: escribe los eventos en la caché de Django y cada proceso los
+  lee con un hilo de sondeo; con una caché compartida (CACHE_URL=redis://...)
+  los eventos llegan a todos los workers.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TAMANO_COLA = 256
+
+
+def _entregar(cola, evento):
+    """Encola el evento; si el visor va atrasado se descarta el evento más antiguo"""
+    if cola.full():
+        try:
+            cola.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    cola.put_nowait(evento)
+
+
+class BackendLocal:
+    """Difunde los eventos a los suscriptores del proceso actual"""
+
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+
+    def suscribir(self):
+        """Registra un suscriptor en el event loop actual y devuelve su cola"""
+        suscripcion = (asyncio.get_running_loop(), asyncio.Queue(maxsize=TAMANO_COLA))
+        with self._lock:
+            self._suscriptores.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscriptores.discard(suscripcion)
+
+    def publicar(self, evento):
+        self._difundir(evento)
+
+    def _difundir(self, evento):
+        # Puede llamarse desde cualquier hilo (vistas síncronas, hilo de sondeo)
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(_entregar, cola, evento)
+            except RuntimeError:
+                # El loop ya se cerró: la conexión terminó sin cancelar
+                self.cancelar((loop, cola))
+
+
+class BackendCache(BackendLocal):
+    """
+    Comparte los eventos entre procesos a través de la caché de Django.
+    Cada evento se guarda con un número de secuencia; un hilo por proceso sondea
+    la secuencia y difunde localmente los eventos nuevos.
+    """
+
+    SECUENCIA_KEY = 'maps:eventos:seq'
+    EVENTO_KEY = 'maps:eventos:{seq}'
+    TTL_EVENTO = 60  # segundos
+    INTERVALO_SONDEO = 0.5  # segundos
+    ESPERA_MAXIMA = 5  # segundos que se espera un evento cuyo número ya se publicó
+
+    def __init__(self):
+        super().__init__()
+        self._hilo = None
+        self._esperando = None  # (seq, desde) del evento que falta
+
+    def suscribir(self):
+        self._iniciar_sondeo()
+        return super().suscribir()
+
+    def publicar(self, evento):
+        # Se reserva el número antes de guardar el evento: quien sondee entre ambos
+        # pasos ve la secuencia sin su evento y lo espera (ver `_leer_nuevos`)
+        cache.add(self.SECUENCIA_KEY, 0, timeout=None)
+        seq = cache.incr(self.SECUENCIA_KEY)
+        cache.set(self.EVENTO_KEY.format(seq=seq), evento, timeout=self.TTL_EVENTO)
+
+    def _iniciar_sondeo(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._sondear, name='maps-eventos', daemon=True)
+        self._hilo.start()
+
+    def _sondear(self):
+        ultimo = cache.get(self.SECUENCIA_KEY) or 0
+        while True:
+            time.sleep(self.INTERVALO_SONDEO)
+            try:
+                ultimo = self._leer_nuevos(ultimo)
+            except Exception:
+                logger.exception('Error al sondear eventos de lotes en la caché')
+
+    def _leer_nuevos(self, ultimo):
+        """Difunde en orden los eventos posteriores a `ultimo` y devuelve el último entregado"""
+        actual = cache.get(self.SECUENCIA_KEY) or 0
+        if actual < ultimo:
+            # La caché se reinició: retomar desde la secuencia actual
+            self._esperando = None
+            return actual
+        claves = [self.EVENTO_KEY.format(seq=seq) for seq in range(ultimo + 1, actual + 1)]
+        eventos = cache.get_many(claves) if claves else {}
+        for seq, clave in enumerate(claves, start=ultimo + 1):
+            if clave not in eventos:
+                if self._esperando is None or self._esperando[0] != seq:
+                    self._esperando = (seq, time.monotonic())
+                if time.monotonic() - self._esperando[1] < self.ESPERA_MAXIMA:
+                    # Número publicado pero evento aún no guardado: se reintenta
+                    break
+                # El publicador falló entre incr y set, o el evento ya expiró
+                logger.warning('Evento de lotes %s perdido; se continúa con el siguiente', seq)
+            else:
+                self._difundir(eventos[clave])
+            ultimo = seq
+        return ultimo
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def obtener_hub():
+    """Devuelve la instancia del backend configurado (una por proceso)"""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                backend = getattr(settings, 'MAPS_EVENTOS_BACKEND', 'apps.maps.eventos.BackendLocal')
+                _hub = import_string(backend)()
+    return _hub
+
+
+def publicar_evento(evento):
+    try:
+        obtener_hub().publicar(evento)
+    except Exception:
+        # Un fallo del canal en vivo nunca debe romper la escritura del lote
+        logger.exception('No se pudo publicar el evento de lote')
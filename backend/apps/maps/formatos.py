@@ -0,0 +1,121 @@
+"""
+Formatos de transporte del plano de lotes.
+
+- json: lista de objetos (formato histórico de `lotes_estado`).
+- columnar: un objeto con una columna por campo. Los textos repetidos
+  (manzana, nombre de estado) van como diccionario + índices y las columnas
+  numéricas como Float64Array little-endian codificado en base64 (NaN = null).
+
+Cualquiera de los dos puede enviarse comprimido con gzip o, si el paquete
+`brotli` está instalado, con br.
+"""
+import base64
+import gzip
+import json
+import sys
+from array import array
+
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+FORMATO_JSON = 'json'
+FORMATO_COLUMNAR = 'columnar'
+MEDIA_TYPE_COLUMNAR = 'application/vnd.innova.lotes-columnar+json'
+VERSION_COLUMNAR = 1
+
+
+class LotesColumnarRenderer(BaseRenderer):
+    """
+    Renderer usado solo para la negociación de contenido (?format=columnar o
+    Accept: application/vnd.innova.lotes-columnar+json); el cuerpo ya viene
+    serializado desde el snapshot.
+    """
+    media_type = MEDIA_TYPE_COLUMNAR
+    format = FORMATO_COLUMNAR
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def formato_solicitado(request):
+    """Formato pedido por el cliente, leído antes de la negociación de DRF (para el ETag)"""
+    if request.GET.get('format') == FORMATO_COLUMNAR:
+        return FORMATO_COLUMNAR
+    if MEDIA_TYPE_COLUMNAR in request.headers.get('Accept', ''):
+        return FORMATO_COLUMNAR
+    return FORMATO_JSON
+
+
+def codificacion_aceptada(request):
+    """Mejor Content-Encoding soportado por el cliente, o None"""
+    aceptadas = {
+        parte.split(';')[0].strip().lower()
+        for parte in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    if brotli is not None and 'br' in aceptadas:
+        return 'br'
+    if 'gzip' in aceptadas:
+        return 'gzip'
+    return None
+
+
+def _empaquetar_float64(valores):
+    datos = array('d', (float('nan') if v is None else v for v in valores))
+    if sys.byteorder != 'little':
+        datos.byteswap()
+    return base64.b64encode(datos.tobytes()).decode('ascii')
+
+
+def _diccionario(valores):
+    """Devuelve (valores únicos, índices) preservando el orden de aparición"""
+    indices = {}
+    columna = []
+    for valor in valores:
+        if valor not in indices:
+            indices[valor] = len(indices)
+        columna.append(indices[valor])
+    return list(indices), columna
+
+
+def codificar_columnar(lotes):
+    """Convierte la lista de lotes (formato json) a la representación columnar"""
+    manzanas, manzana_idx = _diccionario(lote['manzana'] for lote in lotes)
+    estados = {}
+    for lote in lotes:
+        estados.setdefault(lote['estado'], lote['estado_nombre'])
+
+    return {
+        "v": VERSION_COLUMNAR,
+        "n": len(lotes),
+        "codigo": [lote['codigo'] for lote in lotes],
+        "lote_numero": [lote['lote_numero'] for lote in lotes],
+        "manzanas": manzanas,
+        "manzana": manzana_idx,
+        "estados": estados,
+        "estado": [int(lote['estado']) for lote in lotes],
+        "area_lote": _empaquetar_float64(lote['area_lote'] for lote in lotes),
+        "perimetro": _empaquetar_float64(lote['perimetro'] for lote in lotes),
+        "precio": _empaquetar_float64(lote['precio'] for lote in lotes),
+        "descripcion": [lote['descripcion'] for lote in lotes],
+    }
+
+
+def serializar(lotes, formato):
+    datos = codificar_columnar(lotes) if formato == FORMATO_COLUMNAR else lotes
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def comprimir(contenido, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(contenido)
+    if codificacion == 'gzip':
+        # mtime=0 para que el resultado sea determinista entre workers
+        return gzip.compress(contenido, mtime=0)
+    return contenido
@@ -0,0 +1,76 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from database.models import Lote, Estado_Lote, Historial_Estado
+from .snapshot import invalidar_snapshot
+from .cambios import codificar_cursor
+from .eventos import publicar_evento
+
+
+@receiver(post_save, sender=Lote)
+@receiver(post_delete, sender=Lote)
+@receiver(post_save, sender=Estado_Lote)
+@receiver(post_delete, sender=Estado_Lote)
+def invalidar_snapshot_lotes(sender, **kwargs):
+    """
+    Invalida el snapshot del mapa cuando cambia un lote o un estado.
+    Se difiere al commit para que ninguna petición concurrente reconstruya
+    el snapshot con datos aún no confirmados.
+    """
+    transaction.on_commit(invalidar_snapshot)
+
+
+@receiver(post_save, sender=Estado_Lote)
+def marcar_lotes_del_estado(sender, instance, created, **kwargs):
+    """
+    La versión del snapshot y el feed de cambios se derivan de `Lote.actualizado_en`:
+    al renombrar un estado se marcan sus lotes para que todos los procesos lo vean.
+    """
+    if created:
+        return
+    Lote.objects.filter(estado=instance).update(actualizado_en=timezone.now())
+
+
+@receiver(post_save, sender=Lote)
+def publicar_lote_guardado(sender, instance, **kwargs):
+    """Envía el lote actualizado a los visores conectados por SSE"""
+    evento = {
+        "tipo": "lote",
+        "cursor": codificar_cursor(instance.actualizado_en),
+        "lote": {
+            "codigo": instance.codigo,
+            "manzana": str(instance.manzana),
+            "lote_numero": instance.lote_numero,
+            "estado": str(instance.estado_id),
+            "estado_nombre": instance.estado.nombre,
+            "area_lote": float(instance.area_lote),
+            "perimetro": float(instance.perimetro),
+            "precio": float(instance.precio) if instance.precio else None,
+            "descripcion": str(instance.descripcion) if instance.descripcion else None
+        }
+    }
+    transaction.on_commit(partial(publicar_evento, evento))
+
+
+@receiver(post_delete, sender=Lote)
+def publicar_lote_eliminado(sender, instance, **kwargs):
+    evento = {"tipo": "lote_eliminado", "codigo": instance.codigo}
+    transaction.on_commit(partial(publicar_evento, evento))
+
+
+@receiver(post_save, sender=Historial_Estado)
+def publicar_cambio_estado(sender, instance, created, **kwargs):
+    if not created:
+        return
+    evento = {
+        "tipo": "historial",
+        "codigo": instance.lote.codigo,
+        "estado_anterior": str(instance.estado_anterior_id),
+        "estado_nuevo": str(instance.estado_nuevo_id),
+        "creado_en": instance.creado_en.isoformat(),
+    }
+    transaction.on_commit(partial(publicar_evento, evento))
@@ -0,0 +1,143 @@
+"""
+Snapshot precalculado del plano de lotes.
+
+El JSON completo que devuelve `lotes_estado` se construye una sola vez y se
+guarda en la caché de Django bajo una clave versionada. La versión no es un
+contador en memoria: se deriva de la base de datos (MAX(`actualizado_en`) y
+COUNT de `Lote`), así que cualquier proceso que escriba (otro worker, un
+comando, el shell, `bulk_update`) la cambia para todos. La versión calculada se
+cachea `MAPS_VERSION_TTL` segundos; las señales (ver `apps.maps.signals`) la
+descartan al instante en el proceso que guardó.
+
+Las escrituras masivas con `QuerySet.update()` deben fijar `actualizado_en`
+(como ya hacen `apps.administrator.lotes_masivo` y el feed de cambios).
+
+El snapshot se guarda por formato de transporte y codificación (ver
+`apps.maps.formatos`), de modo que las variantes columnar o comprimidas
+tampoco requieren trabajo por petición.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from database.models import Lote
+from innova_inversiones.metricas import registrar_cache
+from .formatos import FORMATO_JSON, serializar, comprimir, formato_solicitado, codificacion_aceptada
+
+VERSION_KEY = 'maps:lotes:version'
+SNAPSHOT_KEY = 'maps:lotes:snapshot:{version}:{formato}:{codificacion}'
+
+
+def calcular_version():
+    """(version, ultima_modificacion) a partir de la tabla de lotes, en una consulta"""
+    datos = Lote.objects.aggregate(ultima=Max('actualizado_en'), total=Count('id'))
+    ultima = datos['ultima']
+    marca = int(ultima.timestamp() * 1_000_000) if ultima else 0
+    return f'{marca:x}-{datos["total"]:x}', ultima
+
+
+def _vigente():
+    vigente = cache.get(VERSION_KEY)
+    registrar_cache('version_lotes', vigente is not None)
+    if vigente is None:
+        vigente = calcular_version()
+        cache.set(VERSION_KEY, vigente, timeout=settings.MAPS_VERSION_TTL)
+    return vigente
+
+
+def obtener_version():
+    """Devuelve la versión vigente del snapshot"""
+    return _vigente()[0]
+
+
+def invalidar_snapshot():
+    """Descarta la versión cacheada; la siguiente petición la recalcula desde la BD"""
+    cache.delete(VERSION_KEY)
+
+
+CAMPOS_LOTE = (
+    'codigo',
+    'manzana',
+    'lote_numero',
+    'estado__id',
+    'estado__nombre',
+    'area_lote',
+    'perimetro',
+    'precio',
+    'descripcion'
+)
+
+
+def formatear_lote(lote):
+    """Convierte una fila de `values(*CAMPOS_LOTE)` al formato público del mapa"""
+    return {
+        "codigo": lote['codigo'],
+        "manzana": str(lote['manzana']),
+        "lote_numero": lote['lote_numero'],
+        "estado": str(lote['estado__id']),
+        "estado_nombre": lote['estado__nombre'],
+        "area_lote": float(lote['area_lote']),
+        "perimetro": float(lote['perimetro']),
+        "precio": float(lote['precio']) if lote['precio'] else None,
+        "descripcion": str(lote['descripcion']) if lote['descripcion'] else None
+    }
+
+
+def serializar_lotes():
+    """Consulta todos los lotes y los convierte al formato público del mapa"""
+    lotes_data = Lote.objects.select_related('estado').values(*CAMPOS_LOTE)
+    return [formatear_lote(lote) for lote in lotes_data]
+
+
+def construir_snapshot(formato=FORMATO_JSON):
+    """Serializa el plano completo a bytes listos para enviar en el formato indicado"""
+    return serializar(serializar_lotes(), formato)
+
+
+def obtener_snapshot(formato=FORMATO_JSON, codificacion=None):
+    """
+    Devuelve una tupla (version, bytes) con el snapshot vigente.
+    Solo consulta la base de datos si la versión actual aún no está en caché;
+    las variantes comprimidas se derivan de la variante sin comprimir.
+    """
+    version = obtener_version()
+    key = SNAPSHOT_KEY.format(version=version, formato=formato, codificacion=codificacion or 'identity')
+    contenido = cache.get(key)
+    registrar_cache('snapshot_lotes', contenido is not None)
+    if contenido is None:
+        if codificacion:
+            _, original = obtener_snapshot(formato)
+            contenido = comprimir(original, codificacion)
+        else:
+            contenido = construir_snapshot(formato)
+        # Las versiones antiguas quedan huérfanas hasta que expiran
+        cache.set(key, contenido, timeout=settings.MAPS_SNAPSHOT_TTL)
+    return version, contenido
+
+
+def ultima_modificacion():
+    """Fecha del último cambio en `Lote`; sale de la misma consulta que la versión"""
+    return _vigente()[1]
+
+
+# Funciones para `django.views.decorators.http.condition`: reciben los mismos
+# argumentos que la vista y permiten responder 304 sin serializar nada.
+
+def etag_lotes(request, *args, **kwargs):
+    return f'"lotes-{obtener_version()}"'
+
+
+def etag_snapshot(request, *args, **kwargs):
+    """ETag de `lotes_estado`: distinto por formato y codificación de la respuesta"""
+    etag = f'lotes-{obtener_version()}'
+    formato = formato_solicitado(request)
+    if formato != FORMATO_JSON:
+        etag += f'-{formato}'
+    codificacion = codificacion_aceptada(request)
+    if codificacion:
+        etag += f'-{codificacion}'
+    return f'"{etag}"'
+
+
+def last_modified_lotes(request, *args, **kwargs):
+    return ultima_modificacion()
@@ -1,3 +1,239 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import math
+import sys
+from array import array
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from database.models import Estado_Lote, Lote
+
+from .eventos import BackendCache
+from .formatos import MEDIA_TYPE_COLUMNAR
+
+
+class LotesTestMixin:
+    """Un estado y algunos lotes; la caché se vacía antes de cada prueba"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.disponible = Estado_Lote.objects.create(nombre='Disponible')
+        cls.vendido = Estado_Lote.objects.create(nombre='Vendido')
+        for i in range(5):
+            Lote.objects.create(
+                codigo=f'a-{i:02d}', manzana='A', lote_numero=str(i),
+                perimetro=40, area_lote=100, precio=10000, estado=cls.disponible,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+
+class SnapshotLotesTest(LotesTestMixin, TestCase):
+    """El plano se sirve desde la caché y su versión sale de la base de datos"""
+
+    def test_snapshot_en_cache(self):
+        # Versión (MAX/COUNT) + construcción del snapshot
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('lotes_estado'))
+        self.assertEqual(len(response.json()), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('lotes_estado')).content, response.content)
+
+    @override_settings(MAPS_VERSION_TTL=0)
+    def test_escritura_sin_senales_cambia_la_version(self):
+        # Como otro proceso: update() no dispara señales de este proceso
+        anterior = self.client.get(reverse('lotes_estado'))
+        Lote.objects.filter(codigo='a-00').update(estado=self.vendido, actualizado_en=timezone.now())
+
+        response = self.client.get(reverse('lotes_estado'))
+        self.assertNotEqual(response['ETag'], anterior['ETag'])
+        estados = {lote['codigo']: lote['estado_nombre'] for lote in response.json()}
+        self.assertEqual(estados['a-00'], 'Vendido')
+
+    @override_settings(MAPS_VERSION_TTL=0)
+    def test_borrado_cambia_la_version(self):
+        anterior = self.client.get(reverse('lotes_estado'))
+        Lote.objects.filter(codigo='a-04').delete()
+        response = self.client.get(reverse('lotes_estado'))
+        self.assertNotEqual(response['ETag'], anterior['ETag'])
+        self.assertEqual(len(response.json()), 4)
+
+    @override_settings(MAPS_VERSION_TTL=0)
+    def test_renombrar_estado_cambia_la_version(self):
+        anterior = self.client.get(reverse('lotes_estado'))
+        self.disponible.nombre = 'Libre'
+        self.disponible.save()
+        response = self.client.get(reverse('lotes_estado'))
+        self.assertNotEqual(response['ETag'], anterior['ETag'])
+        self.assertEqual(response.json()[0]['estado_nombre'], 'Libre')
+
+
+class GetCondicionalLotesTest(LotesTestMixin, TestCase):
+    """ETag / Last-Modified del plano y del listado de lotes"""
+
+    def test_etag_vigente_responde_304(self):
+        response = self.client.get(reverse('lotes_estado'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('lotes_estado'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_distinto_por_formato(self):
+        json_ = self.client.get(reverse('lotes_estado'))
+        columnar = self.client.get(reverse('lotes_estado'), {'format': 'columnar'})
+        self.assertNotEqual(json_['ETag'], columnar['ETag'])
+        response = self.client.get(reverse('lotes_estado'), HTTP_IF_NONE_MATCH=json_['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            reverse('lotes_estado'), {'format': 'columnar'}, HTTP_IF_NONE_MATCH=json_['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cambio_invalida_el_etag(self):
+        etag = self.client.get(reverse('lotes_estado'))['ETag']
+        lote = Lote.objects.get(codigo='a-01')
+        lote.estado = self.vendido
+        with self.captureOnCommitCallbacks(execute=True):
+            lote.save()
+        response = self.client.get(reverse('lotes_estado'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.client.get(reverse('lotes_estado'))
+        response = self.client.get(reverse('lotes_estado'), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_listado_admin(self):
+        response = self.client.get(reverse('listar-lotes'))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('listar-lotes'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class CambiosLotesTest(LotesTestMixin, TestCase):
+    """Feed incremental `lotes/changes/?since=<cursor>`"""
+
+    def cambios(self, since=None):
+        parametros = {} if since is None else {'since': since}
+        response = self.client.get(reverse('lotes_cambios'), parametros)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_seguir_cambios_con_el_cursor(self):
+        inicial = self.cambios()
+        self.assertEqual(inicial['lotes'], [])
+
+        Lote.objects.update(actualizado_en=timezone.now() - timedelta(minutes=1))
+        cursor = self.cambios()['cursor']
+
+        lote = Lote.objects.get(codigo='a-02')
+        lote.estado = self.vendido
+        lote.save()
+        datos = self.cambios(cursor)
+        # El cambio llega al final (orden por actualizado_en); lo del margen se repite
+        self.assertEqual(datos['lotes'][-1]['codigo'], 'a-02')
+        self.assertEqual(datos['lotes'][-1]['estado_nombre'], 'Vendido')
+        self.assertGreater(int(datos['cursor']), int(cursor))
+
+        # Con el nuevo cursor, los lotes de hace un minuto ya no vuelven
+        self.assertEqual([fila['codigo'] for fila in self.cambios(datos['cursor'])['lotes']], ['a-02'])
+
+    def test_cursor_cero_devuelve_todo(self):
+        self.assertEqual(len(self.cambios('0')['lotes']), 5)
+
+    def test_cursor_invalido(self):
+        for cursor in ('abc', '-1', '9' * 40):
+            response = self.client.get(reverse('lotes_cambios'), {'since': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class EventosBackendCacheTest(TestCase):
+    """El sondeo de `BackendCache` entrega los eventos en orden y no salta huecos transitorios"""
+
+    def setUp(self):
+        cache.clear()
+        self.backend = BackendCache()
+        self.entregados = []
+        self.backend._difundir = self.entregados.append
+
+    def test_entrega_en_orden(self):
+        self.backend.publicar({'n': 1})
+        self.backend.publicar({'n': 2})
+        self.assertEqual(self.backend._leer_nuevos(0), 2)
+        self.assertEqual(self.entregados, [{'n': 1}, {'n': 2}])
+        self.assertEqual(self.backend._leer_nuevos(2), 2)
+
+    def test_espera_evento_aun_no_guardado(self):
+        # Otro proceso reservó la secuencia 2 pero todavía no escribió el evento
+        self.backend.publicar({'n': 1})
+        cache.incr(BackendCache.SECUENCIA_KEY)
+        self.backend.publicar({'n': 3})
+
+        self.assertEqual(self.backend._leer_nuevos(0), 1)
+        cache.set(BackendCache.EVENTO_KEY.format(seq=2), {'n': 2})
+        self.assertEqual(self.backend._leer_nuevos(1), 3)
+        self.assertEqual([evento['n'] for evento in self.entregados], [1, 2, 3])
+
+    def test_hueco_permanente_se_salta(self):
+        cache.add(BackendCache.SECUENCIA_KEY, 0)
+        cache.incr(BackendCache.SECUENCIA_KEY)
+        self.backend.publicar({'n': 2})
+        self.assertEqual(self.backend._leer_nuevos(0), 0)
+        with mock.patch.object(BackendCache, 'ESPERA_MAXIMA', 0), self.assertLogs('apps.maps.eventos', 'WARNING'):
+            self.assertEqual(self.backend._leer_nuevos(0), 2)
+        self.assertEqual(self.entregados, [{'n': 2}])
+
+
+class FormatoColumnarTest(LotesTestMixin, TestCase):
+    """`?format=columnar` y compresión gzip del plano"""
+
+    def decodificar(self, columnas):
+        precios = array('d', base64.b64decode(columnas['precio']))
+        if sys.byteorder != 'little':
+            precios.byteswap()
+        return [
+            {
+                'codigo': codigo,
+                'manzana': columnas['manzanas'][manzana],
+                'estado_nombre': columnas['estados'][str(estado)],
+                'precio': None if math.isnan(precio) else precio,
+            }
+            for codigo, manzana, estado, precio in zip(
+                columnas['codigo'], columnas['manzana'], columnas['estado'], precios
+            )
+        ]
+
+    def test_columnar_equivale_al_json(self):
+        Lote.objects.filter(codigo='a-03').update(precio=None)
+        lotes = self.client.get(reverse('lotes_estado')).json()
+        response = self.client.get(reverse('lotes_estado'), {'format': 'columnar'})
+        self.assertEqual(response['Content-Type'], MEDIA_TYPE_COLUMNAR)
+
+        columnas = json.loads(response.content)
+        self.assertEqual(columnas['n'], 5)
+        self.assertEqual(columnas['manzanas'], ['A'])
+        esperado = [
+            {campo: lote[campo] for campo in ('codigo', 'manzana', 'estado_nombre', 'precio')} for lote in lotes
+        ]
+        self.assertEqual(self.decodificar(columnas), esperado)
+
+    def test_accept_columnar(self):
+        response = self.client.get(reverse('lotes_estado'), HTTP_ACCEPT=MEDIA_TYPE_COLUMNAR)
+        self.assertEqual(json.loads(response.content)['v'], 1)
+
+    def test_gzip(self):
+        plano = self.client.get(reverse('lotes_estado'))
+        response = self.client.get(reverse('lotes_estado'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plano.content)
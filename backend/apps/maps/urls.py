@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('lotes/', views.lotes_estado, name='lotes_estado'),
+    path('lotes/changes/', views.lotes_cambios, name='lotes_cambios'),
+    path('lotes/stream/', views.lotes_stream, name='lotes_stream'),
 ]
@@ -1,17 +1,40 @@
 from django.shortcuts import render
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework import status
-from database.models import Lote
+from .snapshot import obtener_snapshot, etag_snapshot, last_modified_lotes
+from .formatos import LotesColumnarRenderer, codificacion_aceptada
+from .cambios import obtener_cambios, cursor_actual, CursorInvalido
+from .eventos import obtener_hub
+from innova_inversiones.metricas import medir
+from innova_inversiones.presupuesto import presupuesto_consultas
+import asyncio
+import json
+import logging
 import time
 import psycopg2  # para detectar errores de conexión específicos
- 
 
+logger = logging.getLogger(__name__)
 
+
+@cache_control(no_cache=True)
+@condition(etag_func=etag_snapshot, last_modified_func=last_modified_lotes)
+@presupuesto_consultas(2)
 @api_view(['GET'])
+@renderer_classes([JSONRenderer, LotesColumnarRenderer])
 def lotes_estado(request):
     """
-    Devuelve el estado de todos los lotes directamente desde la base de datos.
+    Devuelve el estado de todos los lotes.
+    El JSON se sirve desde el snapshot versionado en caché; solo se consulta
+    la base de datos cuando un lote o estado cambió desde la última construcción.
+    Si el cliente envía If-None-Match / If-Modified-Since vigentes se responde 304.
+    Con ?format=columnar (o Accept: application/vnd.innova.lotes-columnar+json) se
+    envía la representación columnar; gzip/br según Accept-Encoding.
     """
 
     attempts = 0
@@ -20,50 +43,25 @@ def lotes_estado(request):
 
     while attempts < max_attempts:
         try:
-            start_time = time.time()
-
-            # Consulta optimizada
-            lotes_data = Lote.objects.select_related('estado').values(
-                'codigo', 
-                'manzana',
-                'lote_numero',
-                'estado__id',
-                'estado__nombre',
-                'area_lote',
-                'perimetro',
-                'precio',
-                'descripcion'
-            )
-
-            data = [
-                {
-                    "codigo": lote['codigo'].lower(),
-                    "manzana": str(lote['manzana']),
-                    "lote_numero": lote['lote_numero'],
-                    "estado": str(lote['estado__id']),
-                    "estado_nombre": lote['estado__nombre'],
-                    "area_lote": float(lote['area_lote']),
-                    "perimetro": float(lote['perimetro']),
-                    "precio": float(lote['precio']) if lote['precio'] else None,
-                    "descripcion": str(lote['descripcion']) if lote['descripcion'] else None
-                }
-                for lote in lotes_data
-            ]
-
-            # Responder con datos crudos de la DB
-
-            end_time = time.time()
-            print(f"✅ Lotes procesados en {end_time - start_time:.3f} segundos")
-            print(f"📊 Total de lotes: {len(data)}")
-
-            return Response(data)
+            renderer = request.accepted_renderer
+            codificacion = codificacion_aceptada(request)
+            # Tiempo y consultas en innova_bloque_* de /api/admin/metrics/
+            with medir(f'snapshot_lotes_{renderer.format}'):
+                version, contenido = obtener_snapshot(renderer.format, codificacion)
+
+            # Los bytes ya están serializados: se evita el renderer de DRF
+            response = HttpResponse(contenido, content_type=renderer.media_type)
+            if codificacion:
+                response['Content-Encoding'] = codificacion
+            patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+            return response
 
         except psycopg2.OperationalError as e:
             attempts += 1
-            print(f"⚠️ Fallo de conexión (intento {attempts}/{max_attempts}): {e}")
+            logger.warning("Fallo de conexión en lotes_estado (intento %s/%s): %s", attempts, max_attempts, e)
             time.sleep(delay)
         except Exception as e:
-            print(f"❌ Error inesperado en lotes_estado: {str(e)}")
+            logger.exception("Error inesperado en lotes_estado")
             break
 
     # Si fallaron todos los intentos → error
@@ -71,3 +69,75 @@ def lotes_estado(request):
         {"error": "Error interno del servidor"},
         status=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
+
+
+@presupuesto_consultas(1)
+@api_view(['GET'])
+def lotes_cambios(request):
+    """
+    Devuelve solo los lotes modificados desde el cursor indicado (?since=<cursor>)
+    junto con el nuevo cursor para la siguiente consulta.
+    Sin `since` devuelve únicamente el cursor actual, para empezar a seguir cambios
+    después de descargar el plano completo con `lotes_estado`.
+    Nota: los lotes eliminados no aparecen en el feed.
+    """
+    since = request.query_params.get('since')
+
+    try:
+        if since is None:
+            return Response({"cursor": cursor_actual(), "lotes": []}, status=status.HTTP_200_OK)
+
+        lotes, cursor = obtener_cambios(since)
+        return Response({"cursor": cursor, "lotes": lotes}, status=status.HTTP_200_OK)
+
+    except CursorInvalido as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.exception("Error inesperado en lotes_cambios")
+        return Response(
+            {"error": "Error interno del servidor"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+INTERVALO_HEARTBEAT = 15  # segundos sin eventos antes de enviar un comentario keep-alive
+
+
+def formatear_evento_sse(evento):
+    lineas = [f"event: {evento['tipo']}"]
+    if evento.get('cursor'):
+        # El navegador reenvía este id en Last-Event-ID; el cliente puede usarlo con lotes/changes/
+        lineas.append(f"id: {evento['cursor']}")
+    lineas.append(f"data: {json.dumps(evento, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lineas) + "\n\n"
+
+
+async def flujo_eventos_lotes():
+    hub = obtener_hub()
+    suscripcion = hub.suscribir()
+    _, cola = suscripcion
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=INTERVALO_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield formatear_evento_sse(evento)
+    finally:
+        # Se ejecuta cuando el cliente cierra la conexión
+        hub.cancelar(suscripcion)
+
+
+@require_GET
+async def lotes_stream(request):
+    """
+    Canal Server-Sent Events con los cambios de estado de los lotes en vivo.
+    Requiere servir la aplicación por ASGI (ver Procfile); cada conexión recibe
+    los eventos publicados por las señales de `Lote` e `Historial_Estado`.
+    """
+    response = StreamingHttpResponse(flujo_eventos_lotes(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # evitar buffering en proxies nginx
+    return response
@@ -0,0 +1,237 @@
+"""
+Motor de amortización de créditos.
+
+Sistemas soportados (`Credito.sistema_amortizacion`):
+
+    plano    `interes` es el % total sobre el capital, repartido en cuotas iguales
+             (equivale al `monto_total` histórico de `Credito.save`).
+    frances  cuota constante; `interes` es la tasa nominal anual (%) → r = interes / 1200.
+    aleman   amortización de capital constante; misma tasa que el francés.
+
+Todas las magnitudes por cuota tienen forma cerrada en k (número de cuota):
+saldo de capital B(k), suma de las primeras k cuotas S(k) y cuotas vencidas a
+una fecha. Así el estado de un crédito (vencido, atraso, pendiente) se obtiene
+en O(1) sin recorrer sus cuotas, y la cartera completa en una sola pasada
+sobre una consulta `values()`. Solo `cronograma()` genera las cuotas una a una,
+para la tabla `Cuota_Credito` y la vista de detalle.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils import timezone
+
+PLANO = 'plano'
+FRANCES = 'frances'
+ALEMAN = 'aleman'
+SISTEMAS = (PLANO, FRANCES, ALEMAN)
+CENTIMO = Decimal('0.01')
+
+
+def redondear(valor):
+    return Decimal(str(valor)).quantize(CENTIMO, rounding=ROUND_HALF_UP)
+
+
+def fecha_local(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+    return valor
+
+
+def sumar_meses(fecha, meses):
+    """Misma fecha `meses` después; el 31 pasa al último día de los meses cortos"""
+    indice = fecha.month - 1 + meses
+    anio, mes = fecha.year + indice // 12, indice % 12 + 1
+    return date(anio, mes, min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+@dataclass(frozen=True)
+class Condiciones:
+    capital: float
+    interes: float          # % según el sistema (ver docstring del módulo)
+    cuotas: int
+    sistema: str
+    inicio: date            # la cuota k vence k meses después
+
+    @classmethod
+    def desde(cls, monto_base, interes, num_cuotas_totales, fecha_inicio, sistema=PLANO):
+        return cls(
+            capital=float(monto_base),
+            interes=float(interes or 0),
+            cuotas=int(num_cuotas_totales),
+            sistema=sistema or PLANO,
+            inicio=fecha_local(fecha_inicio),
+        )
+
+    @property
+    def tasa(self):
+        """Tasa por período (mensual) de los sistemas francés y alemán"""
+        return self.interes / 1200
+
+    @property
+    def cuota_fija(self):
+        """Cuota constante (francés y plano); en el alemán es la primera cuota"""
+        n, P, r = self.cuotas, self.capital, self.tasa
+        if n <= 0:
+            return 0.0
+        if self.sistema == PLANO:
+            return P * (1 + self.interes / 100) / n
+        if self.sistema == FRANCES and r:
+            return P * r / (1 - (1 + r) ** -n)
+        return P / n + P * r
+
+    def saldo_capital(self, k):
+        """Capital pendiente después de pagar k cuotas"""
+        n, P, r = self.cuotas, self.capital, self.tasa
+        k = max(0, min(k, n))
+        if n <= 0:
+            return 0.0
+        if self.sistema == FRANCES and r:
+            factor = (1 + r) ** k
+            return max(P * factor - self.cuota_fija * (factor - 1) / r, 0.0)
+        return P * (1 - k / n)
+
+    def suma_cuotas(self, k):
+        """Suma de las primeras k cuotas, S(k)"""
+        n, P, r = self.cuotas, self.capital, self.tasa
+        k = max(0, min(k, n))
+        if self.sistema == ALEMAN:
+            # Cuota j = P/n + r·P·(1 - (j-1)/n)  →  serie aritmética
+            return k * P / n + r * P * (k - k * (k - 1) / (2 * n)) if n else 0.0
+        return self.cuota_fija * k
+
+    @property
+    def total(self):
+        return self.suma_cuotas(self.cuotas)
+
+    def vencimiento(self, k):
+        return sumar_meses(self.inicio, k)
+
+    def cuotas_vencidas(self, fecha):
+        """Número de cuotas con vencimiento en o antes de `fecha`"""
+        meses = (fecha.year - self.inicio.year) * 12 + fecha.month - self.inicio.month
+        if meses > 0 and self.vencimiento(meses) > fecha:
+            meses -= 1
+        return max(0, min(meses, self.cuotas))
+
+
+def cronograma(condiciones):
+    """Lista de cuotas (numero, fecha_vencimiento, cuota, capital, interes, saldo) en Decimal"""
+    filas = []
+    n = condiciones.cuotas
+    saldo_anterior = redondear(condiciones.capital)
+    acumulado = Decimal('0.00')
+    for k in range(1, n + 1):
+        if k < n:
+            # Se redondean el saldo y el interés exacto del período; la cuota es su suma,
+            # así capital + interés = cuota sin intereses negativos de un céntimo
+            saldo = redondear(condiciones.saldo_capital(k))
+            capital = saldo_anterior - saldo
+            interes_exacto = (
+                condiciones.suma_cuotas(k) - condiciones.suma_cuotas(k - 1)
+                - (condiciones.saldo_capital(k - 1) - condiciones.saldo_capital(k))
+            )
+            cuota = capital + redondear(interes_exacto)
+        else:
+            # La última cuota absorbe los céntimos de redondeo: el total coincide con `monto_total`
+            cuota = redondear(condiciones.total) - acumulado
+            saldo = Decimal('0.00')
+            capital = saldo_anterior
+        acumulado += cuota
+        filas.append({
+            'numero': k,
+            'fecha_vencimiento': condiciones.vencimiento(k),
+            'cuota': cuota,
+            'capital': capital,
+            'interes': cuota - capital,
+            'saldo': saldo,
+        })
+        saldo_anterior = saldo
+    return filas
+
+
+def estado(condiciones, pagadas, fecha):
+    """Situación de un crédito a una fecha, en O(1)"""
+    n = condiciones.cuotas
+    pagadas = max(0, min(pagadas, n))
+    vencidas = condiciones.cuotas_vencidas(fecha)
+    atrasadas = max(0, vencidas - pagadas)
+    return {
+        'cuota': round(condiciones.cuota_fija, 2),
+        'cuotas_totales': n,
+        'cuotas_pagadas': pagadas,
+        'cuotas_vencidas': vencidas,
+        'cuotas_atrasadas': atrasadas,
+        'monto_vencido': round(condiciones.suma_cuotas(vencidas) - condiciones.suma_cuotas(pagadas), 2) if atrasadas else 0.0,
+        'monto_pagado': round(condiciones.suma_cuotas(pagadas), 2),
+        'por_cobrar': round(condiciones.total - condiciones.suma_cuotas(pagadas), 2),
+        'saldo_capital': round(condiciones.saldo_capital(pagadas), 2),
+        'proximo_vencimiento': condiciones.vencimiento(pagadas + 1) if pagadas < n else None,
+    }
+
+
+CAMPOS_CARTERA = (
+    'id', 'monto_base', 'interes', 'num_cuotas_totales', 'num_cuotas_pagadas',
+    'fecha_inicio', 'sistema_amortizacion', 'estado_credito',
+    'cliente_id', 'cliente__nombre', 'cliente__apellidos', 'lote__codigo',
+)
+
+
+def cartera(filas, fecha=None):
+    """
+    Estado de todos los créditos de `filas` (dicts con `CAMPOS_CARTERA`) en una
+    pasada. Devuelve (creditos, totales).
+    """
+    fecha = fecha or timezone.localdate()
+    creditos = []
+    totales = {'creditos': 0, 'con_atraso': 0, 'monto_vencido': 0.0, 'por_cobrar': 0.0, 'saldo_capital': 0.0}
+
+    for fila in filas:
+        condiciones = Condiciones.desde(
+            fila['monto_base'], fila['interes'], fila['num_cuotas_totales'],
+            fila['fecha_inicio'], fila['sistema_amortizacion'],
+        )
+        situacion = estado(condiciones, fila['num_cuotas_pagadas'], fecha)
+        creditos.append({
+            'id': str(fila['id']),
+            'cliente_id': str(fila['cliente_id']),
+            'cliente': f"{fila['cliente__nombre']} {fila['cliente__apellidos']}".strip(),
+            'lote': fila['lote__codigo'],
+            'sistema': condiciones.sistema,
+            'estado_credito': fila['estado_credito'],
+            **situacion,
+        })
+        totales['creditos'] += 1
+        totales['con_atraso'] += 1 if situacion['cuotas_atrasadas'] else 0
+        totales['monto_vencido'] += situacion['monto_vencido']
+        totales['por_cobrar'] += situacion['por_cobrar']
+        totales['saldo_capital'] += situacion['saldo_capital']
+
+    for clave in ('monto_vencido', 'por_cobrar', 'saldo_capital'):
+        totales[clave] = round(totales[clave], 2)
+    return creditos, totales
+
+
+def condiciones_de(credito):
+    return Condiciones.desde(
+        credito.monto_base, credito.interes, credito.num_cuotas_totales,
+        credito.fecha_inicio, credito.sistema_amortizacion,
+    )
+
+
+def regenerar_cronogramas(creditos):
+    """Reemplaza las filas de `Cuota_Credito` de los créditos dados con un bulk_create"""
+    from django.db import transaction
+    from .models import Cuota_Credito
+
+    creditos = list(creditos)
+    filas = [
+        Cuota_Credito(credito_id=credito.pk, **cuota)
+        for credito in creditos
+        for cuota in cronograma(condiciones_de(credito))
+    ]
+    with transaction.atomic():
+        Cuota_Credito.objects.filter(credito_id__in=[c.pk for c in creditos]).delete()
+        Cuota_Credito.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
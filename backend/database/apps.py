@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DatabaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'database'
+
+    def ready(self):
+        # Mantenimiento del documento de búsqueda de clientes
+        from . import signals  # noqa: F401
@@ -0,0 +1,66 @@
+"""
+Archivo de transacciones de años cerrados.
+
+El libro activo (`Transaccion`) conserva solo los años abiertos; `archivar()`
+mueve las filas de los años cerrados a `Transaccion_Archivada` por tramos de
+ids (lectura, `bulk_create` y DELETE en una transacción por tramo). Las filas
+conservan su id, así que el libro paginado por (fecha, id) puede mezclar ambas
+tablas sin duplicados (ver apps.administrator.transacciones).
+
+El movimiento no pasa por las señales de `Transaccion`: el contador de cuotas
+pagadas y el resumen de cartera no cambian, y `reconciliar()` /
+`reconciliar_cuotas()` cuentan también las filas archivadas.
+"""
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+
+def inicio_de_anio(anio):
+    return timezone.make_aware(datetime(anio, 1, 1))
+
+
+def _borrar_sin_senales(modelo, ids):
+    """DELETE directo: `QuerySet.delete()` enviaría post_delete por cada fila"""
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE id IN ({marcadores})', ids)
+
+
+def archivar(hasta_anio, aplicar=True, tamano_lote=5000):
+    """
+    Archiva las transacciones con fecha anterior al 1 de enero de
+    `hasta_anio + 1`. Devuelve {año: cantidad} de las filas a mover.
+    """
+    from .models import Transaccion, Transaccion_Archivada
+
+    pendientes = Transaccion.objects.filter(fecha__lt=inicio_de_anio(hasta_anio + 1))
+    por_anio = dict(
+        pendientes.annotate(anio=ExtractYear('fecha'))
+        .order_by()
+        .values_list('anio')
+        .annotate(total=Count('id'))
+    )
+    if not aplicar:
+        return por_anio
+
+    campos = [campo.attname for campo in Transaccion._meta.concrete_fields]
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                pendientes.filter(id__gt=ultimo_id).order_by('id').select_for_update().values(*campos)[:tamano_lote]
+            )
+            if not filas:
+                break
+            Transaccion_Archivada.objects.bulk_create(
+                [Transaccion_Archivada(**fila) for fila in filas], batch_size=1000
+            )
+            ids = [fila['id'] for fila in filas]
+            _borrar_sin_senales(Transaccion, ids)
+            ultimo_id = ids[-1]
+    return por_anio
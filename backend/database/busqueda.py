@@ -0,0 +1,88 @@
+"""
+Documento de búsqueda desnormalizado de `Cliente`.
+
+`Cliente.busqueda` guarda en un solo texto, sin tildes y en minúsculas, el
+nombre, apellidos, DNI, email, teléfono y los datos de sus lotes (código,
+manzana, número y tipo de relación). Las búsquedas pliegan el término de la
+misma forma y filtran con `busqueda__contains`, que en PostgreSQL usa el
+índice trigram `cliente_busqueda_trgm` (ver migración 0018) y en SQLite un
+LIKE sobre una sola columna, sin joins ni DISTINCT.
+
+El documento se mantiene desde `database.signals`.
+"""
+import unicodedata
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+def plegar(texto):
+    """Minúsculas, sin tildes ni diacríticos (JOSÉ → jose, MUÑOZ → munoz) y espacios simples"""
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    sin_marcas = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_marcas.lower().split())
+
+
+def construir_documento(cliente, relaciones=()):
+    """
+    Texto de búsqueda de un cliente. `relaciones` son objetos con `tipo_relacion`
+    y `lote` (codigo, manzana, lote_numero).
+    """
+    partes = [cliente.nombre, cliente.apellidos, cliente.dni, cliente.email, cliente.telefono]
+    for relacion in relaciones:
+        partes.extend([
+            relacion.lote.codigo,
+            relacion.lote.manzana,
+            relacion.lote.lote_numero,
+            relacion.tipo_relacion,
+        ])
+    return plegar(' '.join(str(parte) for parte in partes if parte))
+
+
+def actualizar_documentos(cliente_ids):
+    """Recalcula el documento de los clientes indicados con 2 consultas + 1 bulk_update"""
+    from .models import Cliente, relacion_cliente_lote
+
+    if not cliente_ids:
+        return 0
+
+    clientes = list(Cliente.objects.filter(id__in=cliente_ids))
+    relaciones = {}
+    for relacion in relacion_cliente_lote.objects.filter(cliente_id__in=cliente_ids).select_related('lote'):
+        relaciones.setdefault(relacion.cliente_id, []).append(relacion)
+
+    cambiados = []
+    for cliente in clientes:
+        documento = construir_documento(cliente, relaciones.get(cliente.id, ()))
+        if documento != cliente.busqueda:
+            cliente.busqueda = documento
+            cambiados.append(cliente)
+
+    # bulk_update no dispara señales ni modifica `actualizado_en`
+    Cliente.objects.bulk_update(cambiados, ['busqueda'], batch_size=500)
+    return len(cambiados)
+
+
+def filtrar_busqueda(queryset, termino, campo='busqueda'):
+    """
+    Filtra por cada palabra del término (todas deben aparecer) y anota `rango`:
+    0 si el documento empieza con el término, 1 si alguna palabra empieza con él,
+    2 si solo lo contiene.
+    """
+    plegado = plegar(termino)
+    if not plegado:
+        return queryset.annotate(rango=Value(2, output_field=IntegerField()))
+
+    condicion = Q()
+    for palabra in plegado.split():
+        condicion &= Q(**{f'{campo}__contains': palabra})
+
+    return queryset.filter(condicion).annotate(
+        rango=Case(
+            When(**{f'{campo}__startswith': plegado}, then=Value(0)),
+            When(**{f'{campo}__contains': f' {plegado}'}, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    )
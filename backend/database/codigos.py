@@ -0,0 +1,102 @@
+"""
+Códigos de lote canónicos y su resolución código → id.
+
+`Lote.codigo` se guarda siempre en forma canónica (sin espacios y en
+minúsculas, ver `Lote.save`), así que las búsquedas usan igualdad exacta sobre
+el índice único de `codigo` en lugar de `codigo__iexact`, que en PostgreSQL
+compara con UPPER() y recorre la tabla completa.
+
+`mapa_codigos` mantiene en cada proceso un diccionario código → id para las
+consultas frecuentes del administrador. Las altas, bajas y cambios de código
+incrementan una versión en la caché de Django (ver `database.signals`) y los
+procesos con una versión distinta reconstruyen el diccionario con una sola
+consulta en la siguiente búsqueda.
+"""
+import threading
+
+from django.core.cache import cache
+
+from innova_inversiones.metricas import registrar_cache
+
+VERSION_KEY = 'database:lotes:codigos:version'
+
+
+def normalizar_codigo(codigo):
+    """Forma canónica de un código de lote: " A-01 " → "a-01" """
+    return str(codigo or '').strip().lower()
+
+
+def obtener_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def incrementar_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        cache.incr(VERSION_KEY)
+
+
+class MapaCodigos:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._version = None
+
+    def construir(self):
+        from .models import Lote
+
+        version = obtener_version()
+        ids = dict(Lote.objects.values_list('codigo', 'id'))
+        with self._lock:
+            self._ids, self._version = ids, version
+
+    def obtener_id(self, codigo):
+        """Id del lote con ese código (sin distinguir mayúsculas) o None"""
+        from .models import Lote
+
+        if self._version is None or self._version != obtener_version():
+            self.construir()
+        codigo = normalizar_codigo(codigo)
+        lote_id = self._ids.get(codigo)
+        registrar_cache('mapa_codigos', lote_id is not None)
+        if lote_id is None:
+            # Con una caché local por proceso la versión no cruza workers: ante un
+            # fallo se confirma con una consulta exacta sobre el índice único
+            lote_id = Lote.objects.filter(codigo=codigo).values_list('id', flat=True).first()
+            if lote_id is not None:
+                with self._lock:
+                    self._ids[codigo] = lote_id
+        return lote_id
+
+    def contiene(self, codigo, lote_id):
+        """True si el mapa local ya asocia el código con ese id (sin consultar la versión)"""
+        return self._ids.get(normalizar_codigo(codigo)) == lote_id
+
+
+mapa_codigos = MapaCodigos()
+
+
+def obtener_lote(codigo, queryset=None):
+    """
+    Lote por código usando el mapa en memoria y la clave primaria. Lanza
+    `Lote.DoesNotExist` si no existe, igual que `Lote.objects.get`.
+    """
+    from .models import Lote
+
+    queryset = Lote.objects.all() if queryset is None else queryset
+    lote_id = mapa_codigos.obtener_id(codigo)
+    if lote_id is None:
+        raise Lote.DoesNotExist(f'No existe un lote con código "{codigo}"')
+    lote = queryset.filter(pk=lote_id).first()
+    if lote is None or lote.codigo != normalizar_codigo(codigo):
+        # Entrada obsoleta (lote eliminado o renombrado en otro proceso)
+        mapa_codigos.construir()
+        return queryset.get(codigo=normalizar_codigo(codigo))
+    return lote
@@ -0,0 +1,70 @@
+"""
+Contador de cuotas pagadas de `Credito`.
+
+`Credito.num_cuotas_pagadas` se mantiene con `UPDATE ... SET n = n ± 1` cada
+vez que se registra, modifica o elimina una `Transaccion` de tipo CUOTA (ver
+`database.signals`), sin el COUNT por escritura que hacía `Credito.save()`.
+`reconciliar_cuotas()` recalcula todos los créditos con una sola consulta
+agrupada y escribe solo los que difieren.
+"""
+from collections import Counter
+
+from django.db.models import Count, F
+
+CUOTA = 'CUOTA'
+
+
+def es_cuota(valores):
+    return valores is not None and valores.get('credito_id') is not None and valores.get('tipo') == CUOTA
+
+
+def ajustar_contador(credito_id, delta):
+    from .models import Credito
+
+    creditos = Credito.objects.filter(pk=credito_id)
+    if delta < 0:
+        # Nunca por debajo de cero aunque el contador estuviera desfasado
+        creditos = creditos.filter(num_cuotas_pagadas__gte=-delta)
+    creditos.update(num_cuotas_pagadas=F('num_cuotas_pagadas') + delta)
+
+
+def registrar_cambio_cuota(originales, actuales):
+    """`originales` es None en un alta y `actuales` es None en una baja"""
+    anterior = originales.get('credito_id') if es_cuota(originales) else None
+    nuevo = actuales.get('credito_id') if es_cuota(actuales) else None
+    if anterior == nuevo:
+        return
+    if anterior is not None:
+        ajustar_contador(anterior, -1)
+    if nuevo is not None:
+        ajustar_contador(nuevo, 1)
+
+
+def reconciliar_cuotas(aplicar=True, tamano_lote=1000):
+    """
+    Recalcula `num_cuotas_pagadas` de todos los créditos. Devuelve la lista de
+    (credito_id, valor guardado, valor correcto) de los que estaban desfasados.
+    """
+    from .models import Credito, Transaccion, Transaccion_Archivada
+
+    # Las cuotas archivadas (database.archivo) siguen contando como pagadas
+    conteos = Counter()
+    for modelo in (Transaccion, Transaccion_Archivada):
+        conteos.update(dict(
+            modelo.objects.filter(tipo=CUOTA, credito__isnull=False)
+            .order_by()
+            .values_list('credito_id')
+            .annotate(total=Count('id'))
+        ))
+
+    diferencias, desfasados = [], []
+    for credito in Credito.objects.only('id', 'num_cuotas_pagadas').iterator(chunk_size=tamano_lote):
+        correcto = conteos.get(credito.id, 0)
+        if credito.num_cuotas_pagadas != correcto:
+            diferencias.append((credito.id, credito.num_cuotas_pagadas, correcto))
+            credito.num_cuotas_pagadas = correcto
+            desfasados.append(credito)
+
+    if aplicar and desfasados:
+        Credito.objects.bulk_update(desfasados, ['num_cuotas_pagadas'], batch_size=tamano_lote)
+    return diferencias
@@ -0,0 +1,244 @@
+"""
+Detección aproximada de clientes duplicados.
+
+Comparar todos contra todos es O(n²). Cada cliente recibe unas pocas claves
+de bloqueo y solo se comparan clientes que comparten alguna:
+
+    a:<apellido fonético>   primer apellido plegado y reducido fonéticamente
+    n:<nombre fonético>     primer nombre (cubre "SIN APELLIDOS")
+    t:<últimos 6 dígitos>   sufijo del teléfono
+
+Dentro de cada bloque los clientes se ordenan por nombre completo plegado y
+cada uno se compara con sus `ventana` vecinos (sorted neighborhood), así un
+bloque grande como "n:jose" no vuelve cuadrático el recorrido.
+
+El puntaje usa rasgos precalculados una sola vez por cliente (trigramas y
+palabras como `frozenset`), de modo que comparar un par son intersecciones
+de conjuntos resueltas en C, sin recalcular cadenas.
+"""
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+from .busqueda import plegar
+from .importacion import APELLIDOS_VACIOS
+
+CONSERVAR = 7  # análisis guardados; los anteriores se borran
+CAMPOS = ('id', 'nombre', 'apellidos', 'dni', 'telefono', 'estado')
+
+UMBRAL = 0.8
+VENTANA = 20
+
+_APELLIDOS_VACIOS = plegar(APELLIDOS_VACIOS)
+_REGLAS_FONETICAS = [
+    (re.compile(r'[^a-z]'), ''),
+    (re.compile(r'll'), 'y'),
+    (re.compile(r'qu'), 'k'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'c'), 'k'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'[vw]'), 'b'),
+    (re.compile(r'h'), ''),
+    (re.compile(r'x'), 'ks'),
+    (re.compile(r'y$'), 'i'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def fonetico(palabra):
+    """Clave fonética simple para español: BÁSQUEZ, VASQUES y VAZQUEZ → baskes"""
+    clave = plegar(palabra)
+    for patron, reemplazo in _REGLAS_FONETICAS:
+        clave = patron.sub(reemplazo, clave)
+    return clave
+
+
+def _trigramas(texto):
+    relleno = f'  {texto} '
+    return frozenset(relleno[i:i + 3] for i in range(len(relleno) - 2))
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    comunes = len(a & b)
+    return comunes / (len(a) + len(b) - comunes)
+
+
+@dataclass(frozen=True)
+class Rasgos:
+    """Datos de un cliente preparados para comparar"""
+    id: str
+    nombre: str
+    apellidos: str
+    dni: str
+    telefono: str
+    completo: str
+    sin_apellidos: bool
+    palabras: frozenset
+    trigramas: frozenset
+    claves: tuple
+
+    @classmethod
+    def desde_fila(cls, fila):
+        nombre = plegar(fila['nombre'])
+        apellidos = plegar(fila['apellidos'])
+        sin_apellidos = apellidos in ('', _APELLIDOS_VACIOS)
+        if sin_apellidos:
+            apellidos = ''
+        completo = f'{nombre} {apellidos}'.strip()
+        telefono = re.sub(r'\D', '', fila['telefono'] or '')[-9:]
+
+        claves = []
+        if apellidos:
+            claves.append('a:' + fonetico(apellidos.split()[0]))
+        if nombre:
+            claves.append('n:' + fonetico(nombre.split()[0]))
+        if len(telefono) >= 6:
+            claves.append('t:' + telefono[-6:])
+
+        return cls(
+            id=str(fila['id']),
+            nombre=fila['nombre'],
+            apellidos=fila['apellidos'],
+            dni=fila['dni'] or '',
+            telefono=telefono,
+            completo=completo,
+            sin_apellidos=sin_apellidos,
+            palabras=frozenset(completo.split()),
+            trigramas=_trigramas(completo),
+            claves=tuple(claves),
+        )
+
+    def resumen(self):
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'apellidos': self.apellidos,
+            'dni': self.dni or None,
+            'telefono': self.telefono or None,
+        }
+
+
+def puntuar(a, b):
+    """Devuelve (puntaje 0..1, motivos). Dos DNI distintos nunca son el mismo cliente."""
+    if a.dni and b.dni and a.dni != b.dni:
+        return 0.0, []
+
+    motivos = []
+    puntaje = _jaccard(a.trigramas, b.trigramas)
+    if a.completo == b.completo:
+        puntaje = 1.0
+        motivos.append('mismo nombre sin tildes')
+    elif a.palabras == b.palabras:
+        puntaje = max(puntaje, 0.95)
+        motivos.append('mismas palabras en otro orden')
+    elif (a.sin_apellidos or b.sin_apellidos) and (a.palabras <= b.palabras or b.palabras <= a.palabras):
+        # "JERONIMO" (SIN APELLIDOS) frente a "JERONIMO GARNICA"
+        puntaje = max(puntaje, 0.85)
+        motivos.append('nombre contenido en el otro (sin apellidos)')
+    else:
+        # Los trigramas ignoran repeticiones: textos distintos nunca puntúan 1
+        puntaje = min(puntaje, 0.99)
+        motivos.append(f'nombre similar ({puntaje:.2f})')
+
+    if a.telefono and a.telefono == b.telefono:
+        puntaje = min(1.0, puntaje + 0.15)
+        motivos.append('mismo teléfono')
+    elif a.telefono and b.telefono:
+        puntaje -= 0.1
+    return round(max(puntaje, 0.0), 3), motivos
+
+
+def pares_candidatos(rasgos, ventana=VENTANA):
+    """Pares (i, j) de índices de `rasgos` que comparten bloque y están a `ventana` o menos"""
+    bloques = defaultdict(list)
+    for indice, r in enumerate(rasgos):
+        for clave in r.claves:
+            bloques[clave].append(indice)
+
+    vistos = set()
+    for miembros in bloques.values():
+        if len(miembros) < 2:
+            continue
+        miembros.sort(key=lambda i: rasgos[i].completo)
+        for posicion, i in enumerate(miembros):
+            for j in miembros[posicion + 1:posicion + 1 + ventana]:
+                par = (i, j) if i < j else (j, i)
+                if par not in vistos:
+                    vistos.add(par)
+                    yield par
+
+
+def detectar_duplicados(filas, umbral=UMBRAL, ventana=VENTANA):
+    """
+    Candidatos a fusión entre las filas dadas (dicts con `CAMPOS`), ordenados
+    por puntaje descendente. Devuelve (candidatos, estadisticas).
+    """
+    inicio = time.monotonic()
+    rasgos = [Rasgos.desde_fila(fila) for fila in filas]
+
+    candidatos, comparados = [], 0
+    for i, j in pares_candidatos(rasgos, ventana):
+        comparados += 1
+        puntaje, motivos = puntuar(rasgos[i], rasgos[j])
+        if puntaje >= umbral:
+            candidatos.append({
+                'puntaje': puntaje,
+                'motivos': motivos,
+                'cliente_a': rasgos[i].resumen(),
+                'cliente_b': rasgos[j].resumen(),
+            })
+    candidatos.sort(key=lambda c: (-c['puntaje'], c['cliente_a']['nombre']))
+
+    estadisticas = {
+        'clientes': len(rasgos),
+        'pares_comparados': comparados,
+        'candidatos': len(candidatos),
+        'segundos': round(time.monotonic() - inicio, 3),
+    }
+    return candidatos, estadisticas
+
+
+def analizar_clientes(umbral=UMBRAL, ventana=VENTANA, incluir_inactivos=False):
+    """
+    Ejecuta la detección sobre la tabla de clientes y guarda el resultado en
+    `Analisis_Duplicados`, visible para todos los procesos. Es costosa: la
+    ejecuta el comando `detectar_duplicados_clientes`, nunca una petición web.
+    """
+    from .models import Analisis_Duplicados, Cliente
+
+    clientes = Cliente.objects.all() if incluir_inactivos else Cliente.objects.filter(estado=True)
+    filas = clientes.values(*CAMPOS).iterator(chunk_size=5000)
+    candidatos, estadisticas = detectar_duplicados(filas, umbral=umbral, ventana=ventana)
+
+    analisis = Analisis_Duplicados.objects.create(
+        umbral=umbral,
+        ventana=ventana,
+        incluir_inactivos=incluir_inactivos,
+        estadisticas=estadisticas,
+        candidatos=candidatos,
+    )
+    antiguos = Analisis_Duplicados.objects.order_by('-generado_en', '-id').values_list('id', flat=True)[CONSERVAR:]
+    Analisis_Duplicados.objects.filter(id__in=list(antiguos)).delete()
+    return _como_dict(analisis)
+
+
+def ultimo_resultado():
+    """Resultado de la última ejecución (p. ej. la nocturna), o None"""
+    from .models import Analisis_Duplicados
+
+    analisis = Analisis_Duplicados.objects.order_by('-generado_en', '-id').first()
+    return _como_dict(analisis) if analisis else None
+
+
+def _como_dict(analisis):
+    return {
+        'generado_en': analisis.generado_en.isoformat(),
+        'umbral': analisis.umbral,
+        'estadisticas': analisis.estadisticas,
+        'candidatos': analisis.candidatos,
+    }
@@ -0,0 +1,382 @@
+"""
+Pipeline de importación masiva de clientes.
+
+Las etapas son generadores encadenados, así que la memoria no depende del
+tamaño del archivo:
+
+    leer_archivo → normalizar_filas → agrupar → Importador.procesar_lote
+
+Cada lote se deduplica contra los clientes existentes con una consulta por
+clave (DNI, y nombre + apellidos plegados sin tildes, ver `clave_nombre`) y se
+escribe con `bulk_create` / `bulk_update` dentro de una transacción.
+
+Con `importar_en_paralelo` el archivo se reparte primero en particiones por
+hash del nombre plegado; un pool de procesos normaliza y deduplica cada
+partición y el proceso principal es el único escritor:
+
+    leer_archivo → particionar → procesar_particion (pool) → Importador
+"""
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .busqueda import construir_documento, actualizar_documentos, plegar
+from .models import Cliente
+
+APELLIDOS_VACIOS = "SIN APELLIDOS"
+FORMATOS = ('csv', 'xlsx', 'jsonl')
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+# ==============================
+# LECTURA
+# ==============================
+def _leer_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        yield from csv.DictReader(archivo)
+
+
+def _leer_jsonl(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise ErrorImportacion(f'Línea {numero} no es JSON válido: {e}')
+
+
+def _leer_xlsx(ruta):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion('Para importar archivos .xlsx instale openpyxl')
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [str(c).strip().lower() if c is not None else '' for c in next(filas, [])]
+        for fila in filas:
+            yield {
+                encabezado: '' if valor is None else str(valor)
+                for encabezado, valor in zip(encabezados, fila)
+            }
+    finally:
+        libro.close()
+
+
+def detectar_formato(ruta, formato=None):
+    formato = formato or Path(ruta).suffix.lstrip('.').lower()
+    if formato not in FORMATOS:
+        raise ErrorImportacion(f'Formato no soportado: "{formato}". Use uno de: {", ".join(FORMATOS)}')
+    return formato
+
+
+def leer_archivo(ruta, formato=None):
+    """Genera un dict por fila con las columnas del archivo (telefono, nombre, apellidos, dni)"""
+    lectores = {'csv': _leer_csv, 'jsonl': _leer_jsonl, 'xlsx': _leer_xlsx}
+    return lectores[detectar_formato(ruta, formato)](ruta)
+
+
+# ==============================
+# NORMALIZACIÓN
+# ==============================
+def normalizar_numero(valor):
+    """
+    Interpreta la columna de contacto como en la importación original:
+    8 dígitos → DNI, 9 → teléfono, más de 9 → primeros 9, "O" o vacío → nada.
+    Devuelve (dni, telefono).
+    """
+    valor = (valor or '').strip()
+    numero_limpio = re.sub(r'[^\d]', '', valor)
+
+    if valor.upper() == "O" or not numero_limpio:
+        return None, None
+    if len(numero_limpio) == 8:
+        return numero_limpio, None
+    if len(numero_limpio) > 9:
+        return None, numero_limpio[:9]
+    return None, numero_limpio
+
+
+def normalizar_fila(fila):
+    """Devuelve el dict normalizado o None si la fila debe omitirse"""
+    nombre = (fila.get('nombre') or '').strip()
+    if not nombre:
+        return None
+    apellidos = (fila.get('apellidos') or '').strip()
+
+    dni, telefono = normalizar_numero(fila.get('telefono'))
+    dni_columna = re.sub(r'[^\d]', '', fila.get('dni') or '')
+    if len(dni_columna) == 8:
+        dni = dni_columna
+
+    return {
+        "nombre": nombre,
+        "apellidos": apellidos,
+        "dni": dni,
+        "telefono": telefono,
+    }
+
+
+def normalizar_filas(filas):
+    for fila in filas:
+        yield normalizar_fila(fila)
+
+
+def clave_nombre(fila):
+    """
+    Clave de deduplicación por nombre: nombre y apellidos plegados (sin tildes ni
+    mayúsculas), de modo que JERÓNIMO y Jeronimo son el mismo cliente. La usan
+    igual la importación secuencial y la paralela (ver `clave_particion`).
+    """
+    return (plegar(fila.get('nombre')), plegar(fila.get('apellidos')) or plegar(APELLIDOS_VACIOS))
+
+
+def agrupar(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+# ==============================
+# ESCRITURA
+# ==============================
+class Importador:
+    """
+    Aplica lotes de filas normalizadas a la base de datos y acumula estadísticas.
+    Los duplicados dentro del mismo archivo se detectan con los conjuntos
+    `dnis_vistos` / `nombres_vistos` (solo claves, no filas).
+    """
+
+    def __init__(self, tamano_lote=1000):
+        self.tamano_lote = tamano_lote
+        self.leidas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.omitidos = 0
+        self.inicio = time.monotonic()
+        self.dnis_vistos = set()
+        self.nombres_vistos = set()
+
+    @property
+    def segundos(self):
+        return time.monotonic() - self.inicio
+
+    @property
+    def filas_por_segundo(self):
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+    def _precargar_existentes(self, filas):
+        """Clientes existentes del lote: 1 consulta por DNI y 1 por cada 200 nombres"""
+        dnis = {f['dni'] for f in filas if f['dni']}
+        por_dni = {c.dni: c for c in Cliente.objects.filter(dni__in=dnis)} if dnis else {}
+
+        # El documento de búsqueda empieza con "nombre apellidos" plegados (ver
+        # database/busqueda.py): se busca por ese prefijo y se confirma con la clave
+        por_nombre = {}
+        prefijos = sorted({' '.join(clave_nombre(f)) for f in filas})
+        for grupo in agrupar(prefijos, 200):
+            condicion = Q()
+            for prefijo in grupo:
+                condicion |= Q(busqueda__startswith=prefijo)
+            for cliente in Cliente.objects.filter(condicion):
+                clave = clave_nombre({'nombre': cliente.nombre, 'apellidos': cliente.apellidos})
+                por_nombre.setdefault(clave, cliente)
+        return por_dni, por_nombre
+
+    def procesar_lote(self, filas):
+        self.leidas += len(filas)
+        validas = []
+        for fila in filas:
+            if fila is None:
+                self.omitidos += 1
+            else:
+                validas.append(fila)
+
+        por_dni, por_nombre = self._precargar_existentes(validas)
+        nuevos, actualizar = [], {}
+
+        for fila in validas:
+            clave = clave_nombre(fila)
+            if (fila['dni'] and fila['dni'] in self.dnis_vistos) or clave in self.nombres_vistos:
+                self.omitidos += 1
+                continue
+            if fila['dni']:
+                self.dnis_vistos.add(fila['dni'])
+            self.nombres_vistos.add(clave)
+
+            existente = por_dni.get(fila['dni']) if fila['dni'] else None
+            existente = existente or por_nombre.get(clave)
+            if existente is None:
+                cliente = Cliente(
+                    nombre=fila['nombre'],
+                    apellidos=fila['apellidos'] or APELLIDOS_VACIOS,
+                    dni=fila['dni'],
+                    telefono=fila['telefono'],
+                    estado=True,
+                )
+                # bulk_create no dispara señales: el documento de búsqueda se calcula aquí
+                cliente.busqueda = construir_documento(cliente)
+                nuevos.append(cliente)
+                continue
+
+            # Completar datos faltantes del cliente existente
+            cambiado = False
+            if fila['dni'] and not existente.dni:
+                existente.dni = fila['dni']
+                cambiado = True
+            if fila['telefono'] and not existente.telefono:
+                existente.telefono = fila['telefono']
+                cambiado = True
+            if cambiado:
+                actualizar[existente.pk] = existente
+            else:
+                self.omitidos += 1
+
+        with transaction.atomic():
+            creados, completados, descartados = self._insertar(nuevos)
+            if actualizar:
+                Cliente.objects.bulk_update(
+                    list(actualizar.values()), ['dni', 'telefono'], batch_size=self.tamano_lote
+                )
+                actualizar_documentos(list(actualizar))
+
+        self.creados += creados
+        self.actualizados += len(actualizar) + completados
+        self.omitidos += descartados
+
+    def _insertar(self, nuevos):
+        """
+        Inserta los clientes nuevos y devuelve (creados, completados, descartados).
+        Si otro proceso insertó el mismo DNI entre la precarga y la escritura, el
+        conflicto completa su teléfono (completado) o descarta la fila; como el id
+        (UUID) se genera aquí, lo realmente insertado se cuenta buscando los ids.
+        """
+        if not nuevos:
+            return 0, 0, 0
+        con_telefono = [c for c in nuevos if c.dni and c.telefono]
+        resto = [c for c in nuevos if not (c.dni and c.telefono)]
+        # Antes de insertar: en PostgreSQL un conflicto con update_conflicts
+        # reemplaza el pk del objeto por el de la fila existente
+        pks_con_telefono = [c.pk for c in con_telefono]
+        pks_resto = [c.pk for c in resto]
+        if con_telefono:
+            Cliente.objects.bulk_create(
+                con_telefono,
+                batch_size=self.tamano_lote,
+                update_conflicts=True,
+                unique_fields=['dni'],
+                update_fields=['telefono'],
+            )
+        if resto:
+            Cliente.objects.bulk_create(resto, batch_size=self.tamano_lote, ignore_conflicts=True)
+
+        insertados = set()
+        for grupo in agrupar(pks_con_telefono + pks_resto, 500):
+            insertados.update(Cliente.objects.filter(pk__in=grupo).values_list('pk', flat=True))
+        completados = sum(1 for pk in pks_con_telefono if pk not in insertados)
+        descartados = sum(1 for pk in pks_resto if pk not in insertados)
+        return len(insertados), completados, descartados
+
+    def importar(self, filas_normalizadas, al_terminar_lote=None):
+        for lote in agrupar(filas_normalizadas, self.tamano_lote):
+            self.procesar_lote(lote)
+            if al_terminar_lote:
+                al_terminar_lote(self)
+        return self
+
+
+# ==============================
+# IMPORTACIÓN PARALELA
+# ==============================
+def clave_particion(fila):
+    """La misma clave que `clave_nombre`: las variantes con/sin tildes caen en la misma partición"""
+    return ' '.join(clave_nombre(fila))
+
+
+def particionar(filas, particiones, directorio):
+    """
+    Reparte las filas crudas en `particiones` archivos JSONL según crc32 de su
+    clave (estable entre procesos, a diferencia de `hash()`). Devuelve las rutas.
+    """
+    rutas = [os.path.join(directorio, f'particion_{i}.jsonl') for i in range(particiones)]
+    archivos = [open(ruta, 'w', encoding='utf-8') for ruta in rutas]
+    try:
+        for fila in filas:
+            indice = zlib.crc32(clave_particion(fila).encode('utf-8')) % particiones
+            archivos[indice].write(json.dumps(fila, ensure_ascii=False) + '\n')
+    finally:
+        for archivo in archivos:
+            archivo.close()
+    return rutas
+
+
+def procesar_particion(ruta):
+    """
+    Trabajo de cada proceso del pool: normaliza y deduplica una partición (por
+    nombre plegado y DNI) sin tocar la base de datos. Escribe las filas válidas
+    en `<ruta>.out` y devuelve (ruta_salida, filas_leidas, filas_descartadas).
+    """
+    ruta_salida = f'{ruta}.out'
+    leidas = descartadas = 0
+    nombres, dnis = set(), set()
+    with open(ruta_salida, 'w', encoding='utf-8') as salida:
+        for fila in _leer_jsonl(ruta):
+            leidas += 1
+            normalizada = normalizar_fila(fila)
+            if normalizada is None:
+                descartadas += 1
+                continue
+            clave = clave_nombre(normalizada)
+            if clave in nombres or (normalizada['dni'] and normalizada['dni'] in dnis):
+                descartadas += 1
+                continue
+            nombres.add(clave)
+            if normalizada['dni']:
+                dnis.add(normalizada['dni'])
+            salida.write(json.dumps(normalizada, ensure_ascii=False) + '\n')
+    return ruta_salida, leidas, descartadas
+
+
+def _inicializar_worker():
+    # Con el método "spawn" (macOS/Windows) el proceso hijo no hereda Django configurado
+    import django
+    django.setup()
+
+
+def importar_en_paralelo(filas, workers, importador, al_terminar_lote=None):
+    """
+    Importa con `workers` procesos de normalización y un único escritor (este
+    proceso). Las particiones se escriben a medida que los workers terminan, así
+    que la escritura se solapa con el procesamiento de las restantes.
+    """
+    with tempfile.TemporaryDirectory(prefix='importar_clientes_') as directorio:
+        rutas = particionar(filas, workers, directorio)
+
+        # Los procesos hijos no deben heredar conexiones abiertas a la base de datos
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as pool:
+            pendientes = [pool.submit(procesar_particion, ruta) for ruta in rutas]
+            for futuro in as_completed(pendientes):
+                ruta_salida, leidas, descartadas = futuro.result()
+                # Las filas descartadas en el worker se cuentan como leídas y omitidas
+                importador.leidas += descartadas
+                importador.omitidos += descartadas
+                importador.importar(_leer_jsonl(ruta_salida), al_terminar_lote=al_terminar_lote)
+    return importador
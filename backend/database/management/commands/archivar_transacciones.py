@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from database.archivo import archivar
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve las transacciones de los años cerrados (hasta --hasta-anio inclusive) '
+        'del libro activo a la tabla de archivo, conservando sus ids.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hasta-anio',
+            type=int,
+            required=True,
+            help='Último año a archivar (debe ser anterior al año en curso)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa cuántas transacciones se moverían por año',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Transacciones movidas por transacción de base de datos (por defecto 5000)',
+        )
+
+    def handle(self, *args, **options):
+        hasta_anio = options['hasta_anio']
+        if hasta_anio >= timezone.localdate().year:
+            raise CommandError('Solo se pueden archivar años cerrados')
+
+        inicio = time.monotonic()
+        por_anio = archivar(hasta_anio, aplicar=not options['dry_run'], tamano_lote=options['batch_size'])
+
+        for anio, cantidad in sorted(por_anio.items()):
+            self.stdout.write(f'   {anio}: {cantidad} transacciones')
+
+        total = sum(por_anio.values())
+        if not total:
+            self.stdout.write(self.style.SUCCESS(f'✅ No hay transacciones hasta {hasta_anio} en el libro activo'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{total} transacciones se archivarían (sin mover, --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'📦 {total} transacciones archivadas'))
+        self.stdout.write(f'⏱️  {time.monotonic() - inicio:.2f} s')
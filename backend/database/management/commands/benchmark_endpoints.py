@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from innova_inversiones.benchmark import ESCENARIOS, cargar, comparar, ejecutar, guardar, ruta_por_defecto
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95/p99), consultas SQL, bytes y memoria pico de los endpoints '
+        'principales y guarda el resultado en JSON para comparar entre commits. Funciona '
+        'sin red contra SQLite o PostgreSQL; conviene cargar antes generar_datos_sinteticos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=50, help='Peticiones medidas por escenario')
+        parser.add_argument('--calentamiento', type=int, default=5, help='Peticiones previas sin medir')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla para elegir lotes y búsquedas')
+        parser.add_argument(
+            '--escenario',
+            action='append',
+            choices=[escenario.nombre for escenario in ESCENARIOS],
+            help='Ejecuta solo este escenario (se puede repetir)',
+        )
+        parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto backend/benchmarks/...)')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior para mostrar la variación')
+
+    def handle(self, *args, **options):
+        base = cargar(options['comparar']) if options['comparar'] else None
+
+        def mostrar(nombre, resumen):
+            self.stdout.write(
+                f"   {nombre:<26} p50 {resumen['p50_ms']:>9.2f} ms · p95 {resumen['p95_ms']:>9.2f} ms · "
+                f"p99 {resumen['p99_ms']:>9.2f} ms · {resumen['consultas_max']:>3} consultas · "
+                f"{resumen['memoria_pico_kb']:>8.1f} KB"
+            )
+
+        try:
+            informe = ejecutar(
+                iteraciones=options['iteraciones'],
+                calentamiento=options['calentamiento'],
+                semilla=options['semilla'],
+                solo=options['escenario'],
+                al_terminar_escenario=mostrar,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        ruta = guardar(informe, options['salida'] or ruta_por_defecto(informe))
+        filas = informe['filas']
+        self.stdout.write(
+            f"🗄️  {informe['entorno']['base_de_datos']}: {filas['lotes']} lotes, {filas['clientes']} clientes, "
+            f"{filas['transacciones']} transacciones"
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Resultados guardados en {ruta}'))
+
+        if base is None:
+            return
+        self.stdout.write(f"📊 Comparación con {base.get('commit') or options['comparar']}:")
+        for nombre, metrica, antes, despues, variacion in comparar(base, informe):
+            texto = f'   {nombre:<26} {metrica:<16} {antes:>10} → {despues:>10}'
+            if variacion is None:
+                self.stdout.write(texto)
+                continue
+            texto += f' ({variacion:+.1f} %)'
+            # Más del 10 % peor se resalta; por debajo suele ser ruido
+            if variacion > 10:
+                self.stdout.write(self.style.WARNING(texto))
+            elif variacion < -10:
+                self.stdout.write(self.style.SUCCESS(texto))
+            else:
+                self.stdout.write(texto)
@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from database.duplicados import UMBRAL, VENTANA, analizar_clientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Detecta clientes probablemente duplicados (tildes, orden de palabras, '
+        '"SIN APELLIDOS", mismo teléfono) y guarda los candidatos a fusión en la base de datos '
+        'para /api/admin/clientes/duplicados/. Pensado para ejecutarse cada noche.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--umbral',
+            type=float,
+            default=UMBRAL,
+            help=f'Puntaje mínimo (0 a 1) para listar un par (por defecto {UMBRAL})',
+        )
+        parser.add_argument(
+            '--ventana',
+            type=int,
+            default=VENTANA,
+            help=f'Vecinos comparados dentro de cada bloque (por defecto {VENTANA})',
+        )
+        parser.add_argument(
+            '--incluir-inactivos',
+            action='store_true',
+            help='Incluye clientes desactivados',
+        )
+        parser.add_argument(
+            '--json',
+            dest='salida_json',
+            help='Ruta donde escribir el resultado completo en JSON',
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=20,
+            help='Candidatos a mostrar en consola (por defecto 20)',
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['umbral'] <= 1:
+            raise CommandError('--umbral debe estar entre 0 y 1')
+        if options['ventana'] < 1:
+            raise CommandError('--ventana debe ser mayor que 0')
+
+        resultado = analizar_clientes(
+            umbral=options['umbral'],
+            ventana=options['ventana'],
+            incluir_inactivos=options['incluir_inactivos'],
+        )
+
+        if options['salida_json']:
+            with open(options['salida_json'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, ensure_ascii=False, indent=2, cls=DjangoJSONEncoder)
+
+        for candidato in resultado['candidatos'][:options['mostrar']]:
+            a, b = candidato['cliente_a'], candidato['cliente_b']
+            self.stdout.write(
+                f"{candidato['puntaje']:.2f}  {a['nombre']} {a['apellidos']}  ⇄  "
+                f"{b['nombre']} {b['apellidos']}  ({', '.join(candidato['motivos'])})"
+            )
+
+        estadisticas = resultado['estadisticas']
+        self.stdout.write(self.style.SUCCESS('\n' + '='*50))
+        self.stdout.write(self.style.SUCCESS(f"👥 Clientes analizados: {estadisticas['clientes']}"))
+        self.stdout.write(self.style.SUCCESS(f"🔍 Pares comparados: {estadisticas['pares_comparados']}"))
+        self.stdout.write(self.style.WARNING(f"⚠️  Candidatos a fusión: {estadisticas['candidatos']}"))
+        self.stdout.write(self.style.SUCCESS(f"⏱️  {estadisticas['segundos']:.2f} s"))
+        self.stdout.write(self.style.SUCCESS('='*50))
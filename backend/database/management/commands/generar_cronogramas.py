@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from database.amortizacion import regenerar_cronogramas
+from database.models import Credito
+from database.importacion import agrupar
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenera la tabla de cuotas (Cuota_Credito) de los créditos. Útil tras cargas '
+        'masivas con bulk_create, que no disparan la señal que genera el cronograma.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--faltantes',
+            action='store_true',
+            help='Solo los créditos que aún no tienen cronograma',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Créditos por transacción (por defecto 500)',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        creditos = Credito.objects.all()
+        if options['faltantes']:
+            creditos = creditos.filter(cronograma__isnull=True)
+
+        total_creditos = total_cuotas = 0
+        for lote in agrupar(creditos.iterator(chunk_size=options['batch_size']), options['batch_size']):
+            total_cuotas += regenerar_cronogramas(lote)
+            total_creditos += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total_creditos} créditos, {total_cuotas} cuotas generadas '
+            f'en {time.monotonic() - inicio:.2f} s'
+        ))
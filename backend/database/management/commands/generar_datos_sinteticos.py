@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from database.sinteticos import generar, limpiar
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un conjunto de datos sintéticos reproducible (manzanas, lotes, clientes, '
+        'relaciones, créditos y transacciones) para pruebas de carga y para el comando '
+        'benchmark_endpoints. Con la misma --semilla produce los mismos datos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manzanas', type=int, default=20, help='Manzanas nuevas (por defecto 20)')
+        parser.add_argument(
+            '--lotes-por-manzana', type=int, default=30, help='Lotes por manzana (por defecto 30)'
+        )
+        parser.add_argument('--clientes', type=int, default=2000, help='Clientes nuevos (por defecto 2000)')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla del generador (por defecto 1)')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, help='Filas por INSERT (por defecto 1000)'
+        )
+        parser.add_argument(
+            '--limpiar',
+            action='store_true',
+            help='Borra antes los datos sintéticos existentes',
+        )
+        parser.add_argument(
+            '--solo-limpiar',
+            action='store_true',
+            help='Solo borra los datos sintéticos existentes',
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Permite ejecutarlo con DEBUG=False',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError(
+                'DEBUG=False: esto podría ser producción. Usa --forzar si realmente quieres '
+                f'escribir datos sintéticos en "{connection.settings_dict["NAME"]}"'
+            )
+
+        if options['limpiar'] or options['solo_limpiar']:
+            borrados = limpiar()
+            self.stdout.write(self.style.WARNING(f'🧹 {borrados} filas sintéticas borradas'))
+            if options['solo_limpiar']:
+                return
+
+        informe = generar(
+            manzanas=options['manzanas'],
+            lotes_por_manzana=options['lotes_por_manzana'],
+            clientes=options['clientes'],
+            semilla=options['semilla'],
+            tamano_lote=options['batch_size'],
+        )
+
+        conteos = informe['conteos']
+        self.stdout.write(f"🗺️  {conteos['manzanas']} manzanas, {conteos['lotes']} lotes")
+        self.stdout.write(f"👥 {conteos['clientes']} clientes, {conteos['relaciones']} relaciones")
+        self.stdout.write(
+            f"💳 {conteos['creditos']} créditos, {conteos['cuotas']} cuotas de cronograma, "
+            f"{conteos['transacciones']} transacciones"
+        )
+        tiempos = informe['tiempos']
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Datos sintéticos generados en {connection.vendor} (semilla {options["semilla"]})'
+        ))
+        self.stdout.write(
+            f"⏱️  preparación {tiempos['preparacion']:.2f} s · inserción {tiempos['insercion']:.2f} s · "
+            f"derivados {tiempos['derivados']:.2f} s"
+        )
@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from database.morosidad import recalcular_morosidad
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula meses_deuda, estado_financiero_actual y monto_cuota de los clientes '
+        'a partir de sus créditos (cuotas vencidas frente a pagadas) y guarda solo las '
+        'filas que cambian: un UPDATE por grupo de clientes con los mismos valores nuevos '
+        'y un bulk_update para el resto.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha de corte YYYY-MM-DD (por defecto, hoy)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa los cambios, sin guardarlos',
+        )
+        parser.add_argument(
+            '--incluir-conciliados',
+            action='store_true',
+            help='Recalcula también a los clientes marcados como "conciliado"',
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=50,
+            help='Cantidad máxima de cambios a listar (por defecto 50)',
+        )
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('--fecha debe tener el formato YYYY-MM-DD')
+
+        informe = recalcular_morosidad(
+            fecha=fecha,
+            aplicar=not options['dry_run'],
+            incluir_conciliados=options['incluir_conciliados'],
+        )
+
+        for cliente_id, nombre, campo, antes, despues in informe['cambios'][:options['mostrar']]:
+            self.stdout.write(f'   {nombre} ({cliente_id}) {campo}: {antes} → {despues}')
+        restantes = len(informe['cambios']) - options['mostrar']
+        if restantes > 0:
+            self.stdout.write(f'   ... y {restantes} cambios más')
+
+        self.stdout.write(f"📅 Fecha de corte: {informe['fecha']}")
+        self.stdout.write(f"👥 Clientes con crédito: {informe['clientes_con_credito']}")
+        self.stdout.write(f"⚠️  Deudores: {informe['deudores']}")
+        if informe['conciliados_omitidos']:
+            self.stdout.write(f"⏭️  Conciliados omitidos: {informe['conciliados_omitidos']}")
+
+        actualizados = informe['clientes_actualizados']
+        if not actualizados:
+            self.stdout.write(self.style.SUCCESS('✅ La morosidad de todos los clientes está al día'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{actualizados} clientes cambiarían (sin guardar, --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🔄 {actualizados} clientes actualizados'))
+
+        tiempos = informe['tiempos']
+        self.stdout.write(
+            f"⏱️  cálculo {tiempos['calculo']:.2f} s · comparación {tiempos['comparacion']:.2f} s · "
+            f"escritura {tiempos['escritura']:.2f} s"
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from database.cuotas import reconciliar_cuotas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula num_cuotas_pagadas de todos los créditos con una consulta agrupada '
+        'sobre las transacciones CUOTA y corrige solo los contadores desfasados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa los créditos desfasados, sin corregirlos',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        diferencias = reconciliar_cuotas(aplicar=not options['dry_run'])
+
+        for credito_id, guardado, correcto in diferencias:
+            self.stdout.write(self.style.WARNING(f'⚠️  Crédito {credito_id}: guardado {guardado}, correcto {correcto}'))
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Todos los contadores de cuotas son correctos'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(diferencias)} créditos desfasados (sin corregir, --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🔄 {len(diferencias)} créditos corregidos'))
+        self.stdout.write(f'⏱️  {time.monotonic() - inicio:.2f} s')
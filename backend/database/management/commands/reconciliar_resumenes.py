@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from database.resumenes import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula desde cero los resúmenes del dashboard (lotes por estado, cartera '
+        'de créditos y morosidad) y corrige las diferencias con los valores '
+        'mantenidos incrementalmente. Pensado para ejecutarse de forma periódica.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa las diferencias, sin corregirlas',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        diferencias = reconciliar(aplicar=not options['dry_run'])
+
+        for modelo, clave, campo, actual, esperado in diferencias:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {modelo}[{clave}].{campo}: guardado {actual}, correcto {esperado}')
+            )
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Los resúmenes coinciden con las tablas de origen'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(diferencias)} diferencias (sin corregir, --dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🔄 {len(diferencias)} diferencias corregidas'))
+        self.stdout.write(f'⏱️  {time.monotonic() - inicio:.2f} s')
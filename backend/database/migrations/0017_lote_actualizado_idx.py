@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0016_rename_montos_pendientes_cliente_meses_deuda_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(fields=['actualizado_en', 'id'], name='lote_actualizado_idx'),
+        ),
+    ]
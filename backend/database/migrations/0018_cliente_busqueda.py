@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:30
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def plegar(texto):
+    """Copia congelada de database.busqueda.plegar tal como era en esta migración"""
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    sin_marcas = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_marcas.lower().split())
+
+
+def construir_documento(cliente, relaciones=()):
+    """Copia congelada de database.busqueda.construir_documento tal como era en esta migración"""
+    partes = [cliente.nombre, cliente.apellidos, cliente.dni, cliente.email, cliente.telefono]
+    for relacion in relaciones:
+        partes.extend([
+            relacion.lote.codigo,
+            relacion.lote.manzana,
+            relacion.lote.lote_numero,
+            relacion.tipo_relacion,
+        ])
+    return plegar(' '.join(str(parte) for parte in partes if parte))
+
+
+def poblar_busqueda(apps, schema_editor):
+    Cliente = apps.get_model('database', 'Cliente')
+    relacion_cliente_lote = apps.get_model('database', 'relacion_cliente_lote')
+
+    relaciones = {}
+    for relacion in relacion_cliente_lote.objects.select_related('lote').iterator(chunk_size=2000):
+        relaciones.setdefault(relacion.cliente_id, []).append(relacion)
+
+    clientes = []
+    for cliente in Cliente.objects.iterator(chunk_size=2000):
+        cliente.busqueda = construir_documento(cliente, relaciones.get(cliente.id, ()))
+        clientes.append(cliente)
+    Cliente.objects.bulk_update(clientes, ['busqueda'], batch_size=500)
+
+
+def crear_indice_trigram(apps, schema_editor):
+    # Solo PostgreSQL: en SQLite la búsqueda usa LIKE sobre la columna sin índice
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS cliente_busqueda_trgm '
+        'ON database_cliente USING gin (busqueda gin_trgm_ops)'
+    )
+
+
+def eliminar_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS cliente_busqueda_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0017_lote_actualizado_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigram, eliminar_indice_trigram),
+    ]
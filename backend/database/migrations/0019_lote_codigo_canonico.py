@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:27
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def normalizar_codigo(codigo):
+    """Copia congelada de database.codigos.normalizar_codigo tal como era en esta migración"""
+    return str(codigo or '').strip().lower()
+
+
+def canonizar_codigos(apps, schema_editor):
+    Lote = apps.get_model('database', 'Lote')
+
+    lotes = list(Lote.objects.only('id', 'codigo'))
+    por_codigo = {}
+    for lote in lotes:
+        por_codigo.setdefault(normalizar_codigo(lote.codigo), []).append(lote.codigo)
+    repetidos = {codigo: originales for codigo, originales in por_codigo.items() if len(originales) > 1}
+    if repetidos:
+        raise RuntimeError(
+            f'Códigos de lote que solo difieren en mayúsculas/espacios, corríjalos antes de migrar: {repetidos}'
+        )
+
+    cambiados = []
+    for lote in lotes:
+        canonico = normalizar_codigo(lote.codigo)
+        if lote.codigo != canonico:
+            lote.codigo = canonico
+            cambiados.append(lote)
+    Lote.objects.bulk_update(cambiados, ['codigo'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0018_cliente_busqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonizar_codigos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lote',
+            constraint=models.CheckConstraint(condition=models.Q(('codigo', django.db.models.functions.text.Lower('codigo'))), name='lote_codigo_canonico'),
+        ),
+    ]
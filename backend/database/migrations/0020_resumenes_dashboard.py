@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:29
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def poblar_resumenes(apps, schema_editor):
+    """
+    Copia congelada del recálculo de database.resumenes tal como era en esta
+    migración: las tablas de resumen se acaban de crear vacías, así que basta
+    con insertar los valores agrupados.
+    """
+    Lote = apps.get_model('database', 'Lote')
+    Credito = apps.get_model('database', 'Credito')
+    Transaccion = apps.get_model('database', 'Transaccion')
+    Cliente = apps.get_model('database', 'Cliente')
+    Resumen_Estado_Lote = apps.get_model('database', 'Resumen_Estado_Lote')
+    Resumen_Cartera = apps.get_model('database', 'Resumen_Cartera')
+    Resumen_Morosidad = apps.get_model('database', 'Resumen_Morosidad')
+    cero = Value(Decimal('0'))
+
+    Resumen_Estado_Lote.objects.bulk_create([
+        Resumen_Estado_Lote(
+            estado_id=fila['estado_id'],
+            cantidad=fila['cantidad'],
+            valor_inventario=fila['valor_inventario'],
+            area_total=fila['area_total'],
+        )
+        for fila in Lote.objects.filter(estado__isnull=False).order_by().values('estado_id').annotate(
+            cantidad=Count('id'),
+            valor_inventario=Coalesce(Sum('precio'), cero),
+            area_total=Coalesce(Sum('area_lote'), cero),
+        )
+    ])
+
+    creditos = Credito.objects.aggregate(
+        creditos=Count('id'), monto_creditos=Coalesce(Sum('monto_total'), cero)
+    )
+    cobrado = Transaccion.objects.filter(
+        credito__isnull=False, tipo__in=('CUOTA', 'AMORTIZACION')
+    ).aggregate(cobrado=Coalesce(Sum('monto'), cero))['cobrado']
+    Resumen_Cartera.objects.create(id=1, cobrado=cobrado, **creditos)
+
+    Resumen_Morosidad.objects.bulk_create([
+        Resumen_Morosidad(
+            meses_deuda=fila['meses_deuda'],
+            clientes=fila['clientes'],
+            monto_cuotas=fila['monto_cuotas'],
+        )
+        for fila in Cliente.objects.filter(meses_deuda__gt=0).order_by().values('meses_deuda').annotate(
+            clientes=Count('id'),
+            monto_cuotas=Coalesce(Sum('monto_cuota'), cero),
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0019_lote_codigo_canonico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resumen_Cartera',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('creditos', models.IntegerField(default=0)),
+                ('monto_creditos', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('cobrado', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Resumen_Estado_Lote',
+            fields=[
+                ('estado', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='database.estado_lote')),
+                ('cantidad', models.IntegerField(default=0)),
+                ('valor_inventario', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('area_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Resumen_Morosidad',
+            fields=[
+                ('meses_deuda', models.IntegerField(primary_key=True, serialize=False)),
+                ('clientes', models.IntegerField(default=0)),
+                ('monto_cuotas', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
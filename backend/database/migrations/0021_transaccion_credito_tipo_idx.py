@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0020_resumenes_dashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['credito', 'tipo'], name='transaccion_credito_tipo_idx'),
+        ),
+    ]
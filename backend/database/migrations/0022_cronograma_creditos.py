@@ -0,0 +1,148 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:32
+
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Copia congelada de database.amortizacion tal como era en esta migración: los
+# cambios posteriores al motor no deben alterar lo que genera en una base nueva
+CENTIMO = Decimal('0.01')
+
+
+def redondear(valor):
+    return Decimal(str(valor)).quantize(CENTIMO, rounding=ROUND_HALF_UP)
+
+
+def fecha_local(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+    return valor
+
+
+def sumar_meses(fecha, meses):
+    indice = fecha.month - 1 + meses
+    anio, mes = fecha.year + indice // 12, indice % 12 + 1
+    return date(anio, mes, min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+@dataclass(frozen=True)
+class Condiciones:
+    capital: float
+    interes: float
+    cuotas: int
+    sistema: str
+    inicio: date
+
+    @property
+    def tasa(self):
+        return self.interes / 1200
+
+    @property
+    def cuota_fija(self):
+        n, P, r = self.cuotas, self.capital, self.tasa
+        if n <= 0:
+            return 0.0
+        if self.sistema == 'plano':
+            return P * (1 + self.interes / 100) / n
+        if self.sistema == 'frances' and r:
+            return P * r / (1 - (1 + r) ** -n)
+        return P / n + P * r
+
+    def saldo_capital(self, k):
+        n, P, r = self.cuotas, self.capital, self.tasa
+        k = max(0, min(k, n))
+        if n <= 0:
+            return 0.0
+        if self.sistema == 'frances' and r:
+            factor = (1 + r) ** k
+            return max(P * factor - self.cuota_fija * (factor - 1) / r, 0.0)
+        return P * (1 - k / n)
+
+    def suma_cuotas(self, k):
+        n, P, r = self.cuotas, self.capital, self.tasa
+        k = max(0, min(k, n))
+        if self.sistema == 'aleman':
+            return k * P / n + r * P * (k - k * (k - 1) / (2 * n)) if n else 0.0
+        return self.cuota_fija * k
+
+
+def cronograma(condiciones):
+    filas = []
+    n = condiciones.cuotas
+    saldo_anterior = redondear(condiciones.capital)
+    acumulado = Decimal('0.00')
+    for k in range(1, n + 1):
+        if k < n:
+            cuota = redondear(condiciones.suma_cuotas(k) - condiciones.suma_cuotas(k - 1))
+            saldo = redondear(condiciones.saldo_capital(k))
+        else:
+            cuota = redondear(condiciones.suma_cuotas(n)) - acumulado
+            saldo = Decimal('0.00')
+        acumulado += cuota
+        capital = saldo_anterior - saldo
+        filas.append({
+            'numero': k,
+            'fecha_vencimiento': sumar_meses(condiciones.inicio, k),
+            'cuota': cuota,
+            'capital': capital,
+            'interes': cuota - capital,
+            'saldo': saldo,
+        })
+        saldo_anterior = saldo
+    return filas
+
+
+def generar_cronogramas(apps, schema_editor):
+    Credito = apps.get_model('database', 'Credito')
+    Cuota_Credito = apps.get_model('database', 'Cuota_Credito')
+
+    filas = []
+    for credito in Credito.objects.iterator(chunk_size=1000):
+        condiciones = Condiciones(
+            capital=float(credito.monto_base),
+            interes=float(credito.interes or 0),
+            cuotas=int(credito.num_cuotas_totales),
+            sistema=credito.sistema_amortizacion or 'plano',
+            inicio=fecha_local(credito.fecha_inicio),
+        )
+        filas.extend(Cuota_Credito(credito_id=credito.pk, **cuota) for cuota in cronograma(condiciones))
+    Cuota_Credito.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0021_transaccion_credito_tipo_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credito',
+            name='sistema_amortizacion',
+            field=models.CharField(choices=[('plano', 'Plano'), ('frances', 'Francés'), ('aleman', 'Alemán')], default='plano', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='Cuota_Credito',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('numero', models.PositiveIntegerField()),
+                ('fecha_vencimiento', models.DateField()),
+                ('cuota', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('capital', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('interes', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('credito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cronograma', to='database.credito')),
+            ],
+            options={
+                'ordering': ['credito', 'numero'],
+                'indexes': [models.Index(fields=['fecha_vencimiento'], name='cuota_credito_vencimiento_idx')],
+                'constraints': [models.UniqueConstraint(fields=('credito', 'numero'), name='cuota_credito_numero_unico')],
+            },
+        ),
+        migrations.RunPython(generar_cronogramas, migrations.RunPython.noop),
+    ]
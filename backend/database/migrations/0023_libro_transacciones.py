@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def completar_fechas(apps, schema_editor):
+    """Las transacciones sin fecha toman el inicio de su crédito o, sin crédito, la fecha actual"""
+    Transaccion = apps.get_model('database', 'Transaccion')
+    Credito = apps.get_model('database', 'Credito')
+
+    Transaccion.objects.filter(fecha__isnull=True, credito__isnull=False).update(
+        fecha=Subquery(Credito.objects.filter(pk=OuterRef('credito_id')).values('fecha_inicio')[:1])
+    )
+    Transaccion.objects.filter(fecha__isnull=True).update(fecha=django.utils.timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0022_cronograma_creditos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transaccion_Archivada',
+            fields=[
+                ('tipo', models.CharField(blank=True, choices=[('RESERVA', 'Reserva'), ('VENTA', 'Venta'), ('CUOTA', 'Cuota'), ('AMORTIZACION', 'Amortización')], max_length=12, null=True)),
+                ('monto', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('metodo_pago', models.CharField(blank=True, choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia'), ('tarjeta_debito', 'Tarjeta Debito'), ('tarjeta_credito', 'Tarjeta Credito')], max_length=20, null=True)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(completar_fechas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaccion',
+            name='fecha',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['-fecha', '-id'], name='transaccion_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['cliente', '-fecha', '-id'], name='transaccion_cliente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['lote', '-fecha', '-id'], name='transaccion_lote_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion',
+            index=models.Index(fields=['credito', '-fecha', '-id'], name='transaccion_credito_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='transaccion_archivada',
+            name='cliente',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='database.cliente'),
+        ),
+        migrations.AddField(
+            model_name='transaccion_archivada',
+            name='credito',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='database.credito'),
+        ),
+        migrations.AddField(
+            model_name='transaccion_archivada',
+            name='lote',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='database.lote'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion_archivada',
+            index=models.Index(fields=['-fecha', '-id'], name='transaccion_arch_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion_archivada',
+            index=models.Index(fields=['cliente', '-fecha', '-id'], name='transaccion_arch_cliente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaccion_archivada',
+            index=models.Index(fields=['credito', 'tipo'], name='transaccion_arch_credito_idx'),
+        ),
+    ]
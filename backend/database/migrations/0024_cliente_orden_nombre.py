@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0023_libro_transacciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['apellidos', 'nombre', 'id'], name='cliente_orden_nombre_idx'),
+        ),
+    ]
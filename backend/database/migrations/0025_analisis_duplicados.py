@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:17
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0024_cliente_orden_nombre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Analisis_Duplicados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('umbral', models.FloatField()),
+                ('ventana', models.IntegerField()),
+                ('incluir_inactivos', models.BooleanField(default=False)),
+                ('estadisticas', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('candidatos', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+        ),
+    ]
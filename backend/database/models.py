@@ -1,8 +1,34 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 import uuid
 
+from .codigos import normalizar_codigo
+from .amortizacion import condiciones_de, redondear
+
+class ConValoresOriginales:
+    """
+    Recuerda los valores leídos de la base de datos para los campos de
+    `CAMPOS_ORIGINALES` (attnames), de modo que los resúmenes del dashboard
+    (ver database.resumenes) se ajusten por diferencia sin releer la fila.
+    """
+    CAMPOS_ORIGINALES = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Los campos diferidos (.only/.defer) no se leen para no disparar consultas
+        instancia._originales = {
+            campo: instancia.__dict__[campo]
+            for campo in cls.CAMPOS_ORIGINALES
+            if campo in instancia.__dict__
+        }
+        return instancia
+
+
 # ==============================
 # TABLAS DE CATÁLOGO
 # ==============================
@@ -47,7 +73,9 @@ class Usuario_Perfil(models.Model):
         return self.user.username
 
 
-class Cliente(models.Model):
+class Cliente(ConValoresOriginales, models.Model):
+    CAMPOS_ORIGINALES = ('meses_deuda', 'monto_cuota')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     usuario = models.OneToOneField(Usuario_Perfil, on_delete=models.CASCADE, related_name='cliente', null=True, blank=True)
     nombre = models.CharField(max_length=100)
@@ -67,15 +95,26 @@ class Cliente(models.Model):
     meses_deuda = models.IntegerField(default=0 , null=True, blank=True)
     monto_cuota = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     fecha_conciliacion = models.DateField(null=True, blank=True)
+    # Documento de búsqueda plegado (sin tildes, minúsculas); ver database/busqueda.py
+    busqueda = models.TextField(blank=True, default='', editable=False)
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Orden y paginación por cursor de ListarClientes
+            models.Index(fields=['apellidos', 'nombre', 'id'], name='cliente_orden_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre} {self.apellidos}"
 
 
 
-class Lote(models.Model):
+class Lote(ConValoresOriginales, models.Model):
+    # codigo/manzana/lote_numero: el documento de búsqueda de sus clientes (database.signals)
+    CAMPOS_ORIGINALES = ('estado_id', 'precio', 'area_lote', 'codigo', 'manzana', 'lote_numero')
+
     id = models.AutoField(primary_key=True)
     codigo = models.CharField(max_length=20, unique=True)
     manzana = models.CharField(max_length=5)
@@ -90,6 +129,20 @@ class Lote(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Feed incremental del mapa (apps.maps.cambios)
+            models.Index(fields=['actualizado_en', 'id'], name='lote_actualizado_idx'),
+        ]
+        constraints = [
+            # El código se guarda en forma canónica (ver database.codigos)
+            models.CheckConstraint(condition=models.Q(codigo=Lower('codigo')), name='lote_codigo_canonico'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.codigo = normalizar_codigo(self.codigo)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.codigo} - {self.manzana}/{self.lote_numero}"
 
@@ -129,7 +182,11 @@ class Solicitud(models.Model):
 
 
 
-class Credito(models.Model):
+class Credito(ConValoresOriginales, models.Model):
+    CAMPOS_ORIGINALES = (
+        'monto_total', 'monto_base', 'interes', 'num_cuotas_totales', 'fecha_inicio', 'sistema_amortizacion',
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
     lote = models.ForeignKey(Lote, on_delete=models.CASCADE)
@@ -145,21 +202,35 @@ class Credito(models.Model):
         EN_PROCESO = "en_proceso", "En Proceso"
         CANCELADO = "cancelado", "Cancelado"
     estado_credito = models.CharField(max_length=20, choices=EstadoCredito.choices)
+    # Ver database.amortizacion: en "plano" `interes` es el % total; en francés/alemán es la tasa anual
+    class SistemaAmortizacion(models.TextChoices):
+        PLANO = "plano", "Plano"
+        FRANCES = "frances", "Francés"
+        ALEMAN = "aleman", "Alemán"
+    sistema_amortizacion = models.CharField(
+        max_length=10, choices=SistemaAmortizacion.choices, default=SistemaAmortizacion.PLANO
+    )
     
-    # Relación inversa para acceder a las transacciones
+    # Relación inversa para acceder a las transacciones (admite prefetch_related('transaccion_set'))
     @property
     def transacciones(self):
-        return Transaccion.objects.filter(credito=self)
+        return self.transaccion_set.all()
 
     def __str__(self):
         return f"{self.cliente.nombre} - {self.lote.codigo}"
     
     def contar_cuotas_pagadas(self):
-        """Cuenta las transacciones de tipo CUOTA registradas para este crédito"""
-        return self.transacciones.filter(tipo=Transaccion.Tipo.CUOTA).count()
+        """Cuenta las transacciones de tipo CUOTA registradas para este crédito, también las archivadas"""
+        return (
+            self.transacciones.filter(tipo=Transaccion.Tipo.CUOTA).count()
+            + self.transaccion_archivada_set.filter(tipo=Transaccion.Tipo.CUOTA).count()
+        )
     
     def actualizar_cuotas_pagadas(self):
-        """Actualiza el contador de cuotas pagadas basado en las transacciones reales"""
+        """
+        Recalcula el contador con un COUNT. El contador se mantiene solo con las
+        señales de Transaccion (database.cuotas); esto queda para correcciones puntuales
+        """
         self.num_cuotas_pagadas = self.contar_cuotas_pagadas()
     
     @property
@@ -180,14 +251,27 @@ class Credito(models.Model):
         return round((self.num_cuotas_pagadas / self.num_cuotas_totales) * 100, 2)
     
     def save(self, *args, **kwargs):
-        self.monto_total = round(self.monto_base +(self.monto_base * self.interes /100),2)
-        # Actualizar el contador de cuotas pagadas antes de guardar
-        self.actualizar_cuotas_pagadas()
+        if self.sistema_amortizacion == self.SistemaAmortizacion.PLANO:
+            self.monto_total = round(self.monto_base +(self.monto_base * self.interes /100),2)
+        else:
+            self.monto_total = redondear(condiciones_de(self).total)
+        # num_cuotas_pagadas se incrementa con F() al registrar cuotas: un save() completo
+        # no debe sobrescribirlo con el valor (posiblemente viejo) que tiene la instancia
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'num_cuotas_pagadas'
+            ]
         super().save(*args, **kwargs)
 
 
-class Transaccion(models.Model):
-    id = models.AutoField(primary_key=True)
+class TransaccionBase(ConValoresOriginales, models.Model):
+    """
+    Columnas comunes del libro de transacciones activo (`Transaccion`) y de
+    su archivo (`Transaccion_Archivada`), ver database.archivo.
+    """
+    CAMPOS_ORIGINALES = ('credito_id', 'tipo', 'monto')
+
     credito = models.ForeignKey(Credito, on_delete=models.CASCADE, null=True, blank=True)
     class Tipo(models.TextChoices):
         RESERVA = "RESERVA", "Reserva"
@@ -208,12 +292,68 @@ class Transaccion(models.Model):
     )
     lote = models.ForeignKey(Lote, on_delete=models.CASCADE)
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
-    fecha = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    # Clave de orden del libro junto con el id: no nula para la paginación (fecha, id)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
 
     def __str__(self):
         return f"{self.tipo} - {self.lote.codigo}"
 
 
+class Transaccion(TransaccionBase):
+    id = models.AutoField(primary_key=True)
+
+    class Meta:
+        indexes = [
+            # Conteo de cuotas por crédito (database.cuotas)
+            models.Index(fields=['credito', 'tipo'], name='transaccion_credito_tipo_idx'),
+            # Libro paginado por (fecha, id), con y sin filtro por cliente, lote o crédito
+            models.Index(fields=['-fecha', '-id'], name='transaccion_fecha_id_idx'),
+            models.Index(fields=['cliente', '-fecha', '-id'], name='transaccion_cliente_fecha_idx'),
+            models.Index(fields=['lote', '-fecha', '-id'], name='transaccion_lote_fecha_idx'),
+            models.Index(fields=['credito', '-fecha', '-id'], name='transaccion_credito_fecha_idx'),
+        ]
+
+
+class Transaccion_Archivada(TransaccionBase):
+    """Transacciones de años cerrados movidas fuera del libro activo; conservan su id"""
+    id = models.IntegerField(primary_key=True)
+    archivada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-fecha', '-id'], name='transaccion_arch_fecha_idx'),
+            models.Index(fields=['cliente', '-fecha', '-id'], name='transaccion_arch_cliente_idx'),
+            models.Index(fields=['credito', 'tipo'], name='transaccion_arch_credito_idx'),
+        ]
+
+
+
+class Cuota_Credito(models.Model):
+    """Cronograma de pagos de un crédito, generado por database.amortizacion"""
+    id = models.AutoField(primary_key=True)
+    credito = models.ForeignKey(Credito, on_delete=models.CASCADE, related_name="cronograma")
+    numero = models.PositiveIntegerField()
+    fecha_vencimiento = models.DateField()
+    cuota = models.DecimalField(max_digits=12, decimal_places=2)
+    capital = models.DecimalField(max_digits=12, decimal_places=2)
+    interes = models.DecimalField(max_digits=12, decimal_places=2)
+    saldo = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ['credito', 'numero']
+        constraints = [
+            models.UniqueConstraint(fields=['credito', 'numero'], name='cuota_credito_numero_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha_vencimiento'], name='cuota_credito_vencimiento_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cuota {self.numero} - {self.fecha_vencimiento}"
+
 
 class Historial_Estado(models.Model):
     id = models.AutoField(primary_key=True)
@@ -226,3 +366,55 @@ class Historial_Estado(models.Model):
     def __str__(self):
         return f"{self.lote.codigo} -> {self.estado_nuevo.nombre}"
 
+
+
+
+# ==============================
+# RESÚMENES DEL DASHBOARD
+# ==============================
+# Se mantienen por diferencias desde database.resumenes y se pueden recalcular
+# por completo con `python manage.py reconciliar_resumenes`
+class Resumen_Estado_Lote(models.Model):
+    estado = models.OneToOneField(Estado_Lote, on_delete=models.CASCADE, primary_key=True, related_name="resumen")
+    cantidad = models.IntegerField(default=0)
+    valor_inventario = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    area_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.estado_id}: {self.cantidad} lotes"
+
+
+class Resumen_Cartera(models.Model):
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    creditos = models.IntegerField(default=0)
+    monto_creditos = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    cobrado = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    @property
+    def pendiente(self):
+        return self.monto_creditos - self.cobrado
+
+    def __str__(self):
+        return f"Cartera: {self.cobrado} / {self.monto_creditos}"
+
+
+class Resumen_Morosidad(models.Model):
+    meses_deuda = models.IntegerField(primary_key=True)
+    clientes = models.IntegerField(default=0)
+    monto_cuotas = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.meses_deuda} meses: {self.clientes} clientes"
+
+
+class Analisis_Duplicados(models.Model):
+    # Resultado de `detectar_duplicados_clientes` (database.duplicados); se sirve el último
+    generado_en = models.DateTimeField(auto_now_add=True, db_index=True)
+    umbral = models.FloatField()
+    ventana = models.IntegerField()
+    incluir_inactivos = models.BooleanField(default=False)
+    estadisticas = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    candidatos = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    def __str__(self):
+        return f"Duplicados {self.generado_en:%Y-%m-%d %H:%M} ({len(self.candidatos)} candidatos)"
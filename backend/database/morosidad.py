@@ -0,0 +1,145 @@
+"""
+Recalculo masivo de la morosidad de los clientes.
+
+`Cliente.meses_deuda`, `estado_financiero_actual` y `monto_cuota` se derivan
+de sus créditos no cancelados: cuotas vencidas a la fecha de corte (según el
+cronograma de `database.amortizacion`) menos `num_cuotas_pagadas`.
+
+    meses_deuda               mayor número de cuotas atrasadas entre sus créditos
+    estado_financiero_actual  "deudor" si meses_deuda > 0, si no "al dia"
+    monto_cuota               suma de las cuotas vigentes de sus créditos
+
+Todo se resuelve con una consulta de créditos, una de clientes y la escritura
+de solo las filas que cambian (ver `_guardar`). Los clientes "conciliado" se respetan
+salvo que se pida lo contrario, porque ese estado se asigna a mano.
+"""
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .amortizacion import Condiciones, estado as estado_credito, redondear
+from .resumenes import reconciliar
+
+CAMPOS = ['meses_deuda', 'estado_financiero_actual', 'monto_cuota']
+AL_DIA = 'al dia'
+DEUDOR = 'deudor'
+CONCILIADO = 'conciliado'
+
+
+def calcular_morosidad(fecha):
+    """Situación derivada por cliente: {cliente_id: {meses_deuda, estado_financiero_actual, monto_cuota}}"""
+    from .models import Credito
+
+    filas = (
+        Credito.objects.exclude(estado_credito=Credito.EstadoCredito.CANCELADO)
+        .order_by()
+        .values_list('cliente_id', 'monto_base', 'interes', 'num_cuotas_totales',
+                     'num_cuotas_pagadas', 'fecha_inicio', 'sistema_amortizacion')
+        .iterator(chunk_size=5000)
+    )
+
+    por_cliente = {}
+    for cliente_id, monto_base, interes, cuotas, pagadas, inicio, sistema in filas:
+        condiciones = Condiciones.desde(monto_base, interes, cuotas, inicio, sistema)
+        situacion = estado_credito(condiciones, pagadas, fecha)
+        acumulado = por_cliente.setdefault(cliente_id, {'meses_deuda': 0, 'monto_cuota': 0.0})
+        acumulado['meses_deuda'] = max(acumulado['meses_deuda'], situacion['cuotas_atrasadas'])
+        if situacion['cuotas_pagadas'] < situacion['cuotas_totales']:
+            acumulado['monto_cuota'] += situacion['cuota']
+
+    return {
+        cliente_id: {
+            'meses_deuda': valores['meses_deuda'],
+            'estado_financiero_actual': DEUDOR if valores['meses_deuda'] else AL_DIA,
+            'monto_cuota': redondear(valores['monto_cuota']),
+        }
+        for cliente_id, valores in por_cliente.items()
+    }
+
+
+def _guardar(clientes, tamano_lote):
+    """
+    Los clientes que comparten los mismos valores nuevos (p. ej. todos los "al
+    dia" con la misma cuota) se escriben con un UPDATE ... WHERE id IN (...) por
+    grupo; el resto con un único `bulk_update`, cuyo CASE WHEN por fila cuesta
+    bastante más en Django que un UPDATE agrupado.
+    """
+    from .models import Cliente
+
+    grupos = {}
+    for cliente in clientes:
+        grupos.setdefault(tuple(getattr(cliente, campo) for campo in CAMPOS), []).append(cliente)
+
+    sueltos = []
+    for valores, grupo in grupos.items():
+        if len(grupo) == 1:
+            sueltos.extend(grupo)
+            continue
+        ids = [cliente.pk for cliente in grupo]
+        for i in range(0, len(ids), tamano_lote):
+            Cliente.objects.filter(pk__in=ids[i:i + tamano_lote]).update(**dict(zip(CAMPOS, valores)))
+    if sueltos:
+        Cliente.objects.bulk_update(sueltos, CAMPOS, batch_size=tamano_lote)
+
+
+def recalcular_morosidad(fecha=None, aplicar=True, incluir_conciliados=False, tamano_lote=1000):
+    """
+    Devuelve un informe con los cambios (cliente, campo, antes, después) y los
+    tiempos de cada etapa. Con `aplicar=False` no escribe nada (dry-run).
+    """
+    from .models import Cliente, Credito
+
+    fecha = fecha or timezone.localdate()
+    tiempos = {}
+
+    inicio = time.monotonic()
+    esperados = calcular_morosidad(fecha)
+    tiempos['calculo'] = time.monotonic() - inicio
+
+    # Solo clientes con algún crédito (también cancelado); los demás se editan a mano
+    inicio = time.monotonic()
+    con_credito = Exists(Credito.objects.filter(cliente_id=OuterRef('pk')))
+    clientes = Cliente.objects.filter(con_credito).only('id', 'nombre', 'apellidos', 'fecha_conciliacion', *CAMPOS)
+
+    cambiados, cambios, omitidos = [], [], 0
+    # Con todos sus créditos cancelados el cliente queda al día
+    sin_creditos = {'meses_deuda': 0, 'estado_financiero_actual': AL_DIA, 'monto_cuota': Decimal('0.00')}
+    for cliente in clientes.iterator(chunk_size=tamano_lote):
+        if cliente.estado_financiero_actual == CONCILIADO and not incluir_conciliados:
+            omitidos += 1
+            continue
+        nuevo = esperados.get(cliente.id, sin_creditos)
+        diferencias = [
+            (campo, getattr(cliente, campo), valor)
+            for campo, valor in nuevo.items()
+            if getattr(cliente, campo) != valor
+        ]
+        if not diferencias:
+            continue
+        for campo, antes, despues in diferencias:
+            setattr(cliente, campo, despues)
+            cambios.append((cliente.id, f'{cliente.nombre} {cliente.apellidos}', campo, antes, despues))
+        cambiados.append(cliente)
+    tiempos['comparacion'] = time.monotonic() - inicio
+
+    inicio = time.monotonic()
+    if aplicar and cambiados:
+        with transaction.atomic():
+            _guardar(cambiados, tamano_lote)
+            # Ninguna de las dos escrituras dispara señales: el resumen se recalcula aquí
+            reconciliar(solo=('Resumen_Morosidad',))
+    tiempos['escritura'] = time.monotonic() - inicio
+
+    return {
+        'fecha': fecha,
+        'aplicado': aplicar,
+        'clientes_con_credito': len(esperados),
+        'clientes_actualizados': len(cambiados),
+        'conciliados_omitidos': omitidos,
+        'deudores': sum(1 for valores in esperados.values() if valores['meses_deuda']),
+        'cambios': cambios,
+        'tiempos': {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()},
+    }
@@ -0,0 +1,262 @@
+"""
+Resúmenes del dashboard mantenidos de forma incremental.
+
+Cada modelo que alimenta el dashboard aporta a una fila de resumen:
+
+    Lote         → Resumen_Estado_Lote[estado]   cantidad, valor_inventario, area_total
+    Credito      → Resumen_Cartera[1]            creditos, monto_creditos
+    Transaccion  → Resumen_Cartera[1]            cobrado (CUOTA/AMORTIZACION de un crédito,
+                                                 también las archivadas, ver database.archivo)
+    Cliente      → Resumen_Morosidad[meses]      clientes, monto_cuotas (meses_deuda > 0)
+
+Las señales de `database.signals` restan el aporte original (leído por
+`ConValoresOriginales`) y suman el nuevo con `UPDATE ... SET c = c + delta`,
+sin consultar las tablas de origen. Las escrituras masivas que no disparan
+señales (`bulk_update`, `update()`) llaman a `recalcular_lotes()` o a
+`reconciliar()`, que recalculan con consultas agrupadas.
+"""
+from decimal import Decimal
+
+from django.apps import apps as apps_global
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Estados que el plano muestra como "Vendido" (ver colorsAndLabels.ts)
+ESTADOS_VENDIDOS = (3, 4, 5)
+TIPOS_COBRO = ('CUOTA', 'AMORTIZACION')
+CARTERA_ID = 1
+CERO = Decimal('0')
+
+
+def _decimal(valor):
+    if valor in (None, ''):
+        return CERO
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor))
+
+
+# ==============================
+# APORTES POR MODELO
+# ==============================
+# Cada función recibe los valores (attname → valor) de una fila y devuelve
+# (modelo de resumen, clave primaria, deltas) o None si la fila no aporta.
+def aporte_lote(valores):
+    if valores.get('estado_id') is None:
+        return None
+    return ('Resumen_Estado_Lote', valores['estado_id'], {
+        'cantidad': 1,
+        'valor_inventario': _decimal(valores.get('precio')),
+        'area_total': _decimal(valores.get('area_lote')),
+    })
+
+
+def aporte_credito(valores):
+    return ('Resumen_Cartera', CARTERA_ID, {
+        'creditos': 1,
+        'monto_creditos': _decimal(valores.get('monto_total')),
+    })
+
+
+def aporte_transaccion(valores):
+    if valores.get('credito_id') is None or valores.get('tipo') not in TIPOS_COBRO:
+        return None
+    return ('Resumen_Cartera', CARTERA_ID, {'cobrado': _decimal(valores.get('monto'))})
+
+
+def aporte_cliente(valores):
+    meses = valores.get('meses_deuda') or 0
+    if meses <= 0:
+        return None
+    return ('Resumen_Morosidad', meses, {
+        'clientes': 1,
+        'monto_cuotas': _decimal(valores.get('monto_cuota')),
+    })
+
+
+APORTES = {
+    'Lote': aporte_lote,
+    'Credito': aporte_credito,
+    'Transaccion': aporte_transaccion,
+    'Transaccion_Archivada': aporte_transaccion,
+    'Cliente': aporte_cliente,
+}
+
+
+def _aplicar(aporte, signo):
+    if aporte is None:
+        return
+    nombre_modelo, clave, deltas = aporte
+    modelo = apps_global.get_model('database', nombre_modelo)
+    cambios = {campo: F(campo) + signo * delta for campo, delta in deltas.items()}
+    if not modelo.objects.filter(pk=clave).update(**cambios):
+        modelo.objects.get_or_create(pk=clave)
+        modelo.objects.filter(pk=clave).update(**cambios)
+
+
+def valores_actuales(instancia):
+    return {campo: getattr(instancia, campo) for campo in instancia.CAMPOS_ORIGINALES}
+
+
+def registrar_cambio(instancia, originales, actuales):
+    """
+    Ajusta los resúmenes por la diferencia entre `originales` (None si es un
+    alta) y `actuales` (None si es una baja).
+    """
+    calcular = APORTES[type(instancia).__name__]
+    anterior = calcular(originales) if originales is not None else None
+    nuevo = calcular(actuales) if actuales is not None else None
+    if anterior == nuevo:
+        return
+    with transaction.atomic():
+        _aplicar(anterior, -1)
+        _aplicar(nuevo, 1)
+
+
+# ==============================
+# RECÁLCULO COMPLETO
+# ==============================
+def _modelos_transaccion(apps):
+    """Libro activo y archivo; en migraciones anteriores al archivo solo existe el primero"""
+    modelos = [apps.get_model('database', 'Transaccion')]
+    try:
+        modelos.append(apps.get_model('database', 'Transaccion_Archivada'))
+    except LookupError:
+        pass
+    return modelos
+
+
+def _esperados(apps):
+    """Valores correctos de cada resumen calculados con consultas agrupadas"""
+    Lote = apps.get_model('database', 'Lote')
+    Credito = apps.get_model('database', 'Credito')
+    Cliente = apps.get_model('database', 'Cliente')
+    cero = Value(CERO)
+
+    lotes = {
+        fila['estado_id']: {
+            'cantidad': fila['cantidad'],
+            'valor_inventario': fila['valor_inventario'],
+            'area_total': fila['area_total'],
+        }
+        for fila in Lote.objects.order_by().values('estado_id').annotate(
+            cantidad=Count('id'),
+            valor_inventario=Coalesce(Sum('precio'), cero),
+            area_total=Coalesce(Sum('area_lote'), cero),
+        )
+    }
+
+    creditos = Credito.objects.aggregate(
+        creditos=Count('id'), monto_creditos=Coalesce(Sum('monto_total'), cero)
+    )
+    cobrado = CERO
+    for modelo in _modelos_transaccion(apps):
+        cobrado += modelo.objects.filter(
+            credito__isnull=False, tipo__in=TIPOS_COBRO
+        ).aggregate(cobrado=Coalesce(Sum('monto'), cero))['cobrado']
+    cartera = {CARTERA_ID: {**creditos, 'cobrado': cobrado}}
+
+    morosidad = {
+        fila['meses_deuda']: {'clientes': fila['clientes'], 'monto_cuotas': fila['monto_cuotas']}
+        for fila in Cliente.objects.filter(meses_deuda__gt=0).order_by().values('meses_deuda').annotate(
+            clientes=Count('id'),
+            monto_cuotas=Coalesce(Sum('monto_cuota'), cero),
+        )
+    }
+    return {
+        'Resumen_Estado_Lote': lotes,
+        'Resumen_Cartera': cartera,
+        'Resumen_Morosidad': morosidad,
+    }
+
+
+def _sincronizar(modelo, esperados, aplicar):
+    """Compara una tabla de resumen con sus valores esperados; devuelve las diferencias"""
+    campos = [f.name for f in modelo._meta.concrete_fields if not f.primary_key]
+    actuales = {fila.pk: fila for fila in modelo.objects.all()}
+    diferencias = []
+
+    for clave in set(actuales) | set(esperados):
+        esperado = esperados.get(clave, {campo: 0 for campo in campos})
+        fila = actuales.get(clave)
+        for campo in campos:
+            actual = getattr(fila, campo) if fila is not None else None
+            if actual is None or _decimal(actual) != _decimal(esperado[campo]):
+                diferencias.append((modelo.__name__, clave, campo, actual, esperado[campo]))
+
+    if aplicar and diferencias:
+        with transaction.atomic():
+            # Las claves sin filas de origen quedan en cero en lugar de borrarse
+            modelo.objects.bulk_create(
+                [modelo(pk=clave, **valores) for clave, valores in esperados.items()],
+                update_conflicts=True,
+                unique_fields=[modelo._meta.pk.name],
+                update_fields=campos,
+            )
+            modelo.objects.exclude(pk__in=list(esperados)).update(**{campo: 0 for campo in campos})
+    return diferencias
+
+
+def reconciliar(aplicar=True, apps=None, solo=None):
+    """
+    Recalcula los resúmenes desde las tablas de origen. Devuelve la lista de
+    diferencias (modelo, clave, campo, valor guardado, valor correcto).
+    `solo` limita el recálculo a algunos modelos de resumen.
+    """
+    apps = apps or apps_global
+    esperados = _esperados(apps)
+    diferencias = []
+    for nombre_modelo, valores in esperados.items():
+        if solo and nombre_modelo not in solo:
+            continue
+        modelo = apps.get_model('database', nombre_modelo)
+        diferencias.extend(_sincronizar(modelo, valores, aplicar))
+    return diferencias
+
+
+def recalcular_lotes():
+    """Para escrituras masivas de lotes: un GROUP BY sobre `Lote` (tabla pequeña)"""
+    return reconciliar(solo=('Resumen_Estado_Lote',))
+
+
+def obtener_resumen():
+    """Lectura del dashboard: tres tablas de pocas filas, sin tocar el historial"""
+    from .models import Resumen_Cartera, Resumen_Estado_Lote, Resumen_Morosidad
+
+    estados = list(Resumen_Estado_Lote.objects.select_related('estado').order_by('estado_id'))
+    cartera = Resumen_Cartera.objects.filter(pk=CARTERA_ID).first() or Resumen_Cartera(pk=CARTERA_ID)
+    morosidad = list(Resumen_Morosidad.objects.filter(clientes__gt=0).order_by('meses_deuda'))
+
+    return {
+        "lotes": {
+            "total": sum(r.cantidad for r in estados),
+            "valor_inventario": float(sum(
+                (r.valor_inventario for r in estados if r.estado_id not in ESTADOS_VENDIDOS), CERO
+            )),
+            "area_vendida": float(sum(
+                (r.area_total for r in estados if r.estado_id in ESTADOS_VENDIDOS), CERO
+            )),
+            "por_estado": [
+                {
+                    "estado": r.estado_id,
+                    "estado_nombre": r.estado.nombre,
+                    "cantidad": r.cantidad,
+                    "valor_inventario": float(r.valor_inventario),
+                    "area_total": float(r.area_total),
+                }
+                for r in estados
+            ],
+        },
+        "cartera": {
+            "creditos": cartera.creditos,
+            "monto_creditos": float(cartera.monto_creditos),
+            "cobrado": float(cartera.cobrado),
+            "pendiente": float(cartera.pendiente),
+        },
+        "morosidad": {
+            "deudores": sum(r.clientes for r in morosidad),
+            "por_meses": [
+                {"meses_deuda": r.meses_deuda, "clientes": r.clientes, "monto_cuotas": float(r.monto_cuotas)}
+                for r in morosidad
+            ],
+        },
+    }
@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Cliente, Credito, Lote, Transaccion, Transaccion_Archivada, relacion_cliente_lote
+from .busqueda import construir_documento, actualizar_documentos
+from .codigos import mapa_codigos, incrementar_version as invalidar_mapa_codigos
+from .resumenes import registrar_cambio, valores_actuales
+from .cuotas import registrar_cambio_cuota
+from .amortizacion import regenerar_cronogramas
+
+# Campos que forman parte del documento de búsqueda
+CAMPOS_DOCUMENTO_CLIENTE = {'nombre', 'apellidos', 'dni', 'email', 'telefono'}
+CAMPOS_DOCUMENTO_LOTE = {'codigo', 'manzana', 'lote_numero'}
+
+
+@receiver(pre_save, sender=Cliente)
+def preparar_documento_cliente(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Calcula el documento de búsqueda antes de un save() completo"""
+    if raw or update_fields is not None:
+        return
+    relaciones = () if instance._state.adding else instance.compras.select_related('lote')
+    instance.busqueda = construir_documento(instance, relaciones)
+
+
+@receiver(post_save, sender=Cliente)
+def actualizar_documento_cliente(sender, instance, update_fields=None, raw=False, **kwargs):
+    # save(update_fields=...) no persiste `busqueda`: se recalcula aparte
+    if raw or update_fields is None:
+        return
+    if CAMPOS_DOCUMENTO_CLIENTE & set(update_fields):
+        actualizar_documentos([instance.pk])
+
+
+@receiver(post_save, sender=relacion_cliente_lote)
+@receiver(post_delete, sender=relacion_cliente_lote)
+def actualizar_documento_relacion(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    actualizar_documentos([instance.cliente_id])
+
+
+@receiver(post_save, sender=Lote)
+def actualizar_documento_lote(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Si cambia el código, manzana o número del lote se actualizan sus clientes"""
+    if raw or created:
+        return
+    if update_fields is not None and not CAMPOS_DOCUMENTO_LOTE & set(update_fields):
+        return
+    # Un save() completo que no toca esos campos (p. ej. solo el precio) no cambia los documentos
+    originales = getattr(instance, '_originales', {})
+    if all(campo in originales and originales[campo] == getattr(instance, campo) for campo in CAMPOS_DOCUMENTO_LOTE):
+        return
+    cliente_ids = list(
+        relacion_cliente_lote.objects.filter(lote=instance).values_list('cliente_id', flat=True)
+    )
+    actualizar_documentos(cliente_ids)
+
+
+@receiver(post_save, sender=Lote)
+def actualizar_mapa_codigos(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Altas y cambios de código invalidan el mapa código → id de todos los procesos"""
+    if update_fields is not None and 'codigo' not in update_fields:
+        return
+    if not created and mapa_codigos.contiene(instance.codigo, instance.pk):
+        return
+    transaction.on_commit(invalidar_mapa_codigos)
+
+
+@receiver(post_delete, sender=Lote)
+def quitar_del_mapa_codigos(sender, instance, **kwargs):
+    transaction.on_commit(invalidar_mapa_codigos)
+
+
+# ==============================
+# CUOTAS PAGADAS DE CRÉDITOS
+# ==============================
+# Se conectan antes que los resúmenes: usan `_originales` antes de que
+# `actualizar_resumen` lo reemplace por los valores recién guardados
+@receiver(post_save, sender=Transaccion)
+def contar_cuota_guardada(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    originales = None if created else instance._originales
+    registrar_cambio_cuota(originales, valores_actuales(instance))
+
+
+@receiver(post_delete, sender=Transaccion)
+@receiver(post_delete, sender=Transaccion_Archivada)
+def descontar_cuota_eliminada(sender, instance, **kwargs):
+    registrar_cambio_cuota(valores_actuales(instance), None)
+
+
+# ==============================
+# CRONOGRAMA DE CRÉDITOS
+# ==============================
+CAMPOS_CRONOGRAMA = ('monto_base', 'interes', 'num_cuotas_totales', 'fecha_inicio', 'sistema_amortizacion')
+
+
+@receiver(post_save, sender=Credito)
+def regenerar_cronograma(sender, instance, created, raw=False, **kwargs):
+    """Regenera las cuotas del crédito si es nuevo o cambian sus condiciones"""
+    if raw:
+        return
+    originales = getattr(instance, '_originales', {})
+    if created or any(originales.get(campo) != getattr(instance, campo) for campo in CAMPOS_CRONOGRAMA):
+        regenerar_cronogramas([instance])
+
+
+# ==============================
+# RESÚMENES DEL DASHBOARD
+# ==============================
+MODELOS_RESUMEN = (Lote, Credito, Transaccion, Cliente)
+
+
+def preparar_resumen(sender, instance, raw=False, **kwargs):
+    """Lee de la base los valores originales que la instancia no trae (p. ej. campos diferidos)"""
+    if raw or instance._state.adding:
+        return
+    originales = getattr(instance, '_originales', {})
+    faltantes = [campo for campo in sender.CAMPOS_ORIGINALES if campo not in originales]
+    if faltantes:
+        fila = sender.objects.filter(pk=instance.pk).values(*faltantes).first() or {}
+        instance._originales = {**originales, **fila}
+
+
+def actualizar_resumen(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    originales = None if created else instance._originales
+    actuales = valores_actuales(instance)
+    if update_fields is not None and originales is not None:
+        # Solo cambian en la base los campos guardados
+        guardados = {instance._meta.get_field(campo).attname for campo in update_fields}
+        actuales = {
+            campo: actuales[campo] if campo in guardados else originales.get(campo)
+            for campo in actuales
+        }
+    registrar_cambio(instance, originales, actuales)
+    instance._originales = actuales
+
+
+def quitar_de_resumen(sender, instance, **kwargs):
+    originales = getattr(instance, '_originales', None)
+    if not originales or len(originales) < len(sender.CAMPOS_ORIGINALES):
+        originales = valores_actuales(instance)
+    registrar_cambio(instance, originales, None)
+
+
+for modelo in MODELOS_RESUMEN:
+    pre_save.connect(preparar_resumen, sender=modelo, dispatch_uid=f'resumen_pre_{modelo.__name__}')
+    post_save.connect(actualizar_resumen, sender=modelo, dispatch_uid=f'resumen_post_{modelo.__name__}')
+    post_delete.connect(quitar_de_resumen, sender=modelo, dispatch_uid=f'resumen_delete_{modelo.__name__}')
+
+# El archivo solo se llena con escrituras masivas (database.archivo), pero sus
+# filas pueden borrarse en cascada al eliminar un crédito, cliente o lote
+post_delete.connect(quitar_de_resumen, sender=Transaccion_Archivada, dispatch_uid='resumen_delete_Transaccion_Archivada')
@@ -0,0 +1,297 @@
+"""
+Datos sintéticos para pruebas de carga y benchmarks (ver `generar_datos_sinteticos`).
+
+Genera manzanas y lotes, clientes con nombres y apellidos con tildes y eñes,
+relaciones cliente-lote, créditos con su cronograma y transacciones de
+reserva, venta y cuotas. Con la misma `semilla` el resultado es el mismo, así
+que dos commits pueden compararse sobre datos idénticos.
+
+Todo se escribe con `bulk_create`, sin señales; al final se recalculan los
+datos derivados que las señales mantendrían: documentos de búsqueda (se
+arman antes de insertar), cronogramas, contador de cuotas pagadas,
+resúmenes del dashboard, morosidad y las versiones de las cachés.
+
+Los datos sintéticos se reconocen para poder borrarlos (`limpiar()`):
+manzanas `S001`, `S002`, ... (códigos `s001-01`) y clientes con email en el
+dominio `DOMINIO_EMAIL`.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .amortizacion import Condiciones, cronograma, redondear, regenerar_cronogramas
+from .busqueda import construir_documento
+from .cuotas import reconciliar_cuotas
+from .importacion import agrupar
+from .morosidad import recalcular_morosidad
+from .resumenes import reconciliar
+
+DOMINIO_EMAIL = 'sintetico.invalid'
+PREFIJO_MANZANA = 'S'
+DESCRIPCION = 'Lote sintético'
+
+# Los mismos ids que usa el plano (frontend/src/utils/colorManager.ts)
+ESTADOS_LOTE = {
+    1: 'Disponible',
+    2: 'Separado',
+    3: 'Vendido',
+    4: 'Bloqueado',
+    5: 'Bloqueo Comercial',
+    6: 'Separado comercial',
+}
+
+NOMBRES = (
+    'José', 'María', 'Jesús', 'Ángel', 'Sofía', 'Lucía', 'Martín', 'Andrés', 'Raúl', 'Inés',
+    'Óscar', 'Verónica', 'Héctor', 'Mónica', 'Iván', 'Begoña', 'Rubén', 'Yolanda', 'Joaquín',
+    'Ramón', 'Nicolás', 'Zoé', 'Tomás', 'Elena', 'Cristóbal', 'Rocío', 'Sebastián', 'Noemí',
+    'Fermín', 'Araceli', 'Germán', 'Valentina', 'Julián', 'Rosa', 'Adrián', 'Maribel',
+)
+APELLIDOS = (
+    'Núñez', 'Peña', 'Muñoz', 'Gómez', 'Pérez', 'Rodríguez', 'Fernández', 'López', 'Martínez',
+    'Sánchez', 'Ramírez', 'Díaz', 'Vásquez', 'Castañeda', 'Ibáñez', 'Gutiérrez', 'Quispe',
+    'Mamani', 'Huamán', 'Chávez', 'Ordóñez', 'Benítez', 'Cárdenas', 'Jiménez', 'Álvarez',
+    'Cáceres', 'Zúñiga', 'Hernández', 'Ríos', 'Calderón', 'Yáñez', 'Saldaña', 'Valdés', 'Rojas',
+)
+CALLES = ('Av. Próceres', 'Jr. Unión', 'Calle Los Álamos', 'Av. Perú', 'Pasaje San Martín', 'Jr. Cáceres')
+
+# Reparto del estado de los lotes sin cliente
+ESTADOS_LIBRES = ((1, 80), (4, 8), (5, 7), (6, 5))
+
+
+def _elegir(azar, pesos):
+    valores, frecuencias = zip(*pesos)
+    return azar.choices(valores, weights=frecuencias)[0]
+
+
+def _momento(fecha):
+    return timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+
+
+def asegurar_estados():
+    """Crea los estados de lote que falten con sus ids conocidos"""
+    from .models import Estado_Lote
+
+    for id_estado, nombre in ESTADOS_LOTE.items():
+        Estado_Lote.objects.get_or_create(id=id_estado, defaults={'nombre': nombre})
+
+
+# ==============================
+# GENERACIÓN
+# ==============================
+def _lotes(azar, manzanas, lotes_por_manzana, inicio):
+    from .models import Lote
+
+    lotes = []
+    for m in range(inicio, inicio + manzanas):
+        manzana = f'{PREFIJO_MANZANA}{m:03d}'
+        for n in range(1, lotes_por_manzana + 1):
+            area = Decimal(azar.randrange(9000, 30000)) / 100
+            precio_m2 = Decimal(azar.randrange(15000, 60000)) / 100
+            lotes.append(Lote(
+                codigo=f'{manzana}-{n:02d}'.lower(),
+                manzana=manzana,
+                lote_numero=str(n),
+                area_lote=area,
+                perimetro=Decimal(azar.randrange(3800, 9000)) / 100,
+                precio_metro_cuadrado=precio_m2,
+                precio=redondear(area * precio_m2),
+                estado_id=_elegir(azar, ESTADOS_LIBRES),
+                descripcion=DESCRIPCION,
+            ))
+    return lotes
+
+
+def _clientes(azar, cantidad, dni_inicial):
+    from .models import Cliente
+
+    clientes = []
+    for i in range(cantidad):
+        nombre = azar.choice(NOMBRES)
+        if azar.random() < 0.3:
+            nombre = f'{nombre} {azar.choice(NOMBRES)}'
+        apellidos = f'{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}'
+        dni = f'{dni_inicial + i:08d}'
+        cliente = Cliente(
+            nombre=nombre,
+            apellidos=apellidos,
+            dni=dni,
+            email=f'cliente{dni}@{DOMINIO_EMAIL}',
+            telefono=f'9{azar.randrange(10 ** 8):08d}',
+            direccion=f'{azar.choice(CALLES)} {azar.randrange(1, 2000)}',
+            estado=azar.random() > 0.05,
+            estado_financiero_actual='al dia',
+            meses_deuda=0,
+        )
+        clientes.append(cliente)
+    return clientes
+
+
+def _creditos_y_transacciones(azar, relaciones, lotes, hoy):
+    """Un crédito por relación "Propietario"; cuotas pagadas hasta un atraso aleatorio"""
+    from .models import Credito, Transaccion
+
+    precios = {lote.id: lote.precio for lote in lotes}
+    creditos, transacciones = [], []
+    for relacion in relaciones:
+        if relacion.tipo_relacion != 'Propietario' or azar.random() < 0.15:
+            continue
+        precio = precios[relacion.lote_id]
+        inicial = redondear(precio * Decimal(azar.choice((10, 15, 20))) / 100)
+        sistema = _elegir(azar, (('plano', 70), ('frances', 20), ('aleman', 10)))
+        interes = azar.choice((0, 5, 10, 12)) if sistema == 'plano' else azar.choice((8, 12, 18))
+        inicio = _momento(hoy) - timedelta(days=azar.randrange(30, 5 * 365))
+        credito = Credito(
+            cliente_id=relacion.cliente_id,
+            lote_id=relacion.lote_id,
+            monto_base=precio - inicial,
+            interes=interes,
+            num_cuotas_totales=azar.choice((12, 24, 36, 48, 60)),
+            fecha_inicio=inicio,
+            sistema_amortizacion=sistema,
+        )
+        condiciones = Condiciones.desde(
+            credito.monto_base, interes, credito.num_cuotas_totales, inicio, sistema
+        )
+        # Igual que Credito.save(), que bulk_create no llama
+        if sistema == 'plano':
+            credito.monto_total = round(credito.monto_base + (credito.monto_base * interes / 100), 2)
+        else:
+            credito.monto_total = redondear(condiciones.total)
+
+        vencidas = condiciones.cuotas_vencidas(hoy)
+        # La mayoría al día; algunos con 1 a 6 cuotas de atraso
+        atraso = 0 if azar.random() < 0.7 else azar.randrange(1, 7)
+        pagadas = max(0, vencidas - atraso)
+        credito.num_cuotas_pagadas = pagadas
+        credito.estado_credito = (
+            Credito.EstadoCredito.CANCELADO if pagadas >= credito.num_cuotas_totales
+            else Credito.EstadoCredito.EN_PROCESO if pagadas
+            else Credito.EstadoCredito.PENDIENTE
+        )
+        creditos.append(credito)
+
+        metodo = azar.choice(('efectivo', 'transferencia', 'tarjeta_debito'))
+        comunes = {'credito_id': credito.id, 'lote_id': relacion.lote_id, 'cliente_id': relacion.cliente_id}
+        transacciones.append(Transaccion(
+            tipo=Transaccion.Tipo.RESERVA, monto=redondear(inicial / 4), metodo_pago=metodo,
+            fecha=inicio - timedelta(days=15), **comunes,
+        ))
+        transacciones.append(Transaccion(
+            tipo=Transaccion.Tipo.VENTA, monto=inicial - redondear(inicial / 4), metodo_pago=metodo,
+            fecha=inicio, **comunes,
+        ))
+        for cuota in cronograma(condiciones)[:pagadas]:
+            transacciones.append(Transaccion(
+                tipo=Transaccion.Tipo.CUOTA, monto=cuota['cuota'], metodo_pago=metodo,
+                fecha=_momento(cuota['fecha_vencimiento']) - timedelta(days=azar.randrange(0, 5)),
+                **comunes,
+            ))
+    return creditos, transacciones
+
+
+def generar(manzanas=20, lotes_por_manzana=30, clientes=2000, semilla=1, tamano_lote=1000):
+    """
+    Inserta un conjunto sintético y devuelve {conteos, tiempos}. Las manzanas y
+    los DNI continúan después de los sintéticos que ya existan, así que se
+    puede llamar varias veces para crecer el conjunto.
+    """
+    from .models import Cliente, Credito, Lote, Transaccion, relacion_cliente_lote
+
+    azar = random.Random(semilla)
+    hoy = timezone.localdate()
+    tiempos = {}
+
+    inicio = time.monotonic()
+    asegurar_estados()
+    existentes = Lote.objects.filter(descripcion=DESCRIPCION).values_list('manzana', flat=True).distinct()
+    primera_manzana = max((int(m[len(PREFIJO_MANZANA):]) for m in existentes), default=0) + 1
+    dni_inicial = 90_000_000 + Cliente.objects.filter(email__endswith=f'@{DOMINIO_EMAIL}').count()
+
+    lotes = _lotes(azar, manzanas, lotes_por_manzana, primera_manzana)
+    nuevos_clientes = _clientes(azar, clientes, dni_inicial)
+
+    # ~60 % de los lotes con cliente: propietario, reservante o copropietarios
+    asignables = azar.sample(range(len(lotes)), int(len(lotes) * 0.6)) if nuevos_clientes else []
+    relaciones = []
+    for indice in asignables:
+        lote = lotes[indice]
+        tipo = _elegir(azar, (('Propietario', 70), ('reservante', 20), ('copropietario', 7), ('declinado', 3)))
+        titulares = 2 if tipo == 'copropietario' else 1
+        for cliente in azar.sample(nuevos_clientes, min(titulares, len(nuevos_clientes))):
+            relaciones.append(relacion_cliente_lote(
+                cliente=cliente, lote=lote, tipo_relacion=tipo,
+                porcentaje_participacion=Decimal(100 // titulares),
+            ))
+        if tipo in ('Propietario', 'copropietario'):
+            lote.estado_id = 3
+        elif tipo == 'reservante':
+            lote.estado_id = 2
+
+    lotes_por_cliente = {}
+    for relacion in relaciones:
+        lotes_por_cliente.setdefault(relacion.cliente.id, []).append(relacion)
+    for cliente in nuevos_clientes:
+        cliente.busqueda = construir_documento(cliente, lotes_por_cliente.get(cliente.id, ()))
+    tiempos['preparacion'] = time.monotonic() - inicio
+
+    inicio = time.monotonic()
+    with transaction.atomic():
+        Lote.objects.bulk_create(lotes, batch_size=tamano_lote)
+        Cliente.objects.bulk_create(nuevos_clientes, batch_size=tamano_lote)
+        # Los ids de los lotes (AutoField) se conocen recién después del bulk_create
+        for relacion in relaciones:
+            relacion.lote_id = relacion.lote.id
+        relacion_cliente_lote.objects.bulk_create(relaciones, batch_size=tamano_lote)
+
+        creditos, transacciones = _creditos_y_transacciones(azar, relaciones, lotes, hoy)
+        Credito.objects.bulk_create(creditos, batch_size=tamano_lote)
+        Transaccion.objects.bulk_create(transacciones, batch_size=tamano_lote)
+    tiempos['insercion'] = time.monotonic() - inicio
+
+    inicio = time.monotonic()
+    cuotas = sum(regenerar_cronogramas(grupo) for grupo in agrupar(creditos, tamano_lote))
+    reconciliar_cuotas(tamano_lote=tamano_lote)
+    reconciliar()
+    recalcular_morosidad(tamano_lote=tamano_lote)
+    invalidar_caches()
+    tiempos['derivados'] = time.monotonic() - inicio
+
+    return {
+        'conteos': {
+            'manzanas': manzanas,
+            'lotes': len(lotes),
+            'clientes': len(nuevos_clientes),
+            'relaciones': len(relaciones),
+            'creditos': len(creditos),
+            'cuotas': cuotas,
+            'transacciones': len(transacciones),
+        },
+        'tiempos': {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()},
+    }
+
+
+def invalidar_caches():
+    """Snapshot del plano, mapa de códigos e índice de sugerencias"""
+    from apps.administrator.sugerencias import incrementar_version as invalidar_sugerencias
+    from apps.maps.snapshot import invalidar_snapshot
+    from .codigos import incrementar_version as invalidar_mapa_codigos
+
+    invalidar_snapshot()
+    invalidar_mapa_codigos()
+    invalidar_sugerencias()
+
+
+def limpiar():
+    """Borra los lotes y clientes sintéticos (y en cascada sus relaciones, créditos y transacciones)"""
+    from .models import Cliente, Lote
+
+    with transaction.atomic():
+        clientes, _ = Cliente.objects.filter(email__endswith=f'@{DOMINIO_EMAIL}').delete()
+        lotes, _ = Lote.objects.filter(descripcion=DESCRIPCION, manzana__startswith=PREFIJO_MANZANA).delete()
+        reconciliar()
+    invalidar_caches()
+    return clientes + lotes
@@ -1,3 +1,493 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from . import importacion
+from .amortizacion import Condiciones, cartera, cronograma, estado, redondear
+from .busqueda import filtrar_busqueda, plegar
+from .codigos import MapaCodigos, normalizar_codigo, obtener_lote
+from .importacion import Importador, importar_en_paralelo, normalizar_filas
+from .cuotas import reconciliar_cuotas
+from .models import Cliente, Credito, Estado_Lote, Lote, Transaccion, relacion_cliente_lote
+from .morosidad import recalcular_morosidad
+from .resumenes import obtener_resumen, reconciliar
+from .sinteticos import DESCRIPCION, DOMINIO_EMAIL
+
+
+class ImportacionClientesTest(TestCase):
+    """La importación secuencial y la paralela deduplican con la misma clave"""
+
+    FILAS = [
+        {'nombre': 'JERÓNIMO', 'apellidos': 'PAREDES', 'telefono': '987654321'},
+        {'nombre': 'Jeronimo', 'apellidos': 'Paredes', 'telefono': ''},
+        {'nombre': 'Ana', 'apellidos': 'Ñique', 'telefono': '40123456'},
+        {'nombre': 'ANA', 'apellidos': 'NIQUE', 'telefono': ''},
+        {'nombre': 'Luis', 'apellidos': '', 'telefono': 'O'},
+        {'nombre': '', 'apellidos': 'Sin nombre', 'telefono': ''},
+    ]
+
+    def test_secuencial(self):
+        importador = Importador(tamano_lote=2).importar(normalizar_filas(self.FILAS))
+        self.assertEqual(importador.creados, 3)
+        self.assertEqual(importador.omitidos, 3)
+        self.assertEqual(Cliente.objects.count(), 3)
+
+    def test_paralelo_igual_que_secuencial(self):
+        # Los workers no usan la base de datos; cerrar conexiones rompería la transacción de la prueba
+        with mock.patch.object(importacion.connections, 'close_all'):
+            importador = importar_en_paralelo(self.FILAS, 2, Importador(tamano_lote=2))
+        self.assertEqual((importador.leidas, importador.creados, importador.omitidos), (6, 3, 3))
+        self.assertEqual(Cliente.objects.count(), 3)
+
+    def test_existente_con_tildes_distintas(self):
+        Cliente.objects.create(nombre='Jerónimo', apellidos='Paredes')
+        importador = Importador().importar(normalizar_filas(self.FILAS[1:2]))
+        self.assertEqual((importador.creados, importador.actualizados), (0, 0))
+        self.assertEqual(Cliente.objects.count(), 1)
+
+    def test_conflictos_no_cuentan_como_creados(self):
+        # Clientes insertados por otro proceso después de la precarga
+        Cliente.objects.create(nombre='Otro', apellidos='Proceso', dni='40123456')
+        Cliente.objects.create(nombre='Otra', apellidos='Persona', dni='40999999')
+        importador = Importador()
+        nuevos = [
+            Cliente(nombre='Ana', apellidos='Ñique', dni='40123456', telefono='987654321'),
+            Cliente(nombre='Eva', apellidos='Soto', dni='40999999'),
+            Cliente(nombre='Rosa', apellidos='Vega'),
+        ]
+        self.assertEqual(importador._insertar(nuevos), (1, 1, 1))
+        self.assertEqual(Cliente.objects.get(dni='40123456').telefono, '987654321')
+
+
+class DatosCreditoMixin:
+    """Dos estados, dos lotes y un cliente con un crédito plano de 12 cuotas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.disponible = Estado_Lote.objects.create(nombre='Disponible')
+        cls.vendido = Estado_Lote.objects.create(nombre='Vendido')
+        cls.lote = Lote.objects.create(
+            codigo='b-01', manzana='B', lote_numero='1',
+            perimetro=40, area_lote=120, precio=24000, estado=cls.disponible,
+        )
+        cls.otro_lote = Lote.objects.create(
+            codigo='b-02', manzana='B', lote_numero='2',
+            perimetro=40, area_lote=90, precio=18000, estado=cls.disponible,
+        )
+        cls.cliente = Cliente.objects.create(nombre='Rosa', apellidos='Vega')
+        cls.credito = Credito.objects.create(
+            cliente=cls.cliente, lote=cls.lote, monto_base=12000, interes=10,
+            num_cuotas_totales=12, fecha_inicio=timezone.now(), estado_credito='en_proceso',
+        )
+
+    def pagar(self, monto=1100, tipo='CUOTA', credito=True):
+        return Transaccion.objects.create(
+            credito=self.credito if credito else None, tipo=tipo, monto=monto,
+            lote=self.lote, cliente=self.cliente,
+        )
+
+
+class ResumenesIncrementalesTest(DatosCreditoMixin, TestCase):
+    """Los deltas de las señales dejan los resúmenes igual que el recálculo completo"""
+
+    def assertSinDiferencias(self):
+        self.assertEqual(reconciliar(aplicar=False), [])
+
+    def test_altas(self):
+        self.pagar()
+        self.pagar(tipo='RESERVA')
+        self.pagar(credito=False)
+        self.assertSinDiferencias()
+        cartera = obtener_resumen()['cartera']
+        self.assertEqual(cartera['creditos'], 1)
+        self.assertEqual(Decimal(cartera['cobrado']), Decimal('1100'))
+
+    def test_cambios_de_lotes(self):
+        self.lote.estado = self.vendido
+        self.lote.precio = 25000
+        self.lote.save()
+        # Instancia con campos diferidos: los originales se leen antes de guardar
+        lote = Lote.objects.only('id', 'area_lote').get(pk=self.otro_lote.pk)
+        lote.area_lote = 95
+        lote.save(update_fields=['area_lote'])
+        self.assertSinDiferencias()
+
+    def test_cambios_y_bajas_de_transacciones(self):
+        cuota = self.pagar()
+        cuota.monto = 1500
+        cuota.save()
+        otra = self.pagar(tipo='RESERVA')
+        otra.tipo = 'AMORTIZACION'
+        otra.save(update_fields=['tipo'])
+        cuota.delete()
+        self.assertSinDiferencias()
+
+    def test_morosidad_de_clientes(self):
+        self.cliente.meses_deuda = 2
+        self.cliente.monto_cuota = 1100
+        self.cliente.save()
+        self.cliente.meses_deuda = 3
+        self.cliente.save()
+        Cliente.objects.create(nombre='Luis', apellidos='Soto', meses_deuda=3, monto_cuota=900)
+        self.assertSinDiferencias()
+
+    def test_baja_en_cascada(self):
+        self.pagar()
+        self.credito.delete()
+        self.assertSinDiferencias()
+        self.assertEqual(obtener_resumen()['cartera']['creditos'], 0)
+
+    def test_reconciliar_corrige_escrituras_sin_senales(self):
+        Lote.objects.filter(pk=self.lote.pk).update(estado=self.vendido)
+        diferencias = reconciliar()
+        self.assertIn(('Resumen_Estado_Lote', self.vendido.pk, 'cantidad', None, 1), diferencias)
+        self.assertSinDiferencias()
+
+
+class CuotasPagadasTest(DatosCreditoMixin, TestCase):
+    """`num_cuotas_pagadas` se ajusta con F() por cada CUOTA, sin COUNT"""
+
+    def cuotas(self):
+        return Credito.objects.values_list('num_cuotas_pagadas', flat=True).get(pk=self.credito.pk)
+
+    def test_alta_y_baja(self):
+        cuota = self.pagar()
+        self.pagar()
+        self.pagar(tipo='RESERVA')
+        self.assertEqual(self.cuotas(), 2)
+        cuota.delete()
+        self.assertEqual(self.cuotas(), 1)
+
+    def test_alta_sin_count(self):
+        self.pagar()
+        with mock.patch.object(Credito, 'contar_cuotas_pagadas') as contar:
+            self.pagar()
+        contar.assert_not_called()
+        self.assertEqual(self.cuotas(), 2)
+
+    def test_cambio_de_tipo(self):
+        transaccion = self.pagar(tipo='RESERVA')
+        transaccion.tipo = 'CUOTA'
+        transaccion.save(update_fields=['tipo'])
+        self.assertEqual(self.cuotas(), 1)
+        transaccion.tipo = 'VENTA'
+        transaccion.save()
+        self.assertEqual(self.cuotas(), 0)
+
+    def test_save_de_credito_no_pisa_el_contador(self):
+        credito = Credito.objects.get(pk=self.credito.pk)
+        self.pagar()
+        credito.estado_credito = 'pendiente'
+        credito.save()
+        self.assertEqual(self.cuotas(), 1)
+
+    def test_reconciliar_cuotas(self):
+        self.pagar()
+        self.pagar()
+        Credito.objects.filter(pk=self.credito.pk).update(num_cuotas_pagadas=7)
+        self.assertEqual(reconciliar_cuotas(aplicar=False), [(self.credito.pk, 7, 2)])
+        self.assertEqual(self.cuotas(), 7)
+        reconciliar_cuotas()
+        self.assertEqual(self.cuotas(), 2)
+        self.assertEqual(reconciliar_cuotas(), [])
+
+
+class RecalculoMorosidadTest(DatosCreditoMixin, TestCase):
+    """Morosidad derivada de cuotas vencidas menos pagadas"""
+
+    CORTE = date(2026, 5, 20)
+
+    def setUp(self):
+        # Cuotas de 1100 que vencen el 15 de cada mes: 4 vencidas al corte
+        self.credito.fecha_inicio = timezone.make_aware(datetime(2026, 1, 15))
+        self.credito.save()
+        self.pagar()
+
+    def test_dry_run_no_escribe(self):
+        informe = recalcular_morosidad(self.CORTE, aplicar=False)
+        self.assertEqual(informe['clientes_actualizados'], 1)
+        self.assertEqual(informe['deudores'], 1)
+        self.assertIn('calculo', informe['tiempos'])
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.meses_deuda, 0)
+
+    def test_aplicar(self):
+        recalcular_morosidad(self.CORTE)
+        self.cliente.refresh_from_db()
+        self.assertEqual(
+            (self.cliente.meses_deuda, self.cliente.estado_financiero_actual, self.cliente.monto_cuota),
+            (3, 'deudor', Decimal('1100.00')),
+        )
+        # Los resúmenes quedan al día y una segunda pasada no encuentra cambios
+        self.assertEqual(reconciliar(aplicar=False), [])
+        self.assertEqual(recalcular_morosidad(self.CORTE)['cambios'], [])
+
+    def test_conciliados_se_respetan(self):
+        Cliente.objects.filter(pk=self.cliente.pk).update(estado_financiero_actual='conciliado')
+        informe = recalcular_morosidad(self.CORTE)
+        self.assertEqual((informe['clientes_actualizados'], informe['conciliados_omitidos']), (0, 1))
+        informe = recalcular_morosidad(self.CORTE, incluir_conciliados=True)
+        self.assertEqual(informe['clientes_actualizados'], 1)
+
+    def test_credito_cancelado_queda_al_dia(self):
+        Cliente.objects.filter(pk=self.cliente.pk).update(meses_deuda=2, estado_financiero_actual='deudor')
+        Credito.objects.filter(pk=self.credito.pk).update(estado_credito='cancelado')
+        recalcular_morosidad(self.CORTE)
+        self.cliente.refresh_from_db()
+        self.assertEqual((self.cliente.meses_deuda, self.cliente.estado_financiero_actual), (0, 'al dia'))
+
+
+class DocumentoBusquedaTest(TestCase):
+    """`Cliente.busqueda` se mantiene desde las señales y `filtrar_busqueda` ordena por rango"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado_Lote.objects.create(nombre='Disponible')
+        cls.lote = Lote.objects.create(
+            codigo='D-07', manzana='D', lote_numero='7', perimetro=40, area_lote=100, estado=estado,
+        )
+
+    def documento(self, cliente):
+        return Cliente.objects.values_list('busqueda', flat=True).get(pk=cliente.pk)
+
+    def buscar(self, termino):
+        return [
+            (c.nombre, c.rango)
+            for c in filtrar_busqueda(Cliente.objects.all(), termino).order_by('rango', 'nombre')
+        ]
+
+    def test_plegar(self):
+        self.assertEqual(plegar('  JOSÉ   Núñez '), 'jose nunez')
+        self.assertEqual(plegar(None), '')
+
+    def test_alta_y_cambios_del_cliente(self):
+        cliente = Cliente.objects.create(nombre='María', apellidos='Núñez', dni='40123456')
+        self.assertEqual(self.documento(cliente), 'maria nunez 40123456')
+
+        cliente.telefono = '987654321'
+        cliente.save(update_fields=['telefono'])
+        self.assertEqual(self.documento(cliente), 'maria nunez 40123456 987654321')
+
+        cliente.apellidos = 'Peña'
+        cliente.save()
+        self.assertEqual(self.documento(cliente), 'maria pena 40123456 987654321')
+
+    def test_relaciones_y_lotes(self):
+        cliente = Cliente.objects.create(nombre='Luis', apellidos='Soto')
+        relacion = relacion_cliente_lote.objects.create(cliente=cliente, lote=self.lote, tipo_relacion='Propietario')
+        self.assertEqual(self.documento(cliente), 'luis soto d-07 d 7 propietario')
+
+        lote = Lote.objects.get(pk=self.lote.pk)
+        lote.codigo = 'D-08'
+        lote.save()
+        self.assertIn('d-08', self.documento(cliente))
+
+        relacion.delete()
+        self.assertEqual(self.documento(cliente), 'luis soto')
+
+    def test_busqueda_sin_tildes_y_rango(self):
+        Cliente.objects.create(nombre='Núñez', apellidos='Vega')
+        Cliente.objects.create(nombre='Ana', apellidos='Núñez')
+        Cliente.objects.create(nombre='Rosa', apellidos='Ibáñez')
+        Cliente.objects.create(nombre='Otro', apellidos='Cliente')
+        # Empieza por el término, alguna palabra empieza, solo lo contiene
+        self.assertEqual(self.buscar('nunez'), [('Núñez', 0), ('Ana', 1)])
+        self.assertEqual(self.buscar('ÁÑEZ'), [('Rosa', 2)])
+        # Cada palabra debe aparecer, en cualquier orden
+        self.assertEqual(self.buscar('vega nunez'), [('Núñez', 2)])
+
+
+class CodigosLoteTest(TestCase):
+    """Códigos de lote canónicos y el mapa código → id de cada proceso"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estado = Estado_Lote.objects.create(nombre='Disponible')
+        cls.lote = Lote.objects.create(
+            codigo=' A-01 ', manzana='A', lote_numero='1', perimetro=40, area_lote=100, estado=cls.estado,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.mapa = MapaCodigos()
+
+    def test_forma_canonica(self):
+        for codigo, canonico in [('a-1', 'a-1'), (' A-01 ', 'a-01'), ('A01', 'a01'), (None, '')]:
+            self.assertEqual(normalizar_codigo(codigo), canonico)
+        self.assertEqual(Lote.objects.get(pk=self.lote.pk).codigo, 'a-01')
+
+    def test_mapa_en_memoria(self):
+        self.assertEqual(self.mapa.obtener_id('A-01'), self.lote.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.mapa.obtener_id(' a-01'), self.lote.pk)
+
+    def test_alta_invalida_el_mapa(self):
+        self.assertIsNone(self.mapa.obtener_id('a-02'))
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = Lote.objects.create(
+                codigo='A-02', manzana='A', lote_numero='2', perimetro=40, area_lote=100, estado=self.estado,
+            )
+        # La versión cambió: se reconstruye con una consulta y el nuevo código ya está
+        with self.assertNumQueries(1):
+            self.assertEqual(self.mapa.obtener_id('A-02'), nuevo.pk)
+
+    def test_obtener_lote(self):
+        self.assertEqual(obtener_lote(' A-01').pk, self.lote.pk)
+        with self.assertRaises(Lote.DoesNotExist):
+            obtener_lote('z-99')
+
+
+class AmortizacionTest(TestCase):
+    """Cronogramas comparados con tablas calculadas a mano"""
+
+    INICIO = date(2026, 1, 31)
+
+    def tabla(self, monto, interes, cuotas, sistema):
+        condiciones = Condiciones.desde(monto, interes, cuotas, self.INICIO, sistema)
+        filas = cronograma(condiciones)
+        self.assertEqual(sum(fila['capital'] for fila in filas), Decimal(monto))
+        self.assertEqual(sum(fila['cuota'] for fila in filas), redondear(condiciones.total))
+        self.assertEqual(filas[-1]['saldo'], Decimal('0.00'))
+        for fila in filas:
+            self.assertEqual(fila['capital'] + fila['interes'], fila['cuota'])
+            self.assertGreaterEqual(fila['interes'], 0)
+        return [
+            tuple(str(fila[campo]) for campo in ('cuota', 'capital', 'interes', 'saldo'))
+            for fila in filas
+        ]
+
+    def test_frances(self):
+        # r = 1 % mensual, cuota = 1000·r / (1 - 1.01⁻³) = 340.0221
+        self.assertEqual(self.tabla(1000, 12, 3, 'frances'), [
+            ('340.02', '330.02', '10.00', '669.98'),
+            ('340.02', '333.32', '6.70', '336.66'),
+            # La última absorbe el redondeo: total 1020.0664 → 1020.07
+            ('340.03', '336.66', '3.37', '0.00'),
+        ])
+
+    def test_aleman(self):
+        self.assertEqual(self.tabla(1200, 12, 3, 'aleman'), [
+            ('412.00', '400.00', '12.00', '800.00'),
+            ('408.00', '400.00', '8.00', '400.00'),
+            ('404.00', '400.00', '4.00', '0.00'),
+        ])
+
+    def test_plano(self):
+        self.assertEqual(self.tabla(1000, 10, 3, 'plano'), [
+            ('366.66', '333.33', '33.33', '666.67'),
+            ('366.67', '333.34', '33.33', '333.33'),
+            ('366.67', '333.33', '33.34', '0.00'),
+        ])
+
+    def test_tasa_cero(self):
+        self.assertEqual(self.tabla(1000, 0, 3, 'frances'), [
+            ('333.33', '333.33', '0.00', '666.67'),
+            ('333.34', '333.34', '0.00', '333.33'),
+            ('333.33', '333.33', '0.00', '0.00'),
+        ])
+
+    def test_una_cuota(self):
+        self.assertEqual(self.tabla(1000, 12, 1, 'frances'), [('1010.00', '1000.00', '10.00', '0.00')])
+
+    def test_vencimientos_a_fin_de_mes(self):
+        filas = cronograma(Condiciones.desde(1000, 0, 3, self.INICIO, 'plano'))
+        self.assertEqual(
+            [fila['fecha_vencimiento'] for fila in filas], [date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)]
+        )
+
+    def test_estado_a_una_fecha(self):
+        condiciones = Condiciones.desde(1200, 12, 3, self.INICIO, 'aleman')
+        situacion = estado(condiciones, 1, date(2026, 3, 31))
+        self.assertEqual((situacion['cuotas_vencidas'], situacion['cuotas_atrasadas']), (2, 1))
+        self.assertEqual(situacion['monto_vencido'], 408.0)
+        self.assertEqual(situacion['por_cobrar'], 812.0)
+        self.assertEqual(situacion['saldo_capital'], 800.0)
+        self.assertEqual(situacion['proximo_vencimiento'], date(2026, 3, 31))
+
+    def test_cartera(self):
+        fila = {
+            'id': 1, 'monto_base': 1200, 'interes': 12, 'num_cuotas_totales': 3, 'num_cuotas_pagadas': 0,
+            'fecha_inicio': self.INICIO, 'sistema_amortizacion': 'aleman', 'estado_credito': 'en_proceso',
+            'cliente_id': 2, 'cliente__nombre': 'Rosa', 'cliente__apellidos': 'Vega', 'lote__codigo': 'b-01',
+        }
+        creditos, totales = cartera([fila, {**fila, 'id': 3, 'num_cuotas_pagadas': 3}], date(2026, 3, 1))
+        self.assertEqual([c['cuotas_atrasadas'] for c in creditos], [1, 0])
+        self.assertEqual(creditos[0]['cliente'], 'Rosa Vega')
+        self.assertEqual(totales, {
+            'creditos': 2, 'con_atraso': 1, 'monto_vencido': 412.0, 'por_cobrar': 1224.0, 'saldo_capital': 1200.0,
+        })
+
+
+class CronogramaCreditoSenalTest(DatosCreditoMixin, TestCase):
+    """El cronograma guardado se regenera al crear el crédito o cambiar sus condiciones"""
+
+    def cuotas(self):
+        return list(self.credito.cronograma.values_list('id', 'cuota'))
+
+    def test_alta(self):
+        cuotas = self.cuotas()
+        self.assertEqual(len(cuotas), 12)
+        self.assertEqual(sum(cuota for _, cuota in cuotas), self.credito.monto_total)
+
+    def test_cambio_de_condiciones(self):
+        credito = Credito.objects.get(pk=self.credito.pk)
+        credito.num_cuotas_totales = 6
+        credito.sistema_amortizacion = 'frances'
+        credito.save()
+        cuotas = self.cuotas()
+        self.assertEqual(len(cuotas), 6)
+        self.assertEqual(sum(cuota for _, cuota in cuotas), Credito.objects.get(pk=credito.pk).monto_total)
+
+    def test_otros_cambios_no_regeneran(self):
+        antes = self.cuotas()
+        credito = Credito.objects.get(pk=self.credito.pk)
+        credito.estado_credito = 'pendiente'
+        credito.save()
+        self.assertEqual(self.cuotas(), antes)
+
+
+class DatosSinteticosTest(TestCase):
+    """`generar_datos_sinteticos` a tamaño mínimo: misma semilla, mismas filas; `--solo-limpiar` lo borra todo"""
+
+    def generar(self, *argumentos):
+        call_command('generar_datos_sinteticos', *argumentos, '--forzar', stdout=StringIO())
+
+    def filas(self):
+        clientes = Cliente.objects.filter(email__endswith=f'@{DOMINIO_EMAIL}')
+        lotes = Lote.objects.filter(descripcion=DESCRIPCION)
+        return {
+            'lotes': sorted(lotes.values_list('codigo', 'estado_id', 'precio')),
+            'clientes': sorted(clientes.values_list('dni', 'nombre', 'apellidos')),
+            'relaciones': sorted(relacion_cliente_lote.objects.filter(lote__in=lotes).values_list(
+                'cliente__dni', 'lote__codigo', 'tipo_relacion')),
+            'creditos': sorted(Credito.objects.filter(lote__in=lotes).values_list(
+                'lote__codigo', 'monto_base', 'num_cuotas_totales', 'num_cuotas_pagadas', 'estado_credito')),
+            'transacciones': sorted(Transaccion.objects.filter(lote__in=lotes).values_list(
+                'lote__codigo', 'tipo', 'monto', 'fecha')),
+        }
+
+    def test_misma_semilla_mismas_filas(self):
+        tamano = ('--manzanas', '2', '--lotes-por-manzana', '4', '--clientes', '6', '--semilla', '3')
+        self.generar(*tamano)
+        primera = self.filas()
+        self.assertEqual(len(primera['lotes']), 8)
+        self.assertEqual(len(primera['clientes']), 6)
+        self.assertTrue(primera['relaciones'])
+
+        self.generar(*tamano, '--limpiar')
+        self.assertEqual(self.filas(), primera)
 
-# Create your tests here.
+    def test_solo_limpiar(self):
+        self.generar('--manzanas', '1', '--lotes-por-manzana', '3', '--clientes', '4')
+        self.generar('--solo-limpiar')
+        self.assertEqual(self.filas(), {
+            'lotes': [], 'clientes': [], 'relaciones': [], 'creditos': [], 'transacciones': [],
+        })
+        self.assertFalse(Lote.objects.filter(manzana__startswith='S').exists())
+        self.assertEqual(reconciliar(aplicar=False), [])
@@ -0,0 +1,347 @@
+"""
+Benchmark reproducible de los endpoints principales (ver `benchmark_endpoints`).
+
+Cada escenario hace una petición con el cliente de pruebas de Django (sin red
+ni servidor) y registra por iteración la latencia, el número de consultas SQL
+y los bytes de la respuesta; la memoria pico se mide en una pasada aparte con
+`tracemalloc`, que ralentiza la ejecución y falsearía las latencias.
+
+Los resultados se guardan en JSON junto con el commit, la base de datos y el
+tamaño de las tablas, para comparar dos ejecuciones con `comparar()`. Conviene
+generar antes un conjunto fijo con `generar_datos_sinteticos --semilla N`.
+
+Las peticiones se ejecutan con DEBUG=False, como en producción: con DEBUG
+Django guarda cada consulta en `connection.queries` y el log de SQL domina
+el tiempo medido.
+"""
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .metricas import Ventana
+
+VERSION_FORMATO = 1
+
+
+@dataclass
+class Escenario:
+    """
+    `peticion(contexto, azar)` devuelve (método, url, datos). `antes` se
+    ejecuta fuera de la medición (p. ej. invalidar una caché) y `despues`
+    recibe la respuesta para deshacer escrituras.
+    """
+    nombre: str
+    peticion: Callable
+    antes: Optional[Callable] = None
+    despues: Optional[Callable] = None
+    descripcion: str = ''
+
+
+@dataclass
+class Resultado:
+    latencias: Ventana = field(default_factory=lambda: Ventana(None))
+    consultas: list = field(default_factory=list)
+    bytes: list = field(default_factory=list)
+    estados: dict = field(default_factory=dict)
+    memoria_pico: int = 0
+
+    def resumen(self):
+        cuantiles = self.latencias.cuantiles()
+        valores = self.latencias.valores
+        return {
+            'iteraciones': len(valores),
+            'p50_ms': _ms(cuantiles.get(0.5)),
+            'p95_ms': _ms(cuantiles.get(0.95)),
+            'p99_ms': _ms(cuantiles.get(0.99)),
+            'media_ms': _ms(self.latencias.suma / len(valores) if valores else None),
+            'min_ms': _ms(min(valores, default=None)),
+            'max_ms': _ms(max(valores, default=None)),
+            'consultas_min': min(self.consultas, default=None),
+            'consultas_max': max(self.consultas, default=None),
+            'bytes_respuesta': max(self.bytes, default=None),
+            'memoria_pico_kb': round(self.memoria_pico / 1024, 1),
+            'estados_http': {str(codigo): veces for codigo, veces in sorted(self.estados.items())},
+        }
+
+
+def _ms(segundos):
+    return None if segundos is None else round(segundos * 1000, 3)
+
+
+# ==============================
+# CONTEXTO Y ESCENARIOS
+# ==============================
+def preparar_contexto(azar, muestras=200):
+    """Códigos, términos de búsqueda y pares cliente-lote libres tomados de la base"""
+    from database.models import Cliente, Lote, relacion_cliente_lote
+
+    codigos = list(Lote.objects.order_by('id').values_list('codigo', flat=True)[:muestras * 5])
+    libres = list(
+        Lote.objects.filter(estado_id=1, compra__isnull=True).order_by('id').values_list('id', flat=True)[:muestras]
+    )
+    sin_lote = list(
+        Cliente.objects.filter(compra__isnull=True).order_by('id').values_list('id', flat=True)[:muestras]
+    )
+    apellidos = list(Cliente.objects.order_by('id').values_list('apellidos', flat=True)[:muestras])
+    busquedas = [apellido.split()[0] for apellido in apellidos if apellido.strip()]
+    # También términos sin tildes y en minúsculas (el documento de búsqueda los pliega)
+    busquedas += [termino.lower() for termino in busquedas[:len(busquedas) // 2]]
+    if not (codigos and busquedas and libres and sin_lote):
+        raise ValueError(
+            'La base no tiene datos suficientes (lotes libres, clientes sin lote): '
+            'ejecuta antes generar_datos_sinteticos'
+        )
+    return {
+        'codigos': azar.sample(codigos, min(len(codigos), muestras)),
+        'busquedas': busquedas,
+        'lotes_libres': libres,
+        'clientes_sin_lote': sin_lote,
+        'relaciones': relacion_cliente_lote.objects.count(),
+    }
+
+
+def _invalidar_snapshot(contexto):
+    from apps.maps.snapshot import invalidar_snapshot
+
+    invalidar_snapshot()
+
+
+def _actualizar_lote(contexto, azar):
+    from database.models import Lote
+
+    codigo = azar.choice(contexto['codigos'])
+    contexto['precio_original'] = (codigo, Lote.objects.values_list('precio', flat=True).get(codigo=codigo))
+    precio = round(azar.uniform(10_000, 150_000), 2)
+    return 'put', f"{reverse('admin-update-lote')}?codigo={codigo}", {'input_precio': precio}
+
+
+def _restaurar_lote(contexto, respuesta):
+    from database.models import Lote
+
+    # save() de una instancia recién leída: las señales devuelven el resumen y el snapshot a su estado
+    codigo, precio = contexto.pop('precio_original')
+    lote = Lote.objects.get(codigo=codigo)
+    lote.precio = precio
+    lote.save()
+
+
+def _asignar_lote(contexto, azar):
+    datos = {
+        'cliente': str(azar.choice(contexto['clientes_sin_lote'])),
+        'lote': azar.choice(contexto['lotes_libres']),
+        'tipo_relacion': 'reservante',
+    }
+    return 'post', reverse('asignar-lote-cliente'), datos
+
+
+def _deshacer_asignacion(contexto, respuesta):
+    from database.models import relacion_cliente_lote
+
+    if respuesta.status_code == 201:
+        # delete() de la instancia: las señales restauran el documento de búsqueda
+        relacion_cliente_lote.objects.get(id=respuesta.json()['relacion']['id']).delete()
+
+
+ESCENARIOS = [
+    Escenario(
+        'lotes_estado',
+        lambda contexto, azar: ('get', reverse('lotes_estado'), None),
+        descripcion='Plano de lotes con el snapshot en caché',
+    ),
+    Escenario(
+        'lotes_estado_sin_cache',
+        lambda contexto, azar: ('get', reverse('lotes_estado'), None),
+        antes=_invalidar_snapshot,
+        descripcion='Plano de lotes reconstruyendo el snapshot',
+    ),
+    Escenario(
+        'listar_clientes',
+        lambda contexto, azar: ('get', reverse('listar-clientes'), None),
+        descripcion='Listado de clientes sin paginar (respuesta completa, como el frontend)',
+    ),
+    Escenario(
+        'listar_clientes_paginado',
+        lambda contexto, azar: ('get', reverse('listar-clientes'), {'limit': 50}),
+        descripcion='Primera página del listado de clientes por cursor',
+    ),
+    Escenario(
+        'listar_clientes_busqueda',
+        lambda contexto, azar: ('get', reverse('listar-clientes'), {'search': azar.choice(contexto['busquedas'])}),
+        descripcion='Listado de clientes filtrado por apellido (con y sin tildes)',
+    ),
+    Escenario(
+        'listar_relaciones',
+        lambda contexto, azar: ('get', reverse('listar-relaciones'), None),
+        descripcion='Listado de relaciones cliente-lote',
+    ),
+    Escenario(
+        'actualizar_lote',
+        _actualizar_lote,
+        despues=_restaurar_lote,
+        descripcion='PUT de precio de un lote (AdminUpdateLote)',
+    ),
+    Escenario(
+        'asignar_lote',
+        _asignar_lote,
+        despues=_deshacer_asignacion,
+        descripcion='Asignación de un lote libre a un cliente (AsignarLoteACliente)',
+    ),
+]
+
+
+# ==============================
+# EJECUCIÓN
+# ==============================
+def _peticion(cliente, metodo, url, datos):
+    if metodo == 'get':
+        respuesta = cliente.get(url, datos)
+    else:
+        respuesta = getattr(cliente, metodo)(url, datos, content_type='application/json')
+    # Las respuestas streaming se consumen dentro de la medición
+    contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+    return respuesta, len(contenido)
+
+
+def _ejecutar(escenario, cliente, contexto, azar, resultado=None):
+    if escenario.antes:
+        escenario.antes(contexto)
+    metodo, url, datos = escenario.peticion(contexto, azar)
+
+    consultas = 0
+
+    def contar(execute, sql, params, many, context):
+        nonlocal consultas
+        consultas += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(contar):
+        inicio = time.perf_counter()
+        respuesta, tamano = _peticion(cliente, metodo, url, datos)
+        segundos = time.perf_counter() - inicio
+
+    if resultado is not None:
+        resultado.latencias.observar(segundos)
+        resultado.consultas.append(consultas)
+        resultado.bytes.append(tamano)
+        resultado.estados[respuesta.status_code] = resultado.estados.get(respuesta.status_code, 0) + 1
+    if escenario.despues:
+        escenario.despues(contexto, respuesta)
+    return respuesta
+
+
+def ejecutar(iteraciones=50, calentamiento=5, semilla=1, solo=None, al_terminar_escenario=None):
+    """Ejecuta los escenarios y devuelve el informe listo para guardar en JSON"""
+    from database.models import Cliente, Credito, Lote, Transaccion, relacion_cliente_lote
+
+    azar = random.Random(semilla)
+    escenarios = [e for e in ESCENARIOS if not solo or e.nombre in solo]
+    resultados = {}
+
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+        contexto = preparar_contexto(azar)
+        cliente = Client()
+        for escenario in escenarios:
+            for _ in range(calentamiento):
+                _ejecutar(escenario, cliente, contexto, azar)
+
+            resultado = Resultado()
+            for _ in range(iteraciones):
+                _ejecutar(escenario, cliente, contexto, azar, resultado)
+
+            tracemalloc.start()
+            try:
+                _ejecutar(escenario, cliente, contexto, azar)
+                resultado.memoria_pico = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            resultados[escenario.nombre] = {'descripcion': escenario.descripcion, **resultado.resumen()}
+            if al_terminar_escenario:
+                al_terminar_escenario(escenario.nombre, resultados[escenario.nombre])
+
+    return {
+        'version_formato': VERSION_FORMATO,
+        'fecha': timezone.now().isoformat(timespec='seconds'),
+        'commit': _git('rev-parse', 'HEAD'),
+        'rama': _git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'entorno': {
+            'base_de_datos': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'parametros': {'iteraciones': iteraciones, 'calentamiento': calentamiento, 'semilla': semilla},
+        'filas': {
+            'lotes': Lote.objects.count(),
+            'clientes': Cliente.objects.count(),
+            'relaciones': relacion_cliente_lote.objects.count(),
+            'creditos': Credito.objects.count(),
+            'transacciones': Transaccion.objects.count(),
+        },
+        'escenarios': resultados,
+    }
+
+
+def _git(*argumentos):
+    try:
+        salida = subprocess.run(
+            ['git', *argumentos], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if salida.returncode != 0:
+        return None
+    return salida.stdout.strip() or None
+
+
+# ==============================
+# RESULTADOS
+# ==============================
+def ruta_por_defecto(informe):
+    marca = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    commit = (informe['commit'] or 'sin-commit')[:10]
+    return Path(settings.BASE_DIR) / 'benchmarks' / f'{marca}_{commit}_{informe["entorno"]["base_de_datos"]}.json'
+
+
+def guardar(informe, ruta):
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding='utf-8')
+    return ruta
+
+
+def cargar(ruta):
+    return json.loads(Path(ruta).read_text(encoding='utf-8'))
+
+
+METRICAS_COMPARADAS = ('p50_ms', 'p95_ms', 'consultas_max', 'memoria_pico_kb')
+
+
+def comparar(base, actual):
+    """[(escenario, métrica, antes, después, variación %)] de los escenarios presentes en ambos"""
+    filas = []
+    for nombre, valores in actual['escenarios'].items():
+        anteriores = base['escenarios'].get(nombre)
+        if anteriores is None:
+            continue
+        for metrica in METRICAS_COMPARADAS:
+            antes, despues = anteriores.get(metrica), valores.get(metrica)
+            if antes is None or despues is None:
+                continue
+            variacion = round((despues - antes) / antes * 100, 1) if antes else None
+            filas.append((nombre, metrica, antes, despues, variacion))
+    return filas
@@ -0,0 +1,312 @@
+"""
+Métricas de rendimiento por vista, en memoria del proceso.
+
+`MiddlewareMetricas` mide cada petición: tiempo total, número de consultas,
+tiempo en la base de datos, bytes de la respuesta y aciertos/fallos de las
+cachés registradas con `registrar_cache()`. `medir()` hace lo mismo para un
+bloque de código (decorador o `with`). Las consultas que superan
+`METRICAS_CONSULTA_LENTA_MS` se registran con su SQL en el logger
+`innova.metricas`, una vez por sentencia y minuto. Las vistas con
+`@presupuesto_consultas` se controlan aquí mismo (ver `presupuesto`).
+
+Cada métrica guarda una ventana móvil de las últimas `METRICAS_VENTANA`
+observaciones para los percentiles (p50/p95/p99) más la suma y el conteo
+acumulados. `exportar_prometheus()` las expone en el formato de texto de
+Prometheus (GET /api/admin/metrics/). Los valores son por proceso: con varios
+workers cada uno publica los suyos.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ContextDecorator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from .presupuesto import excedido, presupuesto_de
+
+logger = logging.getLogger('innova.metricas')
+
+CUANTILES = (0.5, 0.95, 0.99)
+PREFIJO = 'innova'
+INTERVALO_LOG_LENTAS = 60  # segundos entre dos registros de la misma sentencia lenta
+
+
+def _ajuste(nombre, por_defecto):
+    return getattr(settings, nombre, por_defecto)
+
+
+class Ventana:
+    """Últimas observaciones de una métrica y sus totales acumulados"""
+
+    def __init__(self, tamano):
+        self.valores = deque(maxlen=tamano)
+        self.suma = 0.0
+        self.conteo = 0
+
+    def observar(self, valor):
+        self.valores.append(valor)
+        self.suma += valor
+        self.conteo += 1
+
+    def cuantiles(self):
+        ordenados = sorted(self.valores)
+        if not ordenados:
+            return {}
+        return {q: ordenados[min(int(q * len(ordenados)), len(ordenados) - 1)] for q in CUANTILES}
+
+
+class Registro:
+    """Resúmenes (ventanas) y contadores con etiquetas, protegidos por un lock"""
+
+    AYUDAS = {
+        'vista_duracion_segundos': ('summary', 'Tiempo total de la petición'),
+        'vista_consultas': ('summary', 'Consultas SQL por petición'),
+        'vista_db_segundos': ('summary', 'Tiempo en la base de datos por petición'),
+        'vista_bytes_respuesta': ('summary', 'Bytes del cuerpo de la respuesta (sin streaming)'),
+        'bloque_duracion_segundos': ('summary', 'Tiempo de los bloques medidos con medir()'),
+        'bloque_consultas': ('summary', 'Consultas SQL de los bloques medidos con medir()'),
+        'peticiones_total': ('counter', 'Peticiones atendidas por vista y código de estado'),
+        'cache_total': ('counter', 'Aciertos y fallos de las cachés de la aplicación'),
+        'consultas_lentas_total': ('counter', 'Consultas que superaron el umbral de consulta lenta'),
+        'presupuesto_excedido_total': ('counter', 'Peticiones que superaron el presupuesto de consultas de su vista'),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ventanas = defaultdict(dict)
+        self._contadores = defaultdict(lambda: defaultdict(int))
+
+    def observar(self, metrica, etiquetas, valor):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            ventana = self._ventanas[metrica].get(clave)
+            if ventana is None:
+                ventana = self._ventanas[metrica][clave] = Ventana(_ajuste('METRICAS_VENTANA', 1024))
+            ventana.observar(valor)
+
+    def incrementar(self, metrica, etiquetas, valor=1):
+        with self._lock:
+            self._contadores[metrica][tuple(sorted(etiquetas.items()))] += valor
+
+    def reiniciar(self):
+        with self._lock:
+            self._ventanas.clear()
+            self._contadores.clear()
+
+    def exportar_prometheus(self):
+        lineas = []
+        with self._lock:
+            ventanas = {m: {k: (v.cuantiles(), v.suma, v.conteo) for k, v in s.items()} for m, s in self._ventanas.items()}
+            contadores = {m: dict(s) for m, s in self._contadores.items()}
+
+        for metrica in sorted(set(ventanas) | set(contadores)):
+            tipo, ayuda = self.AYUDAS.get(metrica, ('untyped', metrica))
+            nombre = f'{PREFIJO}_{metrica}'
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            for clave, (cuantiles, suma, conteo) in sorted(ventanas.get(metrica, {}).items()):
+                for q, valor in cuantiles.items():
+                    lineas.append(f'{nombre}{_etiquetas(clave, quantile=q)} {_numero(valor)}')
+                lineas.append(f'{nombre}_sum{_etiquetas(clave)} {_numero(suma)}')
+                lineas.append(f'{nombre}_count{_etiquetas(clave)} {conteo}')
+            for clave, valor in sorted(contadores.get(metrica, {}).items()):
+                lineas.append(f'{nombre}{_etiquetas(clave)} {valor}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(clave, **extra):
+    pares = list(clave) + [(k, v) for k, v in extra.items()]
+    if not pares:
+        return ''
+    texto = ','.join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for k, v in pares
+    )
+    return '{' + texto + '}'
+
+
+def _numero(valor):
+    return f'{valor:.6g}' if isinstance(valor, float) else str(valor)
+
+
+registro = Registro()
+
+
+# ==============================
+# CONSULTAS Y CACHÉ DE LA PETICIÓN
+# ==============================
+class Medicion:
+    """Acumulado de consultas de una petición o bloque"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.presupuesto = None
+
+
+_mediciones = contextvars.ContextVar('innova_metricas_mediciones', default=())
+
+
+def _vista_actual():
+    mediciones = _mediciones.get()
+    if not mediciones:
+        return 'fuera_de_peticion'
+    return mediciones[0].nombre or 'sin_ruta'
+
+
+_ultimo_log_lenta = {}
+
+
+def _registrar_lenta(sql, params, segundos):
+    registro.incrementar('consultas_lentas_total', {'vista': _vista_actual()})
+    ahora = time.monotonic()
+    if ahora - _ultimo_log_lenta.get(sql, -INTERVALO_LOG_LENTAS) < INTERVALO_LOG_LENTAS:
+        return
+    if len(_ultimo_log_lenta) > 1000:
+        # Sentencias con listas IN de largo variable: no dejar crecer el registro
+        _ultimo_log_lenta.clear()
+    _ultimo_log_lenta[sql] = ahora
+    logger.warning(
+        'Consulta lenta (%.0f ms) en %s: %s | params=%r',
+        segundos * 1000, _vista_actual(), sql, params,
+    )
+
+
+def _envoltura_db(execute, sql, params, many, context):
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        segundos = time.perf_counter() - inicio
+        for medicion in _mediciones.get():
+            medicion.consultas += 1
+            medicion.segundos_db += segundos
+        if segundos * 1000 >= _ajuste('METRICAS_CONSULTA_LENTA_MS', 200):
+            _registrar_lenta(sql, params, segundos)
+
+
+def registrar_cache(nombre, acierto):
+    """Para las cachés de la aplicación (snapshot del mapa, mapa de códigos, ...)"""
+    registro.incrementar('cache_total', {
+        'cache': nombre,
+        'resultado': 'acierto' if acierto else 'fallo',
+        'vista': _vista_actual(),
+    })
+
+
+class medir(ContextDecorator):
+    """
+    Mide un bloque de código como decorador (`@medir('snapshot_lotes')`) o con
+    `with medir('...')`: tiempo y consultas quedan en `innova_bloque_*`.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def _recreate_cm(self):
+        # Como decorador, una instancia nueva por llamada (llamadas concurrentes o anidadas)
+        return type(self)(self.nombre)
+
+    def __enter__(self):
+        self._medicion = Medicion(self.nombre)
+        self._token = _mediciones.set(_mediciones.get() + (self._medicion,))
+        self._envoltura = connection.execute_wrapper(_envoltura_db)
+        # Si una petición ya instaló la envoltura en esta conexión no se duplica
+        if _envoltura_db not in connection.execute_wrappers:
+            self._envoltura.__enter__()
+        else:
+            self._envoltura = None
+        self._inicio = time.perf_counter()
+        return self._medicion
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._inicio
+        if self._envoltura is not None:
+            self._envoltura.__exit__(*exc)
+        _mediciones.reset(self._token)
+        registro.observar('bloque_duracion_segundos', {'bloque': self.nombre}, segundos)
+        registro.observar('bloque_consultas', {'bloque': self.nombre}, self._medicion.consultas)
+        return False
+
+
+# ==============================
+# MIDDLEWARE
+# ==============================
+def _nombre_vista(request):
+    """Ruta de la URL (p. ej. api/admin/clientes/obtener/<uuid:cliente_id>/): pocas etiquetas distintas"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    return coincidencia.route or coincidencia.view_name
+
+
+def _bytes_respuesta(response):
+    if getattr(response, 'streaming', False):
+        return None
+    return len(response.content)
+
+
+class MiddlewareMetricas:
+    """
+    Registra por vista la duración, las consultas, el tiempo en la base de datos,
+    los bytes de la respuesta y el código de estado. Bajo ASGI las vistas
+    asíncronas (canal SSE) solo registran duración y estado: sus consultas se
+    ejecutan en otros hilos, con otras conexiones. En las respuestas streaming
+    (exportaciones) el cuerpo se genera después de salir del middleware, así
+    que solo cuenta el tiempo hasta el primer byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        medicion = Medicion(None)
+        token = _mediciones.set((medicion,))
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_envoltura_db):
+                response = self.get_response(request)
+        finally:
+            _mediciones.reset(token)
+        self._registrar(request, response, time.perf_counter() - inicio, medicion)
+        if medicion.presupuesto is not None and medicion.consultas > medicion.presupuesto:
+            excedido(_nombre_vista(request), medicion.consultas, medicion.presupuesto)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # La ruta ya está resuelta: las consultas lentas y la caché se atribuyen a la vista
+        mediciones = _mediciones.get()
+        if mediciones:
+            mediciones[0].nombre = _nombre_vista(request)
+            mediciones[0].presupuesto = presupuesto_de(view_func)
+        return None
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio, None)
+        return response
+
+    def _registrar(self, request, response, segundos, medicion):
+        vista = _nombre_vista(request)
+        etiquetas = {'vista': vista}
+        registro.observar('vista_duracion_segundos', etiquetas, segundos)
+        if medicion is not None:
+            registro.observar('vista_consultas', etiquetas, medicion.consultas)
+            registro.observar('vista_db_segundos', etiquetas, medicion.segundos_db)
+        tamano = _bytes_respuesta(response)
+        if tamano is not None:
+            registro.observar('vista_bytes_respuesta', etiquetas, tamano)
+        registro.incrementar('peticiones_total', {'vista': vista, 'codigo': response.status_code})
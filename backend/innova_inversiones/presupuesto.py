@@ -0,0 +1,70 @@
+"""
+Presupuesto de consultas SQL por vista.
+
+    @presupuesto_consultas(2)
+    @api_view(['GET'])
+    @permission_classes([AllowAny])
+    def ListarClientes(request): ...
+
+El decorador solo anota la vista (va encima de `@api_view`; los decoradores
+con `functools.wraps` que queden más afuera conservan la anotación). Quien
+controla es `MiddlewareMetricas`, que ya cuenta las consultas de cada
+petición: si una vista supera su presupuesto se incrementa
+`innova_presupuesto_excedido_total{vista}` y, solo con DEBUG, se actúa según
+`PRESUPUESTO_CONSULTAS`:
+
+    avisar   (por defecto) warning en el logger `innova.metricas`
+    error    lanza `PresupuestoExcedido` (la petición termina en 500)
+    ignorar  no hace nada
+
+En las pruebas, `innova_inversiones.pruebas.PresupuestoConsultasMixin` hace
+la petición y falla si se supera el presupuesto declarado, listando el SQL.
+El presupuesto es un máximo fijo: un N+1 lo rompe en cuanto los datos de la
+prueba tienen más filas que el presupuesto.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger('innova.metricas')
+
+ATRIBUTO = 'presupuesto_consultas'
+ACCIONES = ('avisar', 'error', 'ignorar')
+
+
+class PresupuestoExcedido(AssertionError):
+    pass
+
+
+def presupuesto_consultas(maximo):
+    """Declara el máximo de consultas SQL de una vista (función o clase)"""
+    def decorador(vista):
+        setattr(vista, ATRIBUTO, maximo)
+        return vista
+    return decorador
+
+
+def presupuesto_de(vista):
+    """Presupuesto declarado o None; en `as_view()` de una clase se busca en `vista.cls`"""
+    maximo = getattr(vista, ATRIBUTO, None)
+    if maximo is None:
+        maximo = getattr(getattr(vista, 'cls', None), ATRIBUTO, None)
+    return maximo
+
+
+def mensaje(vista, consultas, maximo):
+    return f'{vista} hizo {consultas} consultas SQL (presupuesto {maximo})'
+
+
+def excedido(vista, consultas, maximo):
+    """Llamada por el middleware cuando una petición supera el presupuesto"""
+    from .metricas import registro
+
+    registro.incrementar('presupuesto_excedido_total', {'vista': vista})
+    if not settings.DEBUG:
+        return
+    accion = getattr(settings, 'PRESUPUESTO_CONSULTAS', 'avisar')
+    if accion == 'error':
+        raise PresupuestoExcedido(mensaje(vista, consultas, maximo))
+    if accion == 'avisar':
+        logger.warning(mensaje(vista, consultas, maximo))
@@ -0,0 +1,32 @@
+"""
+Utilidades para las pruebas (TestCase) del proyecto.
+"""
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .presupuesto import mensaje, presupuesto_de
+
+
+class PresupuestoConsultasMixin:
+    """
+    Para `TestCase`: `assertPresupuesto('get', url, ...)` hace la petición con
+    `self.client` y falla si la vista supera el presupuesto declarado con
+    `@presupuesto_consultas` (o si no declara ninguno).
+    """
+
+    def assertPresupuesto(self, metodo, url, *args, **kwargs):
+        coincidencia = resolve(urlsplit(url).path)
+        maximo = presupuesto_de(coincidencia.func)
+        if maximo is None:
+            self.fail(f'{coincidencia.view_name} no declara @presupuesto_consultas')
+
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = getattr(self.client, metodo)(url, *args, **kwargs)
+
+        if len(capturadas) > maximo:
+            sql = '\n'.join(f'{i}. {consulta["sql"]}' for i, consulta in enumerate(capturadas, start=1))
+            self.fail(f'{mensaje(coincidencia.view_name, len(capturadas), maximo)}:\n{sql}')
+        return respuesta
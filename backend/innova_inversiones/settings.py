@@ -68,6 +68,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Debe ir antes de CommonMiddleware
     'django.middleware.security.SecurityMiddleware',
+    'innova_inversiones.metricas.MiddlewareMetricas',  # Tiempo, consultas y bytes por vista (/api/admin/metrics/)
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -217,12 +218,26 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 # Cache Configuration (usar memoria local para pruebas sin Redis)
+# Con varios workers de gunicorn definir CACHE_URL (p. ej. redis://...) para que
+# la invalidación del snapshot del mapa se comparta entre procesos.
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-innova-cache',
-    }
+    'default': env.cache('CACHE_URL', default='locmemcache://unique-innova-cache'),
 }
+# Plano de lotes (apps.maps.snapshot): segundos que se reutiliza la versión calculada
+# desde la BD antes de volver a consultarla, y vida máxima de cada snapshot en caché
+MAPS_VERSION_TTL = env.int('MAPS_VERSION_TTL', default=5)
+MAPS_SNAPSHOT_TTL = env.int('MAPS_SNAPSHOT_TTL', default=3600)
+# Backend del canal SSE de lotes (apps.maps.eventos). Con varios workers ASGI usar
+# 'apps.maps.eventos.BackendCache' junto con una CACHE_URL compartida.
+MAPS_EVENTOS_BACKEND = env('MAPS_EVENTOS_BACKEND', default='apps.maps.eventos.BackendLocal')
+
+# Métricas por vista (innova_inversiones.metricas): umbral de consulta lenta y
+# tamaño de la ventana de observaciones para los percentiles
+METRICAS_CONSULTA_LENTA_MS = env.int('METRICAS_CONSULTA_LENTA_MS', default=200)
+METRICAS_VENTANA = env.int('METRICAS_VENTANA', default=1024)
+# Con DEBUG, qué hacer si una vista supera su @presupuesto_consultas: avisar, error o ignorar
+PRESUPUESTO_CONSULTAS = env('PRESUPUESTO_CONSULTAS', default='avisar')
+
 # Logging de base de datos (solo si DEBUG=True)
 if DEBUG:
     LOGGING = {
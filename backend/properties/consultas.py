@@ -0,0 +1,43 @@
+"""
+Planes de consulta de las propiedades.
+
+`PropertyListSerializer` lee la imagen principal de `Property.imagenes_principales`
+y el agente de `select_related`; con `propiedades_para_listado()` una página
+de N propiedades cuesta un número fijo de consultas (COUNT, página e
+imágenes principales) en lugar de 2N + 1. El detalle trae todas las imágenes
+en un prefetch y elige la principal en memoria.
+"""
+from django.db.models import Prefetch
+
+from .models import PropertyImage
+
+ATRIBUTO_IMAGEN_PRINCIPAL = 'imagenes_principales'
+
+
+def prefetch_imagen_principal(relacion='images'):
+    """Solo las imágenes marcadas como principales, en el orden del modelo"""
+    return Prefetch(
+        relacion,
+        queryset=PropertyImage.objects.filter(is_primary=True),
+        to_attr=ATRIBUTO_IMAGEN_PRINCIPAL,
+    )
+
+
+def propiedades_para_listado(queryset):
+    """Queryset listo para serializar con `PropertyListSerializer`"""
+    return queryset.select_related('agent').prefetch_related(prefetch_imagen_principal())
+
+
+def propiedades_para_detalle(queryset):
+    """Queryset listo para serializar con `PropertySerializer`"""
+    return queryset.select_related('agent').prefetch_related('images')
+
+
+def imagen_principal(propiedad):
+    """Primera imagen principal usando el prefetch disponible; sin prefetch, una consulta"""
+    principales = getattr(propiedad, ATRIBUTO_IMAGEN_PRINCIPAL, None)
+    if principales is not None:
+        return principales[0] if principales else None
+    if 'images' in getattr(propiedad, '_prefetched_objects_cache', {}):
+        return next((imagen for imagen in propiedad.images.all() if imagen.is_primary), None)
+    return propiedad.images.filter(is_primary=True).first()
@@ -0,0 +1,232 @@
+"""
+Búsqueda geográfica de propiedades sobre un geohash.
+
+Cada propiedad con coordenadas guarda su geohash (`Property.geohash`, base 32,
+`PRECISION` caracteres). Las celdas del geohash son rectángulos anidados: todas
+las propiedades de una celda comparten el prefijo, y un prefijo es un rango
+contiguo del índice (`geohash >= '6mc' AND geohash < '6md'`). Así:
+
+    caja del mapa   → pocas celdas que la cubren → rangos sobre el índice
+                      (is_active, geohash) + filtro exacto de lat/lng
+    radio / cercanas → la caja que contiene el círculo, los `MAX_CANDIDATAS`
+                      más próximos (orden aproximado en SQL) y distancia
+                      haversine en memoria sobre ellos
+    agrupación       → GROUP BY prefijo del geohash según el zoom, en SQL
+
+Funciona igual en SQLite y PostgreSQL, sin PostGIS.
+"""
+import math
+
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q
+from django.db.models.functions import Abs, Cast, Least, Substr
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9           # ~5 m
+MAX_CELDAS = 24         # celdas por caja: más celdas son más rangos en el WHERE
+MAX_CANDIDATAS = 2000   # filas leídas por búsqueda de cercanas
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = 111.32
+
+# Zoom del mapa (estilo web mercator) → precisión del geohash para agrupar
+PRECISION_POR_ZOOM = ((3, 1), (5, 2), (8, 3), (10, 4), (13, 5), (15, 6), (17, 7))
+
+
+class ParametroGeoInvalido(ValueError):
+    pass
+
+
+# ==============================
+# GEOHASH
+# ==============================
+def codificar(latitud, longitud, precision=PRECISION):
+    latitud, longitud = float(latitud), float(longitud)
+    rango_lat, rango_lng = [-90.0, 90.0], [-180.0, 180.0]
+    caracteres, bits, valor, par = [], 0, 0, True
+    while len(caracteres) < precision:
+        rango, coordenada = (rango_lng, longitud) if par else (rango_lat, latitud)
+        medio = (rango[0] + rango[1]) / 2
+        valor <<= 1
+        if coordenada >= medio:
+            valor |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            caracteres.append(BASE32[valor])
+            bits, valor = 0, 0
+    return ''.join(caracteres)
+
+
+def tamano_celda(precision):
+    """(alto, ancho) en grados de una celda de la precisión dada"""
+    bits = precision * 5
+    bits_lng = (bits + 1) // 2
+    bits_lat = bits // 2
+    return 180.0 / (2 ** bits_lat), 360.0 / (2 ** bits_lng)
+
+
+def siguiente_prefijo(prefijo):
+    """Menor cadena mayor que todas las que empiezan con `prefijo` (None si no hay)"""
+    while prefijo:
+        posicion = BASE32.index(prefijo[-1])
+        if posicion + 1 < len(BASE32):
+            return prefijo[:-1] + BASE32[posicion + 1]
+        prefijo = prefijo[:-1]
+    return None
+
+
+def celdas_de_caja(sur, oeste, norte, este, max_celdas=MAX_CELDAS):
+    """Prefijos que cubren la caja, con la mayor precisión que no supere `max_celdas`"""
+    elegidas = {''}
+    for precision in range(1, PRECISION + 1):
+        alto, ancho = tamano_celda(precision)
+        filas = math.floor(norte / alto) - math.floor(sur / alto) + 1
+        columnas = math.floor(este / ancho) - math.floor(oeste / ancho) + 1
+        if filas * columnas > max_celdas:
+            break
+        elegidas = {
+            codificar(min(sur + i * alto, norte), min(oeste + j * ancho, este), precision)
+            for i in range(filas + 1)
+            for j in range(columnas + 1)
+        }
+    return sorted(elegidas)
+
+
+def _q_celdas(celdas):
+    condicion = Q()
+    for celda in celdas:
+        if not celda:
+            return Q(geohash__gt='')
+        rango = Q(geohash__gte=celda)
+        siguiente = siguiente_prefijo(celda)
+        if siguiente:
+            rango &= Q(geohash__lt=siguiente)
+        condicion |= rango
+    return condicion
+
+
+# ==============================
+# CONSULTAS
+# ==============================
+def leer_caja(texto):
+    """'oeste,sur,este,norte' (el orden de los bbox de GeoJSON)"""
+    try:
+        oeste, sur, este, norte = (float(valor) for valor in texto.split(','))
+    except (AttributeError, ValueError):
+        raise ParametroGeoInvalido('bbox debe ser "oeste,sur,este,norte" en grados')
+    if not (-90 <= sur <= norte <= 90) or not (-180 <= oeste <= 180 and -180 <= este <= 180):
+        raise ParametroGeoInvalido('bbox fuera de rango (latitud -90..90, longitud -180..180)')
+    return sur, oeste, norte, este
+
+
+def filtrar_caja(queryset, sur, oeste, norte, este):
+    """Propiedades dentro de la caja; si cruza el antimeridiano (oeste > este) se parte en dos"""
+    if oeste > este:
+        return filtrar_caja(queryset, sur, oeste, norte, 180.0) | filtrar_caja(queryset, sur, -180.0, norte, este)
+    return queryset.filter(
+        _q_celdas(celdas_de_caja(sur, oeste, norte, este)),
+        latitude__range=(sur, norte),
+        longitude__range=(oeste, este),
+    )
+
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (math.radians(float(v)) for v in (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caja_de_radio(latitud, longitud, radio_km):
+    delta_lat = radio_km / KM_POR_GRADO
+    coseno = math.cos(math.radians(latitud))
+    delta_lng = 180.0 if coseno < 1e-6 else min(180.0, radio_km / (KM_POR_GRADO * coseno))
+    sur, norte = max(-90.0, latitud - delta_lat), min(90.0, latitud + delta_lat)
+    if delta_lng >= 180.0:
+        return sur, -180.0, norte, 180.0
+    oeste, este = longitud - delta_lng, longitud + delta_lng
+    # Normaliza a -180..180; oeste > este indica que la caja cruza el antimeridiano
+    oeste = oeste + 360 if oeste < -180 else oeste
+    este = este - 360 if este > 180 else este
+    return sur, oeste, norte, este
+
+
+def por_cercania(queryset, latitud, longitud):
+    """
+    Ordena por distancia aproximada en SQL: diferencia de grados con la
+    longitud escalada por el coseno de la latitud (y la vuelta corta por el
+    antimeridiano). Basta para elegir los candidatos; la distancia exacta se
+    calcula después en memoria.
+    """
+    escala = max(math.cos(math.radians(latitud)), 0.01) ** 2
+    delta_lat = Cast('latitude', FloatField()) - latitud
+    delta_lng = Abs(Cast('longitude', FloatField()) - longitud)
+    delta_lng = Least(delta_lng, 360.0 - delta_lng)
+    return queryset.annotate(
+        cercania=delta_lat * delta_lat + delta_lng * delta_lng * escala
+    ).order_by(F('cercania').asc())
+
+
+def cercanas(queryset, latitud, longitud, radio_km=None, limite=20, radio_maximo_km=200.0):
+    """
+    [(propiedad, distancia_km)] ordenadas por distancia. Con `radio_km` (como
+    mucho `radio_maximo_km`) solo las de dentro del círculo; sin radio, las
+    `limite` más cercanas buscando en radios crecientes hasta `radio_maximo_km`.
+    Cada búsqueda lee a lo sumo `MAX_CANDIDATAS` filas, las más próximas.
+    """
+    radio = min(radio_km, radio_maximo_km) if radio_km is not None else 1.0
+    while True:
+        candidatas = por_cercania(
+            filtrar_caja(queryset, *caja_de_radio(latitud, longitud, radio)), latitud, longitud
+        )[:MAX_CANDIDATAS]
+        dentro = sorted(
+            (
+                (propiedad, distancia_km(latitud, longitud, propiedad.latitude, propiedad.longitude))
+                for propiedad in candidatas
+            ),
+            key=lambda par: par[1],
+        )
+        dentro = [(propiedad, distancia) for propiedad, distancia in dentro if distancia <= radio]
+        # Con `limite` resultados dentro del radio ya son las más cercanas
+        if radio_km is not None or len(dentro) >= limite or radio >= radio_maximo_km:
+            return dentro[:limite]
+        radio = min(radio * 4, radio_maximo_km)
+
+
+def precision_para_zoom(zoom):
+    for zoom_maximo, precision in PRECISION_POR_ZOOM:
+        if zoom <= zoom_maximo:
+            return precision
+    return PRECISION - 1
+
+
+def agrupar(queryset, precision):
+    """Un grupo por celda: cantidad, centro medio y rango de precios, calculado en SQL"""
+    grupos = (
+        queryset.order_by()
+        .annotate(celda=Substr('geohash', 1, precision))
+        .values('celda')
+        .annotate(
+            cantidad=Count('id'),
+            latitud=Avg('latitude'),
+            longitud=Avg('longitude'),
+            precio_min=Min('price'),
+            precio_max=Max('price'),
+            id_unico=Min('id'),
+        )
+        .order_by('-cantidad')
+    )
+    return [
+        {
+            'geohash': grupo['celda'],
+            'count': grupo['cantidad'],
+            'latitude': round(float(grupo['latitud']), 6),
+            'longitude': round(float(grupo['longitud']), 6),
+            'min_price': grupo['precio_min'],
+            'max_price': grupo['precio_max'],
+            # Con una sola propiedad el mapa puede mostrarla directamente
+            'property_id': grupo['id_unico'] if grupo['cantidad'] == 1 else None,
+        }
+        for grupo in grupos
+    ]
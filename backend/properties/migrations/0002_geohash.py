@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+from properties.geo import codificar
+
+
+def poblar_geohash(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    propiedades = []
+    for propiedad in Property.objects.filter(latitude__isnull=False, longitude__isnull=False).iterator(chunk_size=2000):
+        propiedad.geohash = codificar(propiedad.latitude, propiedad.longitude)
+        propiedades.append(propiedad)
+    Property.objects.bulk_update(propiedades, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12, verbose_name='Geohash'),
+        ),
+        migrations.RunPython(poblar_geohash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_active', 'geohash'], name='property_activa_geohash_idx'),
+        ),
+    ]
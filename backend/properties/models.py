@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from . import geo
+
 # Create your models here.
 
 class Property(models.Model):
@@ -45,6 +47,8 @@ class Property(models.Model):
     city = models.CharField(max_length=100, verbose_name='Ciudad')
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name='Latitud')
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name='Longitud')
+    # Celda geohash de (latitude, longitude) para búsquedas en mapa; ver properties/geo.py
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False, verbose_name='Geohash')
     
     # Características adicionales
     has_garden = models.BooleanField(default=False, verbose_name='Jardín')
@@ -68,6 +72,9 @@ class Property(models.Model):
         verbose_name = 'Propiedad'
         verbose_name_plural = 'Propiedades'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'geohash'], name='property_activa_geohash_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.address}"
@@ -76,6 +83,11 @@ class Property(models.Model):
         # Calcular precio por m² automáticamente
         if self.price and self.area_sqm:
             self.price_per_sqm = self.price / self.area_sqm
+        # Las escrituras con queryset.update() deben recalcularlo con geo.codificar
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.codificar(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
         super().save(*args, **kwargs)
 
 
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Property, PropertyImage, Favorite, Contact
 from django.contrib.auth.models import User
+from .consultas import imagen_principal
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -34,7 +35,8 @@ class PropertySerializer(serializers.ModelSerializer):
         read_only_fields = ['price_per_sqm', 'created_at', 'updated_at']
     
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        # Con `consultas.propiedades_para_detalle()` se elige entre las imágenes ya leídas
+        primary_image = imagen_principal(obj)
         if primary_image:
             return PropertyImageSerializer(primary_image).data
         return None
@@ -54,7 +56,8 @@ class PropertyListSerializer(serializers.ModelSerializer):
         ]
     
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        # Usa el prefetch de `consultas.propiedades_para_listado()` si está disponible
+        primary_image = imagen_principal(obj)
         if primary_image:
             return {
                 'id': primary_image.id,
@@ -1,3 +1,158 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from innova_inversiones.pruebas import PresupuestoConsultasMixin
+
+from . import geo
+from .models import Property, PropertyImage
+
+
+class PropertyListQueryCountTest(PresupuestoConsultasMixin, TestCase):
+    """
+    Regresión del N+1 de `get_primary_image` / `get_agent_name`: el número de
+    consultas no debe crecer con la cantidad de propiedades.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            agente = User.objects.create(username=f'agente{i}', first_name='Ángel', last_name=f'Núñez {i}')
+            propiedad = Property.objects.create(
+                title=f'Casa {i}', description='-', property_type='house', price=100000 + i,
+                area_sqm=120, address=f'Av. Perú {i}', neighborhood='Centro', city='Piura',
+                agent=agente, is_featured=i % 2 == 0,
+            )
+            PropertyImage.objects.create(property=propiedad, image=f'properties/{i}-b.jpg', order=2)
+            PropertyImage.objects.create(property=propiedad, image=f'properties/{i}-a.jpg', is_primary=True, order=1)
+        cls.propiedad = Property.objects.get(title='Casa 0')
+
+    def test_listado_paginado(self):
+        # COUNT + página + imágenes principales
+        with self.assertNumQueries(3):
+            response = self.assertPresupuesto('get', '/api/properties/')
+        resultados = response.json()['results']
+        self.assertEqual(len(resultados), 20)
+        self.assertTrue(resultados[0]['primary_image']['image'].endswith('-a.jpg'))
+        self.assertTrue(resultados[0]['agent_name'].startswith('Ángel Núñez'))
+
+    def test_destacadas_y_busqueda(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/properties/featured/')
+        self.assertEqual(len(response.json()), 13)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/properties/search/', {'q': 'casa'})
+        self.assertEqual(len(response.json()), 25)
+        self.assertIsNotNone(response.json()[0]['primary_image'])
+
+    def test_detalle(self):
+        # Propiedad con su agente + todas sus imágenes
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/properties/{self.propiedad.id}/')
+        datos = response.json()
+        self.assertEqual(len(datos['images']), 2)
+        self.assertTrue(datos['primary_image']['image'].endswith('0-a.jpg'))
+        self.assertEqual(datos['agent']['username'], 'agente0')
+
+
+class PropertyGeoSearchTest(PresupuestoConsultasMixin, TestCase):
+    """Búsqueda por caja, radio y agrupación sobre el geohash"""
+
+    PUNTOS = {
+        'Plaza de Armas Piura': (-5.194490, -80.632820),
+        'Catacaos': (-5.265680, -80.675430),
+        'Sullana': (-4.903610, -80.685280),
+        'Miraflores Lima': (-12.121910, -77.029690),
+        'Fiyi': (-17.713371, 178.065032),
+        'Samoa': (-13.759029, -172.104629),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        agente = User.objects.create(username='agente')
+        for titulo, (latitud, longitud) in cls.PUNTOS.items():
+            Property.objects.create(
+                title=titulo, description='-', property_type='land', price=50000, area_sqm=200,
+                address='-', neighborhood='-', city='-', agent=agente,
+                latitude=latitud, longitude=longitud,
+            )
+        Property.objects.create(
+            title='Sin coordenadas', description='-', property_type='land', price=50000, area_sqm=200,
+            address='-', neighborhood='-', city='Piura', agent=agente,
+        )
+
+    def titulos(self, filas):
+        return sorted(fila['title'] for fila in filas)
+
+    def test_geohash(self):
+        self.assertEqual(geo.codificar(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(Property.objects.get(title='Sin coordenadas').geohash, '')
+        self.assertEqual(geo.siguiente_prefijo('6mz'), '6n')
+        self.assertIsNone(geo.siguiente_prefijo('zz'))
+
+    def test_caja(self):
+        response = self.assertPresupuesto('get', '/api/properties/map/', {'bbox': '-81,-5.5,-80.5,-4.8'})
+        self.assertEqual(
+            self.titulos(response.json()['results']), ['Catacaos', 'Plaza de Armas Piura', 'Sullana']
+        )
+        self.assertFalse(response.json()['truncated'])
+
+        response = self.client.get('/api/properties/map/', {'bbox': '-81,-5.5,-80.5,-4.8', 'limit': 2})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertTrue(response.json()['truncated'])
+
+    def test_caja_cruza_antimeridiano(self):
+        response = self.client.get('/api/properties/map/', {'bbox': '170,-20,-170,-10'})
+        self.assertEqual(self.titulos(response.json()['results']), ['Fiyi', 'Samoa'])
+
+    def test_caja_invalida(self):
+        self.assertEqual(self.client.get('/api/properties/map/').status_code, 400)
+        self.assertEqual(self.client.get('/api/properties/map/', {'bbox': '0,10,1,5'}).status_code, 400)
+
+    def test_cercanas(self):
+        response = self.client.get(
+            '/api/properties/nearby/', {'lat': -5.19, 'lng': -80.63, 'radius_km': 15}
+        )
+        datos = response.json()
+        self.assertEqual([fila['title'] for fila in datos], ['Plaza de Armas Piura', 'Catacaos'])
+        self.assertLess(datos[0]['distance_km'], datos[1]['distance_km'])
+
+        # Sin radio: las N más cercanas ampliando la búsqueda
+        response = self.client.get('/api/properties/nearby/', {'lat': -5.19, 'lng': -80.63, 'limit': 3})
+        self.assertEqual(
+            [fila['title'] for fila in response.json()], ['Plaza de Armas Piura', 'Catacaos', 'Sullana']
+        )
+        self.assertEqual(self.client.get('/api/properties/nearby/', {'lat': 95, 'lng': 0}).status_code, 400)
+
+    def test_radio_acotado(self):
+        for radio in ('inf', 'nan', '-1', '1e999'):
+            response = self.client.get('/api/properties/nearby/', {'lat': -5.19, 'lng': -80.63, 'radius_km': radio})
+            self.assertEqual(response.status_code, 400, radio)
+
+        # Un radio enorme se limita a RADIO_MAXIMO_KM: Lima queda fuera
+        response = self.client.get('/api/properties/nearby/', {'lat': -5.19, 'lng': -80.63, 'radius_km': 100000})
+        self.assertEqual(self.titulos(response.json()), ['Catacaos', 'Plaza de Armas Piura', 'Sullana'])
+
+    def test_candidatas_acotadas(self):
+        # Solo se leen las más próximas, no todas las de la caja
+        with mock.patch.object(geo, 'MAX_CANDIDATAS', 2):
+            response = self.client.get('/api/properties/nearby/', {'lat': -5.19, 'lng': -80.63, 'radius_km': 50})
+        self.assertEqual([fila['title'] for fila in response.json()], ['Plaza de Armas Piura', 'Catacaos'])
+
+        # La vuelta corta por el antimeridiano también cuenta como próxima
+        with mock.patch.object(geo, 'MAX_CANDIDATAS', 1):
+            cercanas = geo.cercanas(Property.objects.all(), -17.7, -179.9, radio_km=1000, radio_maximo_km=1000)
+        self.assertEqual([propiedad.title for propiedad, _ in cercanas], ['Fiyi'])
+
+    def test_agrupacion(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/properties/clusters/', {'bbox': '-82,-13,-76,-4', 'zoom': 5})
+        grupos = response.json()['clusters']
+        self.assertEqual(sum(grupo['count'] for grupo in grupos), 4)
+        self.assertEqual(response.json()['precision'], 2)
+
+        response = self.client.get('/api/properties/clusters/', {'bbox': '-82,-13,-76,-4', 'zoom': 14})
+        grupos = response.json()['clusters']
+        self.assertEqual(len(grupos), 4)
+        self.assertTrue(all(grupo['property_id'] for grupo in grupos))
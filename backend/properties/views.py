@@ -1,3 +1,5 @@
+import math
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -6,6 +8,9 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from .models import Property, PropertyImage, Favorite, Contact
+from .consultas import prefetch_imagen_principal, propiedades_para_detalle, propiedades_para_listado
+from . import geo
+from innova_inversiones.presupuesto import presupuesto_consultas
 from .serializers import (
     PropertySerializer, PropertyListSerializer, PropertyCreateSerializer,
     PropertyImageSerializer, PropertyImageCreateSerializer,
@@ -13,6 +18,47 @@ from .serializers import (
 )
 
 
+LIMITE_MAPA = 500
+LIMITE_CERCANAS = 100
+RADIO_MAXIMO_KM = 200.0
+
+
+def _entero(valor, por_defecto, maximo, minimo=1):
+    if valor in (None, ''):
+        return por_defecto
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise geo.ParametroGeoInvalido(f'se esperaba un entero y llegó "{valor}"')
+    if valor < minimo:
+        raise geo.ParametroGeoInvalido(f'se esperaba un entero mayor o igual que {minimo}')
+    return min(valor, maximo)
+
+
+def _coordenada(valor, limite, nombre):
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise geo.ParametroGeoInvalido(f'{nombre} es obligatorio y debe ser un número')
+    if not -limite <= valor <= limite:
+        raise geo.ParametroGeoInvalido(f'{nombre} debe estar entre -{limite} y {limite}')
+    return valor
+
+
+def _decimal_positivo(valor, nombre):
+    try:
+        valor = float(valor)
+    except ValueError:
+        raise geo.ParametroGeoInvalido(f'{nombre} debe ser un número')
+    if not math.isfinite(valor):
+        raise geo.ParametroGeoInvalido(f'{nombre} debe ser un número finito')
+    if valor <= 0:
+        raise geo.ParametroGeoInvalido(f'{nombre} debe ser mayor que 0')
+    return valor
+
+
+# Listado paginado: COUNT, página e imágenes principales; +2 de sesión y usuario con login
+@presupuesto_consultas(5)
 class PropertyViewSet(viewsets.ModelViewSet):
     queryset = Property.objects.filter(is_active=True)
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -53,6 +99,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
         if bathrooms:
             queryset = queryset.filter(bathrooms__gte=bathrooms)
         
+        # Agente e imágenes en consultas fijas, no una por propiedad
+        if self.action in ('list', 'featured', 'search', 'map', 'nearby'):
+            return propiedades_para_listado(queryset)
+        if self.action == 'retrieve':
+            return propiedades_para_detalle(queryset)
         return queryset
     
     @action(detail=False, methods=['get'])
@@ -80,6 +131,61 @@ class PropertyViewSet(viewsets.ModelViewSet):
         serializer = PropertyListSerializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def map(self, request):
+        """Propiedades dentro de la vista del mapa (?bbox=oeste,sur,este,norte)"""
+        try:
+            caja = geo.leer_caja(request.query_params.get('bbox'))
+            limite = _entero(request.query_params.get('limit'), LIMITE_MAPA, LIMITE_MAPA)
+        except geo.ParametroGeoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Un registro de más para saber si hay que pedir agrupación al cliente
+        propiedades = list(geo.filtrar_caja(self.get_queryset(), *caja)[:limite + 1])
+        serializer = PropertyListSerializer(propiedades[:limite], many=True)
+        return Response({'truncated': len(propiedades) > limite, 'results': serializer.data})
+
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """Propiedades de la vista del mapa agrupadas por celda según el zoom (?bbox=...&zoom=12)"""
+        try:
+            caja = geo.leer_caja(request.query_params.get('bbox'))
+            zoom = _entero(request.query_params.get('zoom'), None, 22, minimo=0)
+        except geo.ParametroGeoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if zoom is None:
+            return Response({'error': 'zoom es obligatorio'}, status=status.HTTP_400_BAD_REQUEST)
+
+        precision = geo.precision_para_zoom(zoom)
+        grupos = geo.agrupar(geo.filtrar_caja(self.get_queryset(), *caja), precision)
+        return Response({'precision': precision, 'clusters': grupos})
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Propiedades más cercanas a un punto (?lat=&lng=[&radius_km=][&limit=]);
+        radius_km se limita a RADIO_MAXIMO_KM
+        """
+        try:
+            latitud = _coordenada(request.query_params.get('lat'), 90, 'lat')
+            longitud = _coordenada(request.query_params.get('lng'), 180, 'lng')
+            radio = request.query_params.get('radius_km')
+            radio = _decimal_positivo(radio, 'radius_km') if radio not in (None, '') else None
+            limite = _entero(request.query_params.get('limit'), 20, LIMITE_CERCANAS)
+        except geo.ParametroGeoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cercanas = geo.cercanas(
+            self.get_queryset(), latitud, longitud, radio_km=radio, limite=limite, radio_maximo_km=RADIO_MAXIMO_KM
+        )
+        serializer = PropertyListSerializer(
+            [propiedad for propiedad, _ in cercanas], many=True
+        )
+        datos = serializer.data
+        for fila, (_, distancia) in zip(datos, cercanas):
+            fila['distance_km'] = round(distancia, 3)
+        return Response(datos)
+
     @action(detail=True, methods=['post'])
     def add_to_favorites(self, request, pk=None):
         """Agregar propiedad a favoritos"""
@@ -160,7 +266,10 @@ class FavoriteViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        # FavoriteSerializer anida PropertyListSerializer
+        return Favorite.objects.filter(user=self.request.user).select_related(
+            'property__agent'
+        ).prefetch_related(prefetch_imagen_principal('property__images'))
 
 
 class ContactViewSet(viewsets.ModelViewSet):
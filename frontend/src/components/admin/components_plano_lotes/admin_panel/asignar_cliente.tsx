@@ -71,20 +71,12 @@ export default function AsignarCliente({
         
         try {
             setBuscandoClientes(true);
-            const response = await clientesApi.listar();
+            // Type-ahead servido por el índice en memoria del backend (sin tildes ni mayúsculas).
+            // Coincide por inicio de palabra en nombre, apellidos, DNI o teléfono y solo devuelve
+            // clientes activos (antes: subcadena de nombre/apellidos/DNI sobre todos los clientes)
+            const response = await clientesApi.sugerir(termino.trim(), 10);
             const data = response as { count: number; clientes: Cliente[] };
-            const todosClientes = data.clientes || [];
-            
-            const terminoLower = termino.toLowerCase();
-            const terminoOriginal = termino.trim();
-            
-            const filtrados = todosClientes.filter(cliente => {
-                const coincideNombre = cliente.nombre.toLowerCase().includes(terminoLower);
-                const coincideApellidos = cliente.apellidos.toLowerCase().includes(terminoLower);
-                const coincideDNI = cliente.dni?.includes(terminoOriginal) || false;
-                
-                return coincideNombre || coincideApellidos || coincideDNI;
-            });
+            const filtrados = data.clientes || [];
             
             setClientesBusqueda(filtrados.slice(0, 10));
         } catch(e: any) {
@@ -229,7 +221,7 @@ export default function AsignarCliente({
                                         buscarClientes(nuevoValor);
                                     }
                                 }}
-                                placeholder="Buscar por nombre, apellidos o DNI..."
+                                placeholder="Inicio de nombre, apellidos, DNI o teléfono..."
                                 className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 bg-white text-black"
                                 disabled={asignando}
                             />
@@ -1,8 +1,26 @@
+import { useEffect, useState } from 'react';
+import { creditosApi, CarteraPorCobrar } from '@/services';
+
 interface CreditosPorCobrarProps {
     navCollapsed: boolean;
 }
 
+const soles = (valor: number) => `S/ ${valor.toLocaleString('es-PE', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+
 export default function CreditosPorCobrar({ navCollapsed }: CreditosPorCobrarProps) {
+    const [cartera, setCartera] = useState<CarteraPorCobrar | null>(null);
+    const [soloAtrasados, setSoloAtrasados] = useState(false);
+    const [error, setError] = useState<string | null>(null);
+
+    useEffect(() => {
+        creditosApi.porCobrar({ atrasados: soloAtrasados })
+            .then((data) => { setCartera(data); setError(null); })
+            .catch((err) => {
+                console.error('Error al cargar los créditos:', err);
+                setError('Error al cargar los créditos por cobrar');
+            });
+    }, [soloAtrasados]);
+
     return (
         <div className="h-screen w-full">
             <div className={`${navCollapsed ? 'ml-16' : 'ml-[16rem]'} h-screen overflow-auto`}>
@@ -17,11 +35,60 @@ export default function CreditosPorCobrar({ navCollapsed }: CreditosPorCobrarPro
                         <p className="text-gray-500 text-sm px-4 mb-2">Gestión de créditos pendientes</p>
                     </div>
                 </div>
-                <div className="p-4">
-                    <div className="bg-gray-100 rounded-lg p-8 text-center">
-                        <h2 className="text-2xl font-bold text-gray-600 mb-4">Créditos por Cobrar en construcción</h2>
-                        <p className="text-gray-500">Esta sección estará disponible próximamente</p>
-                    </div>
+                <div className="p-4 space-y-4">
+                    {error && <p className="text-red-600">{error}</p>}
+                    {!cartera && !error && <p className="text-gray-400">Cargando...</p>}
+                    {cartera && (
+                        <>
+                            <section className="grid grid-cols-2 lg:grid-cols-4 gap-4">
+                                {[
+                                    ['Créditos', cartera.totales.creditos],
+                                    ['Con atraso', cartera.totales.con_atraso],
+                                    ['Vencido', soles(cartera.totales.monto_vencido)],
+                                    ['Por cobrar', soles(cartera.totales.por_cobrar)],
+                                ].map(([titulo, valor]) => (
+                                    <article key={titulo} className="bg-white border border-gray-200 rounded-lg p-4 shadow-sm">
+                                        <h3 className="text-gray-500 text-xs sm:text-sm">{titulo}</h3>
+                                        <p className="text-xl sm:text-2xl font-bold text-black">{valor}</p>
+                                    </article>
+                                ))}
+                            </section>
+                            <label className="flex items-center gap-2 text-sm text-gray-600">
+                                <input type="checkbox" checked={soloAtrasados} onChange={(e) => setSoloAtrasados(e.target.checked)} />
+                                Solo créditos con cuotas atrasadas
+                            </label>
+                            <div className="bg-white border border-gray-200 rounded-lg shadow-sm overflow-x-auto">
+                                <table className="min-w-full text-sm">
+                                    <thead className="bg-gray-50 text-gray-600">
+                                        <tr>
+                                            <th className="px-3 py-2 text-left">Cliente</th>
+                                            <th className="px-3 py-2 text-left">Lote</th>
+                                            <th className="px-3 py-2 text-right">Cuota</th>
+                                            <th className="px-3 py-2 text-right">Pagadas</th>
+                                            <th className="px-3 py-2 text-right">Atrasadas</th>
+                                            <th className="px-3 py-2 text-right">Vencido</th>
+                                            <th className="px-3 py-2 text-right">Por cobrar</th>
+                                            <th className="px-3 py-2 text-left">Próximo vencimiento</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody>
+                                        {cartera.creditos.map((credito) => (
+                                            <tr key={credito.id} className={`border-t ${credito.cuotas_atrasadas ? 'bg-red-50' : ''}`}>
+                                                <td className="px-3 py-2">{credito.cliente}</td>
+                                                <td className="px-3 py-2">{credito.lote}</td>
+                                                <td className="px-3 py-2 text-right">{soles(credito.cuota)}</td>
+                                                <td className="px-3 py-2 text-right">{credito.cuotas_pagadas}/{credito.cuotas_totales}</td>
+                                                <td className="px-3 py-2 text-right">{credito.cuotas_atrasadas}</td>
+                                                <td className="px-3 py-2 text-right">{soles(credito.monto_vencido)}</td>
+                                                <td className="px-3 py-2 text-right">{soles(credito.por_cobrar)}</td>
+                                                <td className="px-3 py-2">{credito.proximo_vencimiento ?? '-'}</td>
+                                            </tr>
+                                        ))}
+                                    </tbody>
+                                </table>
+                            </div>
+                        </>
+                    )}
                 </div>
             </div>
         </div>
@@ -1,8 +1,34 @@
+import { useEffect, useState } from 'react';
+import { dashboardApi, ResumenDashboard } from '@/services';
+
 interface DashboardProps {
     navCollapsed: boolean;
 }
 
+const soles = (valor: number) => `S/ ${valor.toLocaleString('es-PE', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+
+function Metrica({ titulo, valor }: { titulo: string; valor: string | number }) {
+    return (
+        <article className="bg-white border border-gray-200 rounded-lg p-4 shadow-sm">
+            <h3 className="text-gray-500 text-xs sm:text-sm">{titulo}</h3>
+            <p className="text-xl sm:text-2xl font-bold text-black">{valor}</p>
+        </article>
+    );
+}
+
 export default function Dashboard({ navCollapsed }: DashboardProps) {
+    const [resumen, setResumen] = useState<ResumenDashboard | null>(null);
+    const [error, setError] = useState<string | null>(null);
+
+    useEffect(() => {
+        dashboardApi.resumen()
+            .then(setResumen)
+            .catch((err) => {
+                console.error('Error al cargar el resumen:', err);
+                setError('Error al cargar el resumen del dashboard');
+            });
+    }, []);
+
     return (
         <div className="h-screen w-full">
             <div className={`${navCollapsed ? 'ml-16' : 'ml-[16rem]'} h-screen overflow-auto`}>
@@ -17,11 +43,44 @@ export default function Dashboard({ navCollapsed }: DashboardProps) {
                         <p className="text-gray-500 text-sm px-4 mb-2">Panel de control administrativo</p>
                     </div>
                 </div>
-                <div className="p-4">
-                    <div className="bg-gray-100 rounded-lg p-8 text-center">
-                        <h2 className="text-2xl font-bold text-gray-600 mb-4">Dashboard en construcción</h2>
-                        <p className="text-gray-500">Esta sección estará disponible próximamente</p>
-                    </div>
+                <div className="p-4 space-y-4">
+                    {error && <p className="text-red-600">{error}</p>}
+                    {!resumen && !error && <p className="text-gray-400">Cargando...</p>}
+                    {resumen && (
+                        <>
+                            <section className="grid grid-cols-2 lg:grid-cols-4 gap-4">
+                                <Metrica titulo="Lotes" valor={resumen.lotes.total} />
+                                <Metrica titulo="Valor de inventario" valor={soles(resumen.lotes.valor_inventario)} />
+                                <Metrica titulo="Área vendida (m²)" valor={resumen.lotes.area_vendida.toLocaleString('es-PE')} />
+                                <Metrica titulo="Deudores" valor={resumen.morosidad.deudores} />
+                                <Metrica titulo="Créditos" valor={resumen.cartera.creditos} />
+                                <Metrica titulo="Monto en créditos" valor={soles(resumen.cartera.monto_creditos)} />
+                                <Metrica titulo="Cobrado" valor={soles(resumen.cartera.cobrado)} />
+                                <Metrica titulo="Por cobrar" valor={soles(resumen.cartera.pendiente)} />
+                            </section>
+                            <section className="grid grid-cols-1 md:grid-cols-2 gap-4">
+                                <div className="bg-white border border-gray-200 rounded-lg p-4 shadow-sm">
+                                    <h3 className="font-semibold text-gray-700 mb-2">Lotes por estado</h3>
+                                    {resumen.lotes.por_estado.map((fila) => (
+                                        <div key={fila.estado} className="flex justify-between text-sm py-1 border-b last:border-0">
+                                            <span>{fila.estado_nombre}</span>
+                                            <span>{fila.cantidad} · {soles(fila.valor_inventario)}</span>
+                                        </div>
+                                    ))}
+                                </div>
+                                <div className="bg-white border border-gray-200 rounded-lg p-4 shadow-sm">
+                                    <h3 className="font-semibold text-gray-700 mb-2">Deudores por meses de deuda</h3>
+                                    {resumen.morosidad.por_meses.length === 0 && <p className="text-sm text-gray-400">Sin deudores</p>}
+                                    {resumen.morosidad.por_meses.map((fila) => (
+                                        <div key={fila.meses_deuda} className="flex justify-between text-sm py-1 border-b last:border-0">
+                                            <span>{fila.meses_deuda} {fila.meses_deuda === 1 ? 'mes' : 'meses'}</span>
+                                            <span>{fila.clientes} clientes · {soles(fila.monto_cuotas)}</span>
+                                        </div>
+                                    ))}
+                                </div>
+                            </section>
+                        </>
+                    )}
                 </div>
             </div>
         </div>
@@ -1,6 +1,7 @@
 import ListaClientes from "../../../components/admin/components_gestion_clientes/lista_clientes";
 import TarjetaMetricaCliente from "../../../components/admin/components_gestion_clientes/tarjeta_metrica_cliente";
 import RegistroCliente from "../../../components/admin/components_gestion_clientes/registro_cliente";
+import { clientesApi, clienteLoteApi } from "@/services";
 
 interface GestionClientesProps {
     navCollapsed: boolean;
@@ -20,7 +21,15 @@ export default function GestionClientes({ navCollapsed }: GestionClientesProps)
                         </h1>
                         <p className="text-gray-500 text-sm px-4 mb-2">Administración de clientes</p>
                     </div>
-                    <div className="flex flex-col justify-center items-center pr-4">
+                    <div className="flex flex-row justify-center items-center gap-2 pr-4">
+                        <a href={clientesApi.urlExportar('xlsx')}
+                            className="border border-blue-600 text-blue-600 rounded px-3 py-1 text-sm hover:bg-blue-50">
+                            Exportar clientes
+                        </a>
+                        <a href={clienteLoteApi.urlExportar('xlsx')}
+                            className="border border-blue-600 text-blue-600 rounded px-3 py-1 text-sm hover:bg-blue-50">
+                            Exportar relaciones
+                        </a>
                         <RegistroCliente />
                     </div>
                 </div>
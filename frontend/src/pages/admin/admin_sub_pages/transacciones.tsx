@@ -1,8 +1,43 @@
+import { useEffect, useState } from 'react';
+import { transaccionesApi, Transaccion, FiltrosTransacciones } from '@/services';
+
 interface TransaccionesProps {
     navCollapsed: boolean;
 }
 
+const soles = (valor: number | null) =>
+    valor === null ? '-' : `S/ ${valor.toLocaleString('es-PE', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+
+const TIPOS = ['RESERVA', 'VENTA', 'CUOTA', 'AMORTIZACION'];
+
 export default function Transacciones({ navCollapsed }: TransaccionesProps) {
+    const [filtros, setFiltros] = useState<FiltrosTransacciones>({});
+    const [transacciones, setTransacciones] = useState<Transaccion[]>([]);
+    const [cursor, setCursor] = useState<string | null>(null);
+    const [cargando, setCargando] = useState(false);
+    const [error, setError] = useState<string | null>(null);
+
+    const cargar = (desde: string | null) => {
+        setCargando(true);
+        transaccionesApi.listar(filtros, desde)
+            .then((pagina) => {
+                // Sin cursor es una búsqueda nueva; con cursor se agrega la página siguiente
+                setTransacciones((previas) => desde ? [...previas, ...pagina.transacciones] : pagina.transacciones);
+                setCursor(pagina.next_cursor);
+                setError(null);
+            })
+            .catch((err) => {
+                console.error('Error al cargar las transacciones:', err);
+                setError(err?.response?.data?.error ?? 'Error al cargar las transacciones');
+            })
+            .finally(() => setCargando(false));
+    };
+
+    useEffect(() => { cargar(null); }, [filtros]);
+
+    const cambiarFiltro = (clave: keyof FiltrosTransacciones, valor: string | boolean) =>
+        setFiltros((previos) => ({ ...previos, [clave]: valor || undefined }));
+
     return (
         <div className="h-screen w-full">
             <div className={`${navCollapsed ? 'ml-16' : 'ml-[16rem]'} h-screen overflow-auto`}>
@@ -17,11 +52,81 @@ export default function Transacciones({ navCollapsed }: TransaccionesProps) {
                         <p className="text-gray-500 text-sm px-4 mb-2">Historial y gestión de transacciones</p>
                     </div>
                 </div>
-                <div className="p-4">
-                    <div className="bg-gray-100 rounded-lg p-8 text-center">
-                        <h2 className="text-2xl font-bold text-gray-600 mb-4">Transacciones en construcción</h2>
-                        <p className="text-gray-500">Esta sección estará disponible próximamente</p>
+                <div className="p-4 space-y-4">
+                    <section className="flex flex-wrap items-end gap-3 text-sm">
+                        <label className="flex flex-col text-gray-600">
+                            Lote
+                            <input className="border rounded px-2 py-1" placeholder="a-01"
+                                onBlur={(e) => cambiarFiltro('lote', e.target.value.trim())} />
+                        </label>
+                        <label className="flex flex-col text-gray-600">
+                            Tipo
+                            <select className="border rounded px-2 py-1" value={filtros.tipo ?? ''}
+                                onChange={(e) => cambiarFiltro('tipo', e.target.value)}>
+                                <option value="">Todos</option>
+                                {TIPOS.map((tipo) => <option key={tipo} value={tipo}>{tipo}</option>)}
+                            </select>
+                        </label>
+                        <label className="flex flex-col text-gray-600">
+                            Desde
+                            <input type="date" className="border rounded px-2 py-1"
+                                onChange={(e) => cambiarFiltro('desde', e.target.value)} />
+                        </label>
+                        <label className="flex flex-col text-gray-600">
+                            Hasta
+                            <input type="date" className="border rounded px-2 py-1"
+                                onChange={(e) => cambiarFiltro('hasta', e.target.value)} />
+                        </label>
+                        <label className="flex items-center gap-2 text-gray-600">
+                            <input type="checkbox" checked={!!filtros.archivo}
+                                onChange={(e) => cambiarFiltro('archivo', e.target.checked)} />
+                            Incluir años archivados
+                        </label>
+                        <a href={transaccionesApi.urlExportar(filtros)}
+                            className="ml-auto bg-blue-600 text-white rounded px-3 py-1 hover:bg-blue-700">
+                            Exportar CSV
+                        </a>
+                        <a href={transaccionesApi.urlExportar(filtros, 'xlsx')}
+                            className="bg-blue-600 text-white rounded px-3 py-1 hover:bg-blue-700">
+                            Exportar Excel
+                        </a>
+                    </section>
+                    {error && <p className="text-red-600">{error}</p>}
+                    <div className="bg-white border border-gray-200 rounded-lg shadow-sm overflow-x-auto">
+                        <table className="min-w-full text-sm">
+                            <thead className="bg-gray-50 text-gray-600">
+                                <tr>
+                                    <th className="px-3 py-2 text-left">Fecha</th>
+                                    <th className="px-3 py-2 text-left">Tipo</th>
+                                    <th className="px-3 py-2 text-left">Cliente</th>
+                                    <th className="px-3 py-2 text-left">Lote</th>
+                                    <th className="px-3 py-2 text-left">Método</th>
+                                    <th className="px-3 py-2 text-right">Monto</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                                {transacciones.map((transaccion) => (
+                                    <tr key={transaccion.id} className={`border-t ${transaccion.archivada ? 'text-gray-400' : ''}`}>
+                                        <td className="px-3 py-2">{new Date(transaccion.fecha).toLocaleString('es-PE')}</td>
+                                        <td className="px-3 py-2">{transaccion.tipo ?? '-'}</td>
+                                        <td className="px-3 py-2">{transaccion.cliente}</td>
+                                        <td className="px-3 py-2">{transaccion.lote}</td>
+                                        <td className="px-3 py-2">{transaccion.metodo_pago ?? '-'}</td>
+                                        <td className="px-3 py-2 text-right">{soles(transaccion.monto)}</td>
+                                    </tr>
+                                ))}
+                            </tbody>
+                        </table>
+                        {!cargando && transacciones.length === 0 && !error && (
+                            <p className="text-gray-400 text-center p-4">Sin transacciones</p>
+                        )}
                     </div>
+                    {cursor && (
+                        <button onClick={() => cargar(cursor)} disabled={cargando}
+                            className="bg-gray-100 border rounded px-4 py-2 text-sm hover:bg-gray-200 disabled:opacity-50">
+                            {cargando ? 'Cargando...' : 'Cargar más'}
+                        </button>
+                    )}
                 </div>
             </div>
         </div>
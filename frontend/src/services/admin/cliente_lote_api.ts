@@ -29,4 +29,6 @@ export const clienteLoteApi = {
     asignar: (data: any) => api.post('api/admin/cliente-lote/asignar/', data),
     actualizar: (id: string, data: any) => api.request(`api/admin/cliente-lote/actualizar/${id}/`, { method: 'PATCH', body: JSON.stringify(data) }),
     eliminar: (id: string) => api.delete(`api/admin/cliente-lote/eliminar/${id}/`),
+    // Descarga completa en streaming (se usa en un <a href>)
+    urlExportar: (formato: 'csv' | 'xlsx' = 'csv') => api.url(`api/admin/cliente-lote/exportar/?formato=${formato}`),
 };
\ No newline at end of file
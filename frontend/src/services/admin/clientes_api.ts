@@ -2,6 +2,18 @@ import { api } from '../api_base';
 
 export const clientesApi = {
   listar: () => api.get('api/admin/clientes/listar/'),
+  // Paginación por cursor: la respuesta incluye next_cursor (null en la última página)
+  listarPagina: (params: { limit?: number; cursor?: string | null; search?: string; fields?: string[]; count?: 'exact' | 'estimate' | 'none' } = {}) => {
+    const query = new URLSearchParams();
+    query.append('limit', String(params.limit ?? 50));
+    if (params.cursor) query.append('cursor', params.cursor);
+    if (params.search) query.append('search', params.search);
+    if (params.fields) query.append('fields', params.fields.join(','));
+    if (params.count) query.append('count', params.count);
+    return api.get(`api/admin/clientes/listar/?${query.toString()}`);
+  },
+  sugerir: (q: string, limit: number = 10) =>
+    api.get(`api/admin/clientes/sugerir/?q=${encodeURIComponent(q)}&limit=${limit}`),
   crear: (data: any) => api.post('api/admin/clientes/crear/', data),
   obtener: (id: string) => api.get(`api/admin/clientes/obtener/${id}/`),
   actualizar: (id: string, data: any) => api.request(`api/admin/clientes/actualizar/${id}/`, { method: 'PATCH', body: JSON.stringify(data) }),
@@ -12,4 +24,6 @@ export const clientesApi = {
     return api.delete(url);
   },
   activar: (id: string) => api.put(`api/admin/clientes/activar/${id}/`, {}),
+  // Descarga completa en streaming (se usa en un <a href>)
+  urlExportar: (formato: 'csv' | 'xlsx' = 'csv') => api.url(`api/admin/clientes/exportar/?formato=${formato}`),
 };
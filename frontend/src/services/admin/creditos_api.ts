@@ -0,0 +1,40 @@
+import { api } from '../api_base';
+
+export interface CreditoPorCobrar {
+  id: string;
+  cliente_id: string;
+  cliente: string;
+  lote: string;
+  sistema: 'plano' | 'frances' | 'aleman';
+  estado_credito: string;
+  cuota: number;
+  cuotas_totales: number;
+  cuotas_pagadas: number;
+  cuotas_vencidas: number;
+  cuotas_atrasadas: number;
+  monto_vencido: number;
+  monto_pagado: number;
+  por_cobrar: number;
+  saldo_capital: number;
+  proximo_vencimiento: string | null;
+}
+
+export interface CarteraPorCobrar {
+  fecha: string;
+  totales: { creditos: number; con_atraso: number; monto_vencido: number; por_cobrar: number; saldo_capital: number };
+  count: number;
+  creditos: CreditoPorCobrar[];
+}
+
+export const creditosApi = {
+  // Toda la cartera en una sola petición: el backend la calcula en una pasada
+  porCobrar: (params: { fecha?: string; atrasados?: boolean } = {}) => {
+    const query = new URLSearchParams();
+    if (params.fecha) query.append('fecha', params.fecha);
+    if (params.atrasados) query.append('atrasados', 'true');
+    const qs = query.toString();
+    return api.get(`api/admin/creditos/por-cobrar/${qs ? `?${qs}` : ''}`) as Promise<CarteraPorCobrar>;
+  },
+  cronograma: (id: string, fecha?: string) =>
+    api.get(`api/admin/creditos/${id}/cronograma/${fecha ? `?fecha=${fecha}` : ''}`),
+};
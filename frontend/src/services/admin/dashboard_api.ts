@@ -0,0 +1,20 @@
+import { api } from '../api_base';
+
+export interface ResumenDashboard {
+  lotes: {
+    total: number;
+    valor_inventario: number;
+    area_vendida: number;
+    por_estado: { estado: number; estado_nombre: string; cantidad: number; valor_inventario: number; area_total: number }[];
+  };
+  cartera: { creditos: number; monto_creditos: number; cobrado: number; pendiente: number };
+  morosidad: {
+    deudores: number;
+    por_meses: { meses_deuda: number; clientes: number; monto_cuotas: number }[];
+  };
+}
+
+export const dashboardApi = {
+  // Lee las tablas de resumen del backend: el costo no depende del tamaño del historial
+  resumen: () => api.get('api/admin/dashboard/resumen/') as Promise<ResumenDashboard>,
+};
@@ -1,3 +1,6 @@
 export * from './clientes_api';
 export * from './lotes_api';
-export * from './cliente_lote_api';
\ No newline at end of file
+export * from './cliente_lote_api';
+export * from './dashboard_api';
+export * from './creditos_api';
+export * from './transacciones_api';
\ No newline at end of file
@@ -8,4 +8,6 @@ export const lotesApi = {
         }
         return api.get(url);
     },
+    // Descarga completa en streaming (se usa en un <a href>)
+    urlExportar: (formato: 'csv' | 'xlsx' = 'csv') => api.url(`api/admin/lotes/exportar/?formato=${formato}`),
 };
\ No newline at end of file
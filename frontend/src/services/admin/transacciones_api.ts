@@ -0,0 +1,53 @@
+import { api } from '../api_base';
+
+export interface Transaccion {
+  id: number;
+  fecha: string;
+  tipo: 'RESERVA' | 'VENTA' | 'CUOTA' | 'AMORTIZACION' | null;
+  monto: number | null;
+  metodo_pago: string | null;
+  credito_id: string | null;
+  cliente_id: string;
+  cliente: string;
+  lote: string;
+  archivada: boolean;
+}
+
+export interface FiltrosTransacciones {
+  cliente?: string;
+  lote?: string;
+  credito?: string;
+  tipo?: string;
+  metodo_pago?: string;
+  desde?: string;
+  hasta?: string;
+  archivo?: boolean;
+}
+
+export interface PaginaTransacciones {
+  next_cursor: string | null;
+  transacciones: Transaccion[];
+}
+
+const construirQuery = (filtros: FiltrosTransacciones, extra: Record<string, string> = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(filtros).forEach(([clave, valor]) => {
+    if (valor === undefined || valor === '' || valor === false) return;
+    query.append(clave, String(valor));
+  });
+  Object.entries(extra).forEach(([clave, valor]) => query.append(clave, valor));
+  const qs = query.toString();
+  return qs ? `?${qs}` : '';
+};
+
+export const transaccionesApi = {
+  // Página del libro (más recientes primero); `cursor` es el next_cursor de la página anterior
+  listar: (filtros: FiltrosTransacciones = {}, cursor?: string | null, limit = 50) =>
+    api.get(`api/admin/transacciones/${construirQuery(filtros, {
+      limit: String(limit),
+      ...(cursor ? { cursor } : {}),
+    })}`) as Promise<PaginaTransacciones>,
+  // URL de descarga (CSV o XLSX) con los mismos filtros (se usa en un <a href>)
+  urlExportar: (filtros: FiltrosTransacciones = {}, formato: 'csv' | 'xlsx' = 'csv') =>
+    api.url(`api/admin/transacciones/exportar/${construirQuery(filtros, { formato })}`),
+};
@@ -1,13 +1,19 @@
 const API_URL = import.meta.env.VITE_API_URL || '/api';
 
 export const api = {
-  request: async (endpoint: string, options: RequestInit = {}) => {
+  // URL absoluta de un endpoint (también para descargas con <a href>)
+  url: (endpoint: string) => {
     const base = API_URL.replace(/\/+$/, '');
     const path = endpoint.startsWith('/') ? endpoint : `/${endpoint}`;
-    const url = `${base}${path}`;
+    return `${base}${path}`;
+  },
+
+  request: async (endpoint: string, options: RequestInit = {}) => {
+    const url = api.url(endpoint);
 
     const response = await fetch(url, {
-      cache: 'no-store',
+      // no-cache: el navegador revalida con If-None-Match y reutiliza la respuesta si recibe 304
+      cache: 'no-cache',
       headers: {
         'Content-Type': 'application/json',
         ...options.headers,
@@ -1,6 +1,71 @@
 import { api } from '../api_base';
 
+export interface LoteMapa {
+  codigo: string;
+  manzana: string;
+  lote_numero: string;
+  estado: string;
+  estado_nombre: string;
+  area_lote: number;
+  perimetro: number;
+  precio: number | null;
+  descripcion: string | null;
+}
+
+// Respuesta de api/maps/lotes/?format=columnar (ver backend apps/maps/formatos.py)
+interface LotesColumnar {
+  v: number;
+  n: number;
+  codigo: string[];
+  lote_numero: string[];
+  manzanas: string[];
+  manzana: number[];
+  estados: Record<string, string>;
+  estado: number[];
+  area_lote: string;
+  perimetro: string;
+  precio: string;
+  descripcion: (string | null)[];
+}
+
+// Columnas numéricas: Float64Array little-endian en base64, NaN = null
+const decodificarFloat64 = (b64: string): Float64Array => {
+  const binario = atob(b64);
+  const bytes = new Uint8Array(binario.length);
+  for (let i = 0; i < binario.length; i++) bytes[i] = binario.charCodeAt(i);
+  const vista = new DataView(bytes.buffer);
+  const valores = new Float64Array(bytes.length / 8);
+  for (let i = 0; i < valores.length; i++) valores[i] = vista.getFloat64(i * 8, true);
+  return valores;
+};
+
+export const decodificarLotesColumnar = (data: LotesColumnar): LoteMapa[] => {
+  const area = decodificarFloat64(data.area_lote);
+  const perimetro = decodificarFloat64(data.perimetro);
+  const precio = decodificarFloat64(data.precio);
+  const lotes: LoteMapa[] = new Array(data.n);
+  for (let i = 0; i < data.n; i++) {
+    const estado = String(data.estado[i]);
+    lotes[i] = {
+      codigo: data.codigo[i],
+      manzana: data.manzanas[data.manzana[i]],
+      lote_numero: data.lote_numero[i],
+      estado,
+      estado_nombre: data.estados[estado],
+      area_lote: area[i],
+      perimetro: perimetro[i],
+      precio: Number.isNaN(precio[i]) ? null : precio[i],
+      descripcion: data.descripcion[i],
+    };
+  }
+  return lotes;
+};
+
 export const lotesMapaApi = {
   listar: () => api.get('api/maps/lotes/'),
+  listarColumnar: async (): Promise<LoteMapa[]> =>
+    decodificarLotesColumnar(await api.get('api/maps/lotes/?format=columnar')),
+  cambios: (since?: string) =>
+    api.get(since ? `api/maps/lotes/changes/?since=${encodeURIComponent(since)}` : 'api/maps/lotes/changes/'),
   detalle: (codigo: string) => api.get(`api/maps/lotes/${codigo}/`),
 };